@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two status checks of a submitted batch
+DEFAULT_POLL_INTERVAL = 30.0
+
+# Seconds to wait for a batch before giving up on it (providers allow up to 24 hours)
+DEFAULT_BATCH_TIMEOUT = 24 * 3600.0
+
+class BatchError(Exception):
+    """Exception raised when a batch cannot be submitted or its results cannot be collected."""
+    pass
+
+class BatchClient(ABC):
+    """
+    Client for one provider's batch API, called over the shared requests session.
+
+    Every request is a dict with "custom_id", "system_message", "prompt",
+    "max_tokens", "temperature" and "json_mode". Subclasses turn those into
+    the provider's submission format and read its results back.
+    """
+
+    provider = None
+    default_base_url = None
+    base_url_env = None
+
+    def __init__(self, api_key: str, model: str, session: Any, base_url: Optional[str] = None):
+        self.api_key = api_key
+        self.model = model
+        self.session = session
+        self.base_url = (base_url or os.environ.get(self.base_url_env) or self.default_base_url).rstrip("/")
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        response = self.session.request(method, url, headers=self.headers(), **kwargs)
+        if response.status_code >= 400:
+            raise BatchError(f"{self.provider} batch API returned {response.status_code}: {response.text[:500]}")
+        return response
+
+    @abstractmethod
+    def headers(self) -> Dict[str, str]:
+        """Return the authentication and version headers of every request."""
+
+    @abstractmethod
+    def submission_line(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the line of the JSONL submission file for one request."""
+
+    @abstractmethod
+    def submit(self, submission_path: str) -> str:
+        """Submit a JSONL submission file and return the batch ID."""
+
+    @abstractmethod
+    def poll(self, batch_id: str) -> Tuple[bool, Dict[str, Any]]:
+        """Return whether a batch has finished, and its latest status."""
+
+    @abstractmethod
+    def results(self, batch: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Return the response text per custom ID and the failure reason per custom ID."""
+
+    @abstractmethod
+    def cancel(self, batch_id: str) -> None:
+        """Ask the provider to stop processing a batch."""
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAI Batch API: upload a JSONL file, create a batch from it, download the output file."""
+
+    provider = "openai"
+    default_base_url = "https://api.openai.com/v1"
+    base_url_env = "OPENAI_BASE_URL"
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def submission_line(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": request["system_message"]},
+                {"role": "user", "content": request["prompt"]}
+            ],
+            "max_tokens": request["max_tokens"],
+            "temperature": request["temperature"]
+        }
+        if request["json_mode"]:
+            body["response_format"] = {"type": "json_object"}
+        return {"custom_id": request["custom_id"], "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def submit(self, submission_path: str) -> str:
+        with open(submission_path, 'rb') as f:
+            uploaded = self._request("POST", "/files", data={"purpose": "batch"},
+                                     files={"file": (os.path.basename(submission_path), f, "application/jsonl")}).json()
+        batch = self._request("POST", "/batches", json={
+            "input_file_id": uploaded["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        }).json()
+        return batch["id"]
+
+    def poll(self, batch_id: str) -> Tuple[bool, Dict[str, Any]]:
+        batch = self._request("GET", f"/batches/{batch_id}").json()
+        return batch["status"] in ("completed", "failed", "expired", "cancelled"), batch
+
+    def _read_file(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        content = self._request("GET", f"/files/{file_id}/content").text
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def results(self, batch: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        if batch["status"] == "failed":
+            errors = (batch.get("errors") or {}).get("data") or []
+            raise BatchError(f"OpenAI batch {batch['id']} failed: {errors[0].get('message') if errors else 'no details'}")
+        contents, failures = {}, {}
+        # Requests that failed are listed in the error file, not the output file
+        for line in self._read_file(batch.get("output_file_id")) + self._read_file(batch.get("error_file_id")):
+            response = line.get("response") or {}
+            if line.get("error") or response.get("status_code") != 200:
+                failures[line["custom_id"]] = str(line.get("error") or response.get("body"))
+                continue
+            choice = response["body"]["choices"][0]
+            # A response cut off at max_tokens is left to the synchronous path, which continues it
+            if choice.get("finish_reason") == "length":
+                failures[line["custom_id"]] = "response reached max_tokens"
+                continue
+            contents[line["custom_id"]] = choice["message"]["content"]
+        return contents, failures
+
+    def cancel(self, batch_id: str) -> None:
+        self._request("POST", f"/batches/{batch_id}/cancel")
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic Message Batches API: post the requests, then stream the results from results_url."""
+
+    provider = "anthropic"
+    default_base_url = "https://api.anthropic.com"
+    base_url_env = "ANTHROPIC_BASE_URL"
+
+    def headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+
+    def submission_line(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "custom_id": request["custom_id"],
+            "params": {
+                "model": self.model,
+                "max_tokens": request["max_tokens"],
+                "temperature": request["temperature"],
+                "system": request["system_message"],
+                "messages": [{"role": "user", "content": request["prompt"]}]
+            }
+        }
+
+    def submit(self, submission_path: str) -> str:
+        with open(submission_path, 'r') as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        return self._request("POST", "/v1/messages/batches", json={"requests": requests}).json()["id"]
+
+    def poll(self, batch_id: str) -> Tuple[bool, Dict[str, Any]]:
+        batch = self._request("GET", f"/v1/messages/batches/{batch_id}").json()
+        return batch["processing_status"] == "ended", batch
+
+    def results(self, batch: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        contents, failures = {}, {}
+        content = self._request("GET", batch["results_url"]).text
+        for line in (json.loads(line) for line in content.splitlines() if line.strip()):
+            result = line.get("result") or {}
+            if result.get("type") != "succeeded":
+                failures[line["custom_id"]] = str(result.get("error") or result.get("type"))
+                continue
+            if result["message"].get("stop_reason") == "max_tokens":
+                failures[line["custom_id"]] = "response reached max_tokens"
+                continue
+            contents[line["custom_id"]] = "".join(
+                block.get("text", "") for block in result["message"]["content"] if block.get("type") == "text"
+            )
+        return contents, failures
+
+    def cancel(self, batch_id: str) -> None:
+        self._request("POST", f"/v1/messages/batches/{batch_id}/cancel")
+
+# Providers with a batch API, by provider name
+BATCH_CLIENTS = {
+    "openai": OpenAIBatchClient,
+    "anthropic": AnthropicBatchClient
+}
+
+def write_submission_file(client: BatchClient, requests: List[Dict[str, Any]], path: str) -> None:
+    """Write the requests to a JSONL submission file in the provider's format."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        for request in requests:
+            f.write(json.dumps(client.submission_line(request)) + "\n")
+
+def run_batch(
+    client: BatchClient,
+    requests: List[Dict[str, Any]],
+    submission_path: str,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    timeout: float = DEFAULT_BATCH_TIMEOUT
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Submit requests as one batch, wait for it to finish and collect the results.
+
+    Args:
+        client: Batch client of the provider to use
+        requests: The requests, each with a unique "custom_id"
+        submission_path: Where to write the JSONL submission file
+        poll_interval: Seconds between status checks
+        timeout: Seconds to wait before cancelling the batch
+
+    Returns:
+        Tuple of (response text per custom ID, failure reason per custom ID);
+        every request appears in exactly one of them
+    """
+    write_submission_file(client, requests, submission_path)
+    batch_id = client.submit(submission_path)
+    logger.info(f"Submitted {len(requests)} requests to {client.provider} as batch {batch_id} ({submission_path})")
+
+    started = time.monotonic()
+    while True:
+        done, batch = client.poll(batch_id)
+        if done:
+            break
+        if time.monotonic() - started >= timeout:
+            logger.warning(f"Batch {batch_id} not finished after {timeout:.0f}s; cancelling it")
+            try:
+                client.cancel(batch_id)
+            except BatchError as e:
+                logger.warning(f"Could not cancel batch {batch_id}: {str(e)}")
+            return {}, {request["custom_id"]: "batch timed out" for request in requests}
+        counts = batch.get("request_counts") or {}
+        logger.info(f"Batch {batch_id} still running ({json.dumps(counts)})")
+        time.sleep(poll_interval)
+
+    contents, failures = client.results(batch)
+    for request in requests:
+        if request["custom_id"] not in contents and request["custom_id"] not in failures:
+            failures[request["custom_id"]] = "missing from batch results"
+    logger.info(f"Batch {batch_id} finished in {time.monotonic() - started:.0f}s: "
+                f"{len(contents)} succeeded, {len(failures)} failed")
+    return contents, failures
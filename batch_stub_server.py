@@ -0,0 +1,254 @@
+import re
+import json
+import logging
+import argparse
+import threading
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Outcomes a stand-in request can have
+SUCCEEDED = "succeeded"
+ERRORED = "errored"
+MAX_TOKENS = "max_tokens"
+
+def default_responder(custom_id: str, prompt: str) -> Tuple[str, str]:
+    """Answer every request successfully with a short text naming it."""
+    return SUCCEEDED, f"Stand-in response to {custom_id}"
+
+class StubBatchServer:
+    """
+    Local stand-in for the OpenAI and Anthropic batch APIs.
+
+    Serves the endpoints OpenAIBatchClient and AnthropicBatchClient use
+    (/files, /files/{id}/content, /batches and /v1/messages/batches, with
+    or without a /v1 prefix for the OpenAI ones), so --batch mode can be
+    tried without a provider account. A batch reports itself as running
+    for the first polls_until_done polls (forever if None) and then
+    finishes; each request's outcome and text come from the responder.
+
+    Run it in the background with start() or as a context manager, and
+    point a batch client's base_url (or --batch-base-url) at url.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[str, str], Tuple[str, str]] = default_responder,
+        polls_until_done: Optional[int] = 1,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self.files: Dict[str, str] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, for either client."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Serve requests in the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def start(self) -> "StubBatchServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop a server started with start()."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubBatchServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _add_file(self, content: str) -> str:
+        with self._lock:
+            file_id = f"file-{len(self.files) + 1}"
+            self.files[file_id] = content
+        return file_id
+
+    def _add_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            batch.update(id=f"batch-{len(self.batches) + 1}", polls=0, cancelled=False)
+            self.batches[batch["id"]] = batch
+        return batch
+
+    def _poll(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Count one status check of a batch and return it, or None if it does not exist."""
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is not None:
+                batch["polls"] += 1
+            return batch
+
+    def _running(self, batch: Dict[str, Any]) -> bool:
+        return not batch["cancelled"] and (self.polls_until_done is None or batch["polls"] <= self.polls_until_done)
+
+    def _openai_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        total = len(batch["requests"])
+        status = {"id": batch["id"], "status": "in_progress",
+                  "request_counts": {"total": total, "completed": 0, "failed": 0}}
+        if batch["cancelled"]:
+            status["status"] = "cancelled"
+        elif not self._running(batch):
+            if "output_file_id" not in batch:
+                output, errors = [], []
+                for line in batch["requests"]:
+                    outcome, text = self.responder(line["custom_id"], line["body"]["messages"][-1]["content"])
+                    if outcome == ERRORED:
+                        errors.append({"custom_id": line["custom_id"], "error": None, "response": {
+                            "status_code": 500, "body": {"error": {"message": text}}}})
+                        continue
+                    finish_reason = "length" if outcome == MAX_TOKENS else "stop"
+                    output.append({"custom_id": line["custom_id"], "error": None, "response": {
+                        "status_code": 200, "body": {"choices": [
+                            {"message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}]}}})
+                batch["output_file_id"] = self._add_file("".join(json.dumps(line) + "\n" for line in output))
+                batch["error_file_id"] = self._add_file("".join(json.dumps(line) + "\n" for line in errors))
+                batch["failed"] = len(errors)
+            status.update(status="completed", output_file_id=batch["output_file_id"],
+                          error_file_id=batch["error_file_id"],
+                          request_counts={"total": total, "completed": total - batch["failed"],
+                                          "failed": batch["failed"]})
+        return status
+
+    def _anthropic_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        status = {"id": batch["id"], "processing_status": "in_progress",
+                  "request_counts": {"processing": len(batch["requests"])}}
+        if batch["cancelled"] or not self._running(batch):
+            status.update(processing_status="ended",
+                          results_url=f"{self.url}/v1/messages/batches/{batch['id']}/results")
+        return status
+
+    def _anthropic_results(self, batch: Dict[str, Any]) -> str:
+        lines = []
+        for request in batch["requests"]:
+            if batch["cancelled"]:
+                lines.append({"custom_id": request["custom_id"], "result": {"type": "canceled"}})
+                continue
+            outcome, text = self.responder(request["custom_id"], request["params"]["messages"][-1]["content"])
+            if outcome == ERRORED:
+                result = {"type": "errored", "error": {"type": "api_error", "message": text}}
+            else:
+                stop_reason = "max_tokens" if outcome == MAX_TOKENS else "end_turn"
+                result = {"type": "succeeded", "message": {
+                    "role": "assistant", "stop_reason": stop_reason, "content": [{"type": "text", "text": text}]}}
+            lines.append({"custom_id": request["custom_id"], "result": result})
+        return "".join(json.dumps(line) + "\n" for line in lines)
+
+    def _handler(self) -> Any:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format % args)
+
+            def _reply(self, body: Any, status: int = 200) -> None:
+                data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain" if isinstance(body, str) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self) -> None:
+                self._reply({"error": {"message": f"No route for {self.command} {self.path}"}}, 404)
+
+            def _path(self) -> str:
+                # The OpenAI routes are served with and without the /v1 prefix of the base URL
+                if self.path.startswith("/v1/") and not self.path.startswith("/v1/messages/"):
+                    return self.path[3:]
+                return self.path
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def _uploaded_file(self, body: bytes) -> Optional[str]:
+                """Return the content of the "file" part of a multipart upload."""
+                message = BytesParser(policy=policy.default).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + body)
+                for part in message.iter_parts():
+                    if part.get_param("name", header="content-disposition") == "file":
+                        return part.get_payload(decode=True).decode("utf-8")
+                return None
+
+            def do_POST(self) -> None:
+                path = self._path()
+                body = self._body()
+                if path == "/files":
+                    content = self._uploaded_file(body)
+                    if content is None:
+                        return self._reply({"error": {"message": "missing file"}}, 400)
+                    return self._reply({"id": stub._add_file(content), "purpose": "batch"})
+                if path == "/batches":
+                    input_file = stub.files.get(json.loads(body)["input_file_id"])
+                    if input_file is None:
+                        return self._reply({"error": {"message": "unknown input_file_id"}}, 400)
+                    requests = [json.loads(line) for line in input_file.splitlines() if line.strip()]
+                    batch = stub._add_batch({"provider": "openai", "requests": requests})
+                    return self._reply({"id": batch["id"], "status": "validating"})
+                if path == "/v1/messages/batches":
+                    batch = stub._add_batch({"provider": "anthropic", "requests": json.loads(body)["requests"]})
+                    return self._reply({"id": batch["id"], "processing_status": "in_progress"})
+                match = re.fullmatch(r"(/v1/messages)?/batches/([^/]+)/cancel", path)
+                if match and match.group(2) in stub.batches:
+                    stub.batches[match.group(2)]["cancelled"] = True
+                    return self._reply({"id": match.group(2)})
+                self._not_found()
+
+            def do_GET(self) -> None:
+                path = self._path()
+                match = re.fullmatch(r"/files/([^/]+)/content", path)
+                if match and match.group(1) in stub.files:
+                    return self._reply(stub.files[match.group(1)])
+                match = re.fullmatch(r"/v1/messages/batches/([^/]+)/results", path)
+                if match and match.group(1) in stub.batches:
+                    return self._reply(stub._anthropic_results(stub.batches[match.group(1)]))
+                match = re.fullmatch(r"(/v1/messages)?/batches/([^/]+)", path)
+                batch = stub._poll(match.group(2)) if match else None
+                if batch is not None:
+                    if batch["provider"] == "anthropic":
+                        return self._reply(stub._anthropic_batch(batch))
+                    return self._reply(stub._openai_batch(batch))
+                self._not_found()
+
+        return Handler
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the OpenAI and Anthropic batch APIs')
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--polls-until-done', type=int, default=1,
+                        help='Status checks a batch reports as running before it finishes (default: 1)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    server = StubBatchServer(polls_until_done=args.polls_until_done, host=args.host, port=args.port)
+    logger.info(f"Serving stand-in batch API at {server.url} (use --batch-base-url {server.url}/v1 for OpenAI, "
+                f"{server.url} for Anthropic)")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
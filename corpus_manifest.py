@@ -0,0 +1,189 @@
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from extraction_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+def discover_pdfs(folder: str, recursive: bool = True) -> List[str]:
+    """
+    Find the PDF files in a folder.
+
+    Matching is case-insensitive, so ".PDF" files are found too.
+
+    Args:
+        folder: Folder to search
+        recursive: Whether to descend into subfolders
+
+    Returns:
+        Sorted list of PDF file paths
+    """
+    pdf_files = []
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not entry.name.startswith('.'):
+                            pending.append(entry.path)
+                    elif entry.name.lower().endswith('.pdf') and entry.is_file():
+                        pdf_files.append(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not scan folder {current}: {str(e)}")
+    return sorted(pdf_files)
+
+class CorpusManifest:
+    """
+    Record of the PDFs already processed and where their summaries are stored.
+
+    Each entry holds a PDF's path, size, modification time, content hash and
+    the ID of its stored summary. A PDF whose size and modification time are
+    unchanged is trusted without re-hashing; one whose metadata changed is
+    only treated as changed if its content hash differs.
+    """
+
+    def __init__(self, manifest_path: str, summaries_dir: Optional[str] = None, save_every: int = 20):
+        self.manifest_path = manifest_path
+        self.summaries_dir = summaries_dir or os.path.join(os.path.dirname(manifest_path), 'summaries')
+        self.save_every = save_every
+        self.entries = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def _key(self, pdf_path: str) -> str:
+        return os.path.abspath(pdf_path)
+
+    def load(self) -> None:
+        """Load the manifest from disk, starting empty if there is none."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self.entries = json.load(f).get("files", {})
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {str(e)}")
+            self.entries = {}
+
+    def save(self) -> None:
+        """Write the manifest to disk atomically."""
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"files": self.entries}, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+            self._unsaved = 0
+
+    def _summary_path(self, summary_id: str) -> str:
+        return os.path.join(self.summaries_dir, f"{summary_id}.json")
+
+    def classify(self, pdf_paths: List[str]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Split PDFs into those with a stored summary and those needing analysis.
+
+        Args:
+            pdf_paths: The PDFs in the corpus
+
+        Returns:
+            Tuple of (dict of unchanged PDF path to summary ID, list of new or changed PDF paths)
+        """
+        unchanged = {}
+        changed = []
+        for pdf_path in pdf_paths:
+            entry = self.entries.get(self._key(pdf_path))
+            if entry is None or not os.path.exists(self._summary_path(entry["summary_id"])):
+                changed.append(pdf_path)
+                continue
+            st = os.stat(pdf_path)
+            if st.st_size == entry["size"] and st.st_mtime == entry["mtime"]:
+                unchanged[pdf_path] = entry["summary_id"]
+            elif st.st_size == entry["size"] and hash_file(pdf_path) == entry["sha256"]:
+                # Touched but not modified; remember the new mtime
+                with self._lock:
+                    entry["mtime"] = st.st_mtime
+                    self._unsaved += 1
+                unchanged[pdf_path] = entry["summary_id"]
+            else:
+                changed.append(pdf_path)
+        return unchanged, changed
+
+    def load_summary(self, summary_id: str) -> Dict[str, Any]:
+        """Return a stored summary as a dict."""
+        with open(self._summary_path(summary_id), 'r') as f:
+            return json.load(f)
+
+    def record(self, pdf_path: str, summary: Dict[str, Any], content_hash: Optional[str] = None) -> str:
+        """
+        Store a PDF's summary and update its manifest entry.
+
+        Args:
+            pdf_path: Path to the PDF
+            summary: The summary to store
+            content_hash: The PDF's SHA-256, if already known
+
+        Returns:
+            The summary ID
+        """
+        st = os.stat(pdf_path)
+        content_hash = content_hash or hash_file(pdf_path)
+        summary_id = content_hash[:32]
+
+        os.makedirs(self.summaries_dir, exist_ok=True)
+        summary_path = self._summary_path(summary_id)
+        tmp_path = f"{summary_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp_path, summary_path)
+
+        with self._lock:
+            self.entries[self._key(pdf_path)] = {
+                "path": pdf_path,
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+                "sha256": content_hash,
+                "summary_id": summary_id
+            }
+            self._unsaved += 1
+            save_now = self._unsaved >= self.save_every
+        if save_now:
+            self.save()
+        return summary_id
+
+    def prune(self, pdf_paths: List[str]) -> int:
+        """
+        Drop entries for PDFs that are no longer part of the corpus, and the summaries no entry uses.
+
+        Args:
+            pdf_paths: The PDFs currently in the corpus
+
+        Returns:
+            The number of entries removed
+        """
+        current = {self._key(p) for p in pdf_paths}
+        with self._lock:
+            stale = [key for key in self.entries if key not in current]
+            for key in stale:
+                del self.entries[key]
+            self._unsaved += len(stale)
+            referenced = {entry["summary_id"] for entry in self.entries.values()}
+
+        removed = 0
+        try:
+            names = os.listdir(self.summaries_dir)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            if name.endswith(".json") and name[:-len(".json")] not in referenced:
+                try:
+                    os.remove(os.path.join(self.summaries_dir, name))
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not remove unused summary {name}: {str(e)}")
+        if stale or removed:
+            logger.info(f"Pruned {len(stale)} manifest entries and {removed} unused summaries")
+        return len(stale)
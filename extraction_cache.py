@@ -0,0 +1,190 @@
+import os
+import zlib
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Suffix for compressed cache entries on disk
+ENTRY_SUFFIX = ".txt.z"
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 content hash of a file.
+
+    Args:
+        file_path: Path to the file to hash
+        chunk_size: Number of bytes read per iteration
+
+    Returns:
+        The hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """
+    Persistent, content-addressed cache for cleaned PDF text.
+
+    Entries are keyed by the PDF's content hash and the extractor version,
+    stored zlib-compressed, and evicted least-recently-used first once the
+    cache grows beyond max_bytes. The file modification time of an entry
+    doubles as its last access time, so the cache can be shared by several
+    processes without a separate index.
+
+    The total size is kept in memory, so the directory is only scanned once
+    and when entries must be evicted. Copies sent to worker processes start
+    from the parent's total and report their size changes back through
+    merge_stats().
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, compression_level: int = 6):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        # Bytes added minus bytes removed by this instance since it was copied
+        self._size_change = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _current_total(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._scan())
+        return self._total_bytes
+
+    def __getstate__(self) -> Dict:
+        # Copies sent to worker processes start with fresh counters, the parent's total and no lock;
+        # their counters and size changes are folded back into the parent with merge_stats()
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_total_bytes'] = self._current_total()
+        del state['_lock']
+        state.update(hits=0, misses=0, evictions=0, _size_change=0)
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content_hash: str, extractor_version: str) -> str:
+        """Build a cache key from a content hash and the extractor version."""
+        return hashlib.sha256(f"{content_hash}:{extractor_version}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up cached text for a key.
+
+        Args:
+            key: Cache key built with make_key()
+
+        Returns:
+            The cached text, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+            # Touch the entry so it counts as recently used
+            os.utime(path, None)
+        except (FileNotFoundError, zlib.error, UnicodeDecodeError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Store text under a key, evicting old entries if the cache is over budget.
+
+        Args:
+            key: Cache key built with make_key()
+            text: The cleaned text to store
+        """
+        path = self._entry_path(key)
+        data = zlib.compress(text.encode("utf-8"), self.compression_level)
+        try:
+            # An overwritten entry no longer counts towards the total
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache entry {path}: {str(e)}")
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += len(data) - replaced
+            self._size_change += len(data) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> List[Tuple[str, int, float]]:
+        """Return (path, size, last_access) for every entry in the cache."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self._size_change -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def merge_stats(self, stats: Dict[str, int]) -> None:
+        """Add counters and the size change reported by a copy of this cache in another process."""
+        with self._lock:
+            self.hits += stats.get("hits", 0)
+            self.misses += stats.get("misses", 0)
+            self.evictions += stats.get("evictions", 0)
+            if self._total_bytes is not None:
+                self._total_bytes += stats.get("size_change", 0)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and eviction counters and the bytes added (net) by this cache instance."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size_change": self._size_change}
@@ -0,0 +1,182 @@
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ExtractionFailed(Exception):
+    """Exception raised when a watchdog-supervised task fails."""
+    pass
+
+class ExtractionTimeout(ExtractionFailed):
+    """Exception raised when a task exceeds its wall-clock limit."""
+    pass
+
+class ExtractionMemoryLimit(ExtractionFailed):
+    """Exception raised when a task exceeds its memory limit."""
+    pass
+
+class ExtractionWorkerCrashed(ExtractionFailed):
+    """Exception raised when a worker process dies while running a task."""
+    pass
+
+def _apply_memory_limit(memory_limit_bytes: int) -> None:
+    """Cap the address space of the current process, where the platform supports it."""
+    try:
+        import resource
+    except ImportError:
+        logger.warning("Memory limits are not supported on this platform; running without one")
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+
+def _worker_main(conn: Any, memory_limit_bytes: Optional[int]) -> None:
+    """Run tasks received over a pipe until told to stop."""
+    if memory_limit_bytes:
+        _apply_memory_limit(memory_limit_bytes)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, args, kwargs = task
+        try:
+            conn.send(("ok", fn(*args, **kwargs)))
+        except MemoryError:
+            conn.send(("memory", "memory limit exceeded"))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+class WatchdogPool(Executor):
+    """
+    Process pool whose tasks can be killed individually.
+
+    Each worker slot owns one long-lived worker process, supervised by a
+    thread in the parent. A task that runs past its timeout has its process
+    killed and replaced, and its future fails with ExtractionTimeout; a task
+    that exhausts its memory limit fails with ExtractionMemoryLimit. The other
+    slots keep running, so one pathological input costs a single slot for at
+    most one timeout.
+    """
+
+    def __init__(self, max_workers: int, timeout: Optional[float] = None, memory_limit_mb: Optional[int] = None):
+        self.timeout = timeout
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self._tasks = queue.Queue()
+        # Workers are started from supervisor threads while other threads may hold locks,
+        # so they must not be forked from this process
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self._shutdown = False
+        self._supervisors = [
+            threading.Thread(target=self._supervise, name=f"watchdog-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for supervisor in self._supervisors:
+            supervisor.start()
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """Schedule fn(*args, **kwargs) in a worker process and return its future."""
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new tasks after shutdown")
+        future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Stop the worker processes once queued tasks have run."""
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                item[0].cancel()
+        for _ in self._supervisors:
+            self._tasks.put(None)
+        if wait:
+            for supervisor in self._supervisors:
+                supervisor.join()
+
+    def _spawn(self) -> Tuple[Any, Any]:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit_bytes),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    @staticmethod
+    def _kill(process: Any) -> None:
+        process.kill()
+        process.join()
+
+    def _run_task(self, process: Any, conn: Any, fn: Callable, args: Tuple, kwargs: dict) -> Tuple[str, Any]:
+        """Send one task to a worker and wait for its outcome."""
+        try:
+            conn.send((fn, args, kwargs))
+            if not conn.poll(self.timeout):
+                self._kill(process)
+                return "timeout", f"timed out after {self.timeout}s"
+            return conn.recv()
+        except (EOFError, OSError):
+            process.join(timeout=5)
+            return "crashed", f"worker process died (exit code {process.exitcode})"
+
+    def _supervise(self) -> None:
+        process = conn = None
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is None:
+                    break
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                if process is None or not process.is_alive():
+                    process, conn = self._spawn()
+                try:
+                    status, value = self._run_task(process, conn, fn, args, kwargs)
+                except Exception as e:
+                    # E.g. a task or result that cannot be pickled; fail the task, not the supervisor
+                    future.set_exception(e)
+                    if process.is_alive():
+                        self._kill(process)
+                    process = None
+                    continue
+
+                if status == "ok":
+                    future.set_result(value)
+                    continue
+                if status == "timeout":
+                    future.set_exception(ExtractionTimeout(value))
+                elif status == "memory":
+                    future.set_exception(ExtractionMemoryLimit(value))
+                elif status == "crashed":
+                    future.set_exception(ExtractionWorkerCrashed(value))
+                else:
+                    future.set_exception(ExtractionFailed(value))
+
+                # Start a fresh worker after anything that may have left it in a bad state
+                if status != "error":
+                    if process.is_alive():
+                        self._kill(process)
+                    process = None
+        finally:
+            if process is not None and process.is_alive():
+                try:
+                    conn.send(None)
+                    process.join(timeout=5)
+                except OSError:
+                    pass
+                if process.is_alive():
+                    self._kill(process)
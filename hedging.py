@@ -0,0 +1,171 @@
+import math
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Percentile of recent latency after which a request is hedged
+DEFAULT_HEDGE_PERCENTILE = 95.0
+
+# Maximum fraction of requests that may be hedged
+DEFAULT_HEDGE_BUDGET = 0.1
+
+# Latency samples needed before the hedge delay is trusted
+MIN_SAMPLES = 20
+
+# Number of recent latencies the hedge delay is computed from
+WINDOW_SIZE = 500
+
+# Stages whose requests are hedged; long requests such as the synthesis would almost always be duplicated
+DEFAULT_HEDGED_STAGES = ("analysis",)
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Return the pct-th percentile of samples (nearest rank), or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+class HedgingPolicy:
+    """
+    Decides when a slow provider request is duplicated to the next provider.
+
+    Only requests of the hedged stages (paper analyses by default) are
+    hedged. A request is hedged once it has been waiting longer than the
+    configured percentile of recent unhedged latencies of its stage. At most
+    one hedge is sent per request, and only while hedged requests stay
+    within budget (a fraction of all requests), so hedging can never more
+    than double the spend.
+
+    Two latency distributions are recorded for the run report: the latency
+    callers actually saw ("with hedging") and the latency the first provider
+    would have had on its own ("without hedging"), measured by letting the
+    losing request finish in the background.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        budget: float = DEFAULT_HEDGE_BUDGET,
+        stages: Tuple[str, ...] = DEFAULT_HEDGED_STAGES
+    ):
+        self.enabled = enabled
+        self.hedge_percentile = hedge_percentile
+        self.budget = budget
+        self.stages = stages
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._unhedged: Dict[Optional[str], deque] = {}
+        self._observed: List[float] = []
+        self._without: List[float] = []
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        hedge_percentile: Optional[float] = None,
+        budget: Optional[float] = None
+    ) -> None:
+        """
+        Turn hedging on or off and set its trigger and budget.
+
+        Args:
+            enabled: Whether requests are hedged
+            hedge_percentile: Percentile of recent latency after which a request is hedged
+            budget: Maximum fraction of requests that may be hedged (0 to 1)
+        """
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if hedge_percentile is not None:
+                self.hedge_percentile = min(max(hedge_percentile, 1.0), 99.9)
+            if budget is not None:
+                self.budget = min(max(budget, 0.0), 1.0)
+
+    def hedges_stage(self, stage: Optional[str]) -> bool:
+        """Return whether requests of a stage are hedged."""
+        return self.enabled and stage in self.stages
+
+    def _window(self, stage: Optional[str]) -> deque:
+        return self._unhedged.setdefault(stage, deque(maxlen=WINDOW_SIZE))
+
+    def executor(self) -> ThreadPoolExecutor:
+        """Return the thread pool that runs hedged synchronous requests."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="hedged-request")
+            return self._executor
+
+    def hedge_delay(self, stage: Optional[str] = None) -> Optional[float]:
+        """Seconds to wait before hedging a new request of a stage, or None until enough latencies are known."""
+        with self._lock:
+            self.requests += 1
+            window = self._window(stage)
+            if len(window) < MIN_SAMPLES:
+                return None
+            return percentile(list(window), self.hedge_percentile)
+
+    def try_spend(self) -> bool:
+        """Reserve one hedge if the budget allows it."""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record(self, observed: float, hedge_won: bool = False, stage: Optional[str] = None) -> None:
+        """
+        Record one finished request.
+
+        Args:
+            observed: Seconds until the caller got an answer
+            hedge_won: Whether the hedged request answered first; the first
+                provider's own latency is then recorded by record_primary()
+            stage: The request's stage, whose latency window is updated
+        """
+        with self._lock:
+            self._observed.append(observed)
+            if hedge_won:
+                self.hedge_wins += 1
+            else:
+                self._without.append(observed)
+                self._window(stage).append(observed)
+
+    def record_primary(self, latency: float, stage: Optional[str] = None) -> None:
+        """Record how long a first provider took after its request was overtaken by a hedge."""
+        with self._lock:
+            self._without.append(latency)
+            self._window(stage).append(latency)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return request and hedge counts with p50, p95 and p99 latency with and without hedging."""
+        with self._lock:
+            observed = list(self._observed)
+            without = list(self._without)
+            stats = {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+        for pct in (50, 95, 99):
+            stats[f"p{pct}"] = percentile(observed, pct)
+            stats[f"p{pct}_without_hedging"] = percentile(without, pct)
+        return stats
+
+    def summary(self) -> str:
+        """Return a one-line report of hedging and its effect on tail latency."""
+        stats = self.stats()
+
+        def fmt(value: Optional[float]) -> str:
+            return "n/a" if value is None else f"{value:.2f}s"
+
+        with_hedging = " / ".join(fmt(stats[f"p{pct}"]) for pct in (50, 95, 99))
+        without_hedging = " / ".join(fmt(stats[f"p{pct}_without_hedging"]) for pct in (50, 95, 99))
+        return (f"Hedging: {stats['hedges']} of {stats['requests']} requests hedged, {stats['hedge_wins']} won; "
+                f"p50/p95/p99 latency {with_hedging} with hedging, {without_hedging} without")
+
+# Shared by every provider call in the process
+request_hedging = HedgingPolicy()
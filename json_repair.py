@@ -0,0 +1,267 @@
+import re
+import json
+import logging
+import threading
+import typing
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Python literals models sometimes emit instead of their JSON equivalents
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# How many incomplete trailing members may be dropped from a truncated response
+MAX_TRUNCATION_CUTS = 20
+
+_CODE_FENCE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*(?:```|$)")
+_INTEGER = re.compile(r"-?\d+")
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the outermost JSON object in a response, dropping prose and code fences around it.
+
+    If the object is not closed (a truncated response), everything from its
+    opening brace on is returned.
+    """
+    fenced = _CODE_FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    start = text.find("{")
+    if start < 0:
+        return None
+    end = text.rfind("}")
+    return text[start:end + 1] if end > start else text[start:]
+
+def _normalize(text: str) -> Tuple[str, List[int]]:
+    """
+    Fix syntax faults outside strings: trailing commas, Python literals and single-quoted strings.
+
+    Returns:
+        Tuple of (normalized text, positions of commas outside strings)
+    """
+    out = []
+    commas = []
+    in_string = False
+    quote = '"'
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                in_string = False
+                ch = '"'
+            elif ch == '"':
+                # A double quote inside a single-quoted string
+                ch = '\\"'
+            out.append(ch)
+            i += 1
+            continue
+        if ch in "\"'":
+            in_string, quote = True, ch
+            out.append('"')
+        elif ch in "}]":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                commas.pop()
+            out.append(ch)
+        elif ch == ",":
+            commas.append(len(out))
+            out.append(ch)
+        elif ch.isalpha():
+            word = re.match(r"[A-Za-z]+", text[i:]).group(0)
+            out.append(_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out), commas
+
+def _close(text: str) -> str:
+    """Close an unterminated string and any brackets left open by a truncated response."""
+    stack = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack and stack[-1] == ch:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+def parse_json_tolerant(text: str) -> Any:
+    """
+    Parse the JSON object in a model response, repairing common faults.
+
+    Handles prose or code fences around the object, trailing commas, Python
+    literals, single quotes, raw control characters in strings and responses
+    truncated mid-object (incomplete trailing members are dropped). Other
+    faults, such as a missing comma, are not repaired.
+
+    Args:
+        text: The response text
+
+    Returns:
+        The parsed object
+
+    Raises:
+        ValueError: If no object can be recovered
+    """
+    candidate = extract_json_object(text)
+    if candidate is None:
+        raise ValueError("No JSON object found in response")
+    try:
+        return json.loads(candidate, strict=False)
+    except json.JSONDecodeError:
+        pass
+    normalized, commas = _normalize(candidate)
+    # Only a truncated object (one _close has to terminate) may lose its incomplete trailing members;
+    # cutting back a complete object would drop members that are there but malformed
+    truncated = _close(normalized) != normalized.rstrip()
+    cuts = [len(normalized)]
+    if truncated:
+        cuts += list(reversed(commas))[:MAX_TRUNCATION_CUTS]
+    for cut in cuts:
+        try:
+            return json.loads(_close(normalized[:cut]), strict=False)
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Could not repair JSON object in response")
+
+def _coerce(value: Any, annotation: Any) -> Any:
+    """Coerce a value to a str, int or list of str field type where that is unambiguous."""
+    if annotation is int:
+        if isinstance(value, str):
+            match = _INTEGER.search(value)
+            return int(match.group(0)) if match else value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+    if annotation is str:
+        if isinstance(value, list):
+            return "; ".join(str(item) for item in value)
+        if isinstance(value, (int, float)):
+            return str(value)
+        return value
+    if typing.get_origin(annotation) in (list, List) and typing.get_args(annotation) == (str,):
+        if isinstance(value, str):
+            separator = ";" if ";" in value else "\n" if "\n" in value else ","
+            return [part.strip() for part in value.split(separator) if part.strip()]
+        if isinstance(value, list):
+            return [item if isinstance(item, str) else json.dumps(item) if isinstance(item, dict) else str(item)
+                    for item in value]
+    return value
+
+def _default(annotation: Any) -> Any:
+    if typing.get_origin(annotation) in (list, List):
+        return []
+    if annotation is str:
+        return "Not specified"
+    return None
+
+class JsonRepairer:
+    """
+    Local recovery of malformed structured responses, with counters of the calls it saved.
+
+    A response that fails validation is parsed tolerantly, its fields are
+    coerced to the model's types and missing fields are filled with defaults
+    (except the required ones). Each successful recovery is one provider call
+    that did not have to be retried.
+    """
+
+    def __init__(self):
+        self.attempts = 0
+        self.saved_calls = 0
+        self.failures = 0
+        self.filled_fields = 0
+        self._lock = threading.Lock()
+
+    def repair(
+        self,
+        text: str,
+        model_class: Type[Any],
+        required: Iterable[str] = (),
+        data: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Recover a model instance from a response that failed validation.
+
+        Args:
+            text: The raw response text (ignored if data is given)
+            model_class: Pydantic model to validate against
+            required: Fields that must be present in the response; others are filled with defaults
+            data: An already parsed object to coerce instead of text
+
+        Returns:
+            The validated model instance
+
+        Raises:
+            ValueError: If the response cannot be recovered
+        """
+        with self._lock:
+            self.attempts += 1
+        try:
+            if data is None:
+                data = parse_json_tolerant(text)
+            if not isinstance(data, dict):
+                raise ValueError("Response is not a JSON object")
+            fields = {}
+            filled = 0
+            for name, field in model_class.model_fields.items():
+                if data.get(name) is None:
+                    default = _default(field.annotation)
+                    if name in required or default is None:
+                        raise ValueError(f"Required field {name} is missing")
+                    fields[name] = default
+                    filled += 1
+                else:
+                    fields[name] = _coerce(data[name], field.annotation)
+            instance = model_class.model_validate(fields)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            raise ValueError(f"JSON repair failed: {str(e).splitlines()[0]}") from e
+        with self._lock:
+            self.saved_calls += 1
+            self.filled_fields += filled
+        return instance
+
+    def stats(self) -> Dict[str, int]:
+        """Return repair attempts, provider calls saved, failures and fields filled with defaults."""
+        with self._lock:
+            return {"attempts": self.attempts, "saved_calls": self.saved_calls,
+                    "failures": self.failures, "filled_fields": self.filled_fields}
+
+    def summary(self) -> str:
+        """Return a one-line report of the local JSON repairs."""
+        stats = self.stats()
+        return (f"JSON repair: {stats['saved_calls']} of {stats['attempts']} malformed responses recovered locally "
+                f"({stats['saved_calls']} provider calls saved), {stats['filled_fields']} missing fields filled")
+
+# Shared by every response parser in the process
+json_repairs = JsonRepairer()
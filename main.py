@@ -1,23 +1,43 @@
 import os
-import PyPDF2
 import json
+import time
+import asyncio
 import logging
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Union, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
-from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Iterator, List, Optional, Union, Any
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import unicodedata
 import re
 import argparse
 from dotenv import load_dotenv
-import requests
+from extraction_cache import ExtractionCache, hash_file
+from pipeline import run_pipeline, run_pipeline_async
+from pdf_backends import BACKENDS, get_backend, open_mapped, select_backend
+from section_selector import select_sections, SectionSelectionStats
+from corpus_manifest import CorpusManifest, discover_pdfs
+from provider_clients import PROVIDER_MODULES, client_registry
+from provider_registry import get_provider_registry
+from response_cache import ResponseCache, get_response_cache, set_response_cache
+from rate_limiter import rate_limiters
+from token_budget import CHARS_PER_TOKEN, context_overflow, estimate_request_tokens, estimate_tokens, trim_to_tokens
+from provider_health import provider_health
+from provider_routing import provider_router
+from hedging import request_hedging
+from retry_policy import DeadlineExceeded, RetryPolicy
+from json_repair import json_repairs, parse_json_tolerant
+from output_budget import output_budgets
+from batch_api import BATCH_CLIENTS, DEFAULT_BATCH_TIMEOUT, DEFAULT_POLL_INTERVAL, run_batch
+from startup_profile import format_startup_profile, measure_import_costs
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Keep the rate limiters in step with the quota providers report in their response headers
+client_registry.add_response_hook(rate_limiters.update_from_headers)
+
 # Custom exceptions for provider fallback
 class RateLimitException(Exception):
     """Exception raised when a provider rate limit is encountered."""
@@ -35,6 +55,47 @@ class ProviderError(Exception):
     """Generic exception for provider errors."""
     pass
 
+class StreamInterruptedException(ProviderError):
+    """Exception raised when a streamed response breaks off after part of it arrived."""
+    def __init__(self, message: str, partial: str):
+        super().__init__(message)
+        self.partial = partial
+
+class OutputTruncatedException(ProviderError):
+    """Exception raised when a response stops because it reached max_tokens."""
+    def __init__(self, message: str, partial: str):
+        super().__init__(message)
+        self.partial = partial
+
+class AllProvidersFailedException(ProviderError):
+    """Exception raised when every provider failed for one request."""
+    def __init__(self, message: str, errors: Dict[str, Any]):
+        super().__init__(message)
+        self.errors = errors
+        # Worth retrying unless every provider failed on its API key or was never called
+        self.retryable = any(
+            isinstance(error, Exception) and not isinstance(error, ApiKeyMissingException)
+            for error in errors.values()
+        )
+
+# Retry and deadline policy for every logical request (one paper analysis, one synthesis)
+request_retries = RetryPolicy(
+    retryable=(RateLimitException, ProviderUnavailableException, ProviderError, ValidationError),
+    fatal=(ApiKeyMissingException,)
+)
+
+# Bump whenever extract_text_from_pdf or clean_text change their output, so stale
+# entries in the extraction cache are no longer matched (the backend name and
+# version are added to cache keys separately)
+EXTRACTION_VERSION = "clean_text-2"
+
+# Extra fraction of text extracted beyond a requested budget, so truncation
+# downstream never runs short because of cleaning or page boundaries
+EXTRACTION_SAFETY_MARGIN = 0.2
+
+# Summary fields that must come from the model; others may be filled with defaults when repairing a response
+REQUIRED_SUMMARY_FIELDS = ("title", "authors", "year")
+
 class PaperSummary(BaseModel):
     title: str
     authors: List[str]
@@ -68,25 +129,101 @@ class PaperSummary(BaseModel):
         }
     }
 
-def clean_text(text: str) -> str:
+def clean_text(text: str, preserve_lines: bool = False) -> str:
     """Clean and normalize text to handle special characters."""
     # Normalize Unicode characters
     text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+    if preserve_lines:
+        # Clean each line on its own so headings stay on lines of their own
+        lines = (clean_text(line) for line in text.split('\n'))
+        return '\n'.join(line for line in lines if line)
     # Remove non-printable characters
     text = ''.join(char for char in text if ord(char) >= 32)
     # Replace multiple spaces with a single space
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text content from a PDF file."""
+def iter_pdf_pages(pdf_path: str, preserve_lines: bool = False, backend: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the cleaned text of a PDF one page at a time.
+
+    The PDF is memory-mapped and pages are only decoded when requested, so a
+    consumer that stops early never pays for the rest of the document.
+
+    Args:
+        pdf_path: Path to the PDF file
+        preserve_lines: Keep line breaks instead of joining each page into one line
+        backend: Name of the extraction backend (default: DEFAULT_BACKEND, PyPDF2)
+
+    Yields:
+        The cleaned text of each non-empty page
+    """
+    extractor = get_backend(backend)
+    with open_mapped(pdf_path) as stream:
+        for raw_text in extractor.iter_page_texts(stream):
+            page_text = clean_text(raw_text, preserve_lines)
+            if page_text:
+                yield page_text
+
+def extract_text_from_pdf(
+    pdf_path: str,
+    cache: Optional[ExtractionCache] = None,
+    char_budget: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    safety_margin: float = EXTRACTION_SAFETY_MARGIN,
+    preserve_lines: bool = False,
+    backend: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> str:
+    """
+    Extract text content from a PDF file.
+
+    When a character or token budget is given, pages are streamed and
+    extraction stops once the budget plus the safety margin is covered.
+
+    Args:
+        pdf_path: Path to the PDF file
+        cache: Optional extraction cache consulted before parsing the PDF
+        char_budget: Number of characters the caller needs (default: whole document)
+        token_budget: Number of tokens the caller needs (default: whole document)
+        safety_margin: Fraction of extra text extracted beyond the budget
+        preserve_lines: Keep line breaks, as needed for section detection
+        backend: Name of the extraction backend (default: DEFAULT_BACKEND, PyPDF2)
+        content_hash: The PDF's SHA-256, if already known (used for the cache key)
+
+    Returns:
+        The cleaned text of the PDF
+    """
+    budgets = [b for b in (char_budget, token_budget * CHARS_PER_TOKEN if token_budget else None) if b]
+    char_limit = int(min(budgets) * (1 + safety_margin)) if budgets else None
+
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return clean_text(text)
+        cache_key = None
+        if cache is not None:
+            extractor = get_backend(backend)
+            version = f"{extractor.name}-{extractor.version()}/{EXTRACTION_VERSION}"
+            if char_limit is not None:
+                version += f"/limit={char_limit}"
+            if preserve_lines:
+                version += "/lines"
+            cache_key = cache.make_key(content_hash or hash_file(pdf_path), version)
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                logger.info(f"Using cached text for {os.path.basename(pdf_path)}")
+                return cached_text
+
+        pages = []
+        length = 0
+        for page_text in iter_pdf_pages(pdf_path, preserve_lines, backend):
+            pages.append(page_text)
+            length += len(page_text) + 1
+            if char_limit is not None and length >= char_limit:
+                break
+        text = ("\n" if preserve_lines else " ").join(pages)
+
+        if cache_key is not None:
+            cache.put(cache_key, text)
+        return text
     except Exception as e:
         logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
         raise
@@ -114,6 +251,39 @@ def check_api_key_present(api_key_env: str) -> bool:
     api_key = os.environ.get(api_key_env)
     return api_key is not None and api_key.strip() != ""
 
+def _checked_text(provider_label: str, text: Optional[str], truncated: bool) -> str:
+    """Return a response's text, raising OutputTruncatedException if the response stopped at max_tokens."""
+    if truncated:
+        raise OutputTruncatedException(f"{provider_label} response reached the max_tokens limit", text or "")
+    return text
+
+def _chat_completion_text(provider_label: str, payload: Dict[str, Any]) -> str:
+    """Return the text of an OpenAI-compatible chat completion payload."""
+    choice = payload["choices"][0]
+    return _checked_text(provider_label, choice["message"]["content"], choice.get("finish_reason") == "length")
+
+def _gemini_stopped_at_limit(response: Any) -> bool:
+    """Return whether a Gemini response or stream chunk finished because it reached max_output_tokens."""
+    candidates = getattr(response, "candidates", None) or []
+    reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    return getattr(reason, "name", reason) == "MAX_TOKENS"
+
+# Model used for a provider missing from providers_config.json
+FALLBACK_MODELS = {
+    "openai": "gpt-4o",
+    "anthropic": "claude-3-5-sonnet-20241022",
+    "gemini": "models/gemini-2.0-flash-thinking-exp-01-21",
+    "mistral": "mistral-large-latest",
+    "groq": "llama3-8b-8192",
+    "openrouter": "deepseek/deepseek-r1-zero:free",
+    "deepseek": "deepseek-r1-distill-llama-8b"
+}
+
+def configured_model(provider: str) -> str:
+    """Return the model configured for a provider in providers_config.json, so calls match its token budgeting."""
+    spec = get_provider_registry().provider(provider)
+    return spec.default_model if spec else FALLBACK_MODELS[provider]
+
 def call_openai(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
     """Call the OpenAI API directly."""
     api_key = os.environ.get("OPENAI_API_KEY")
@@ -122,7 +292,7 @@ def call_openai(prompt: str, system_message: str, max_tokens: int, temperature:
     
     try:
         import openai
-        client = openai.OpenAI(api_key=api_key)
+        client = client_registry.openai(api_key)
         
         messages = [
             {"role": "system", "content": system_message},
@@ -130,7 +300,7 @@ def call_openai(prompt: str, system_message: str, max_tokens: int, temperature:
         ]
         
         kwargs = {
-            "model": "gpt-4o",
+            "model": configured_model("openai"),
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature
@@ -140,7 +310,10 @@ def call_openai(prompt: str, system_message: str, max_tokens: int, temperature:
             kwargs["response_format"] = {"type": "json_object"}
             
         response = client.chat.completions.create(**kwargs)
-        return response.choices[0].message.content
+        choice = response.choices[0]
+        return _checked_text("OpenAI", choice.message.content, choice.finish_reason == "length")
+    except OutputTruncatedException:
+        raise
     except openai.RateLimitError:
         raise RateLimitException("OpenAI rate limit exceeded")
     except openai.AuthenticationError:
@@ -157,11 +330,10 @@ def call_anthropic(prompt: str, system_message: str, max_tokens: int, temperatur
         raise ApiKeyMissingException("Anthropic API key is missing")
     
     try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=api_key)
+        client = client_registry.anthropic(api_key)
         
         kwargs = {
-            "model": "claude-3-sonnet-20240229",
+            "model": configured_model("anthropic"),
             "max_tokens": max_tokens,
             "temperature": temperature,
             "system": system_message,
@@ -171,7 +343,9 @@ def call_anthropic(prompt: str, system_message: str, max_tokens: int, temperatur
         }
         
         response = client.messages.create(**kwargs)
-        return response.content[0].text
+        return _checked_text("Anthropic", response.content[0].text, response.stop_reason == "max_tokens")
+    except OutputTruncatedException:
+        raise
     except Exception as e:
         error_message = str(e).lower()
         if "rate" in error_message and "limit" in error_message:
@@ -183,6 +357,7 @@ def call_anthropic(prompt: str, system_message: str, max_tokens: int, temperatur
         else:
             raise ProviderError(f"Anthropic error: {str(e)}")
 
+
 def call_gemini(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
     """Call the Google Gemini API directly."""
     api_key = os.environ.get("GEMINI_API_KEY")
@@ -190,43 +365,7 @@ def call_gemini(prompt: str, system_message: str, max_tokens: int, temperature:
         raise ApiKeyMissingException("Gemini API key is missing")
     
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
-        
-        # Get available models to verify the model exists
-        models = genai.list_models()
-        available_models = [model.name for model in models]
-        logger.info(f"Available Gemini models: {available_models}")
-        
-        # Get the model from the config file
-        providers = load_providers_config()
-        for provider in providers:
-            if provider["name"] == "gemini":
-                model_name = provider["default_model"]
-                break
-        else:
-            model_name = "models/gemini-2.0-flash-thinking-exp-01-21"
-        
-        logger.info(f"Using Gemini model: {model_name}")
-        
-        # Verify the model exists in available models
-        if model_name not in available_models:
-            logger.warning(f"Model {model_name} not found in available models. Using fallback.")
-            # Try with different formatting
-            alt_model_name = model_name.replace("models/", "")
-            if f"models/{alt_model_name}" in available_models:
-                model_name = f"models/{alt_model_name}"
-            elif alt_model_name in available_models:
-                model_name = alt_model_name
-            else:
-                # Last resort: use any available gemini model
-                for name in available_models:
-                    if "gemini" in name:
-                        model_name = name
-                        logger.warning(f"Using fallback Gemini model: {model_name}")
-                        break
-                else:
-                    raise ProviderError("No Gemini models available")
+        model = client_registry.gemini_model(api_key, configured_model("gemini"))
         
         # Combine system message and prompt for Gemini
         full_prompt = f"{system_message}\n\n{prompt}"
@@ -238,10 +377,11 @@ def call_gemini(prompt: str, system_message: str, max_tokens: int, temperature:
             "top_k": 40
         }
         
-        model = genai.GenerativeModel(model_name)
         response = model.generate_content(full_prompt, generation_config=generation_config)
         
-        return response.text
+        return _checked_text("Gemini", response.text, _gemini_stopped_at_limit(response))
+    except OutputTruncatedException:
+        raise
     except Exception as e:
         error_message = str(e).lower()
         if "rate" in error_message and "limit" in error_message:
@@ -261,10 +401,9 @@ def call_mistral(prompt: str, system_message: str, max_tokens: int, temperature:
     
     try:
         # Use the new Mistral client API
-        from mistral.client import MistralClient
         from mistral.models.chat_completion import ChatMessage
         
-        client = MistralClient(api_key=api_key)
+        client = client_registry.mistral(api_key)
         
         messages = [
             ChatMessage(role="system", content=system_message),
@@ -272,13 +411,16 @@ def call_mistral(prompt: str, system_message: str, max_tokens: int, temperature:
         ]
         
         response = client.chat(
-            model="mistral-large-latest",
+            model=configured_model("mistral"),
             messages=messages,
             max_tokens=max_tokens,
             temperature=temperature
         )
         
-        return response.choices[0].message.content
+        choice = response.choices[0]
+        return _checked_text("Mistral", choice.message.content, choice.finish_reason == "length")
+    except OutputTruncatedException:
+        raise
     except Exception as e:
         error_message = str(e).lower()
         if "rate" in error_message and "limit" in error_message:
@@ -297,8 +439,7 @@ def call_groq(prompt: str, system_message: str, max_tokens: int, temperature: fl
         raise ApiKeyMissingException("Groq API key is missing")
     
     try:
-        import groq
-        client = groq.Groq(api_key=api_key)
+        client = client_registry.groq(api_key)
         
         messages = [
             {"role": "system", "content": system_message},
@@ -306,7 +447,7 @@ def call_groq(prompt: str, system_message: str, max_tokens: int, temperature: fl
         ]
         
         kwargs = {
-            "model": "llama3-8b-8192",
+            "model": configured_model("groq"),
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature
@@ -316,7 +457,10 @@ def call_groq(prompt: str, system_message: str, max_tokens: int, temperature: fl
             kwargs["response_format"] = {"type": "json_object"}
             
         response = client.chat.completions.create(**kwargs)
-        return response.choices[0].message.content
+        choice = response.choices[0]
+        return _checked_text("Groq", choice.message.content, choice.finish_reason == "length")
+    except OutputTruncatedException:
+        raise
     except Exception as e:
         error_message = str(e).lower()
         if "rate" in error_message and "limit" in error_message:
@@ -334,6 +478,7 @@ def call_openrouter(prompt: str, system_message: str, max_tokens: int, temperatu
     if not api_key:
         raise ApiKeyMissingException("OpenRouter API key is missing")
     
+    import requests
     try:
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -348,7 +493,7 @@ def call_openrouter(prompt: str, system_message: str, max_tokens: int, temperatu
         ]
         
         data = {
-            "model": "deepseek/deepseek-r1-distill-llama-8b",
+            "model": configured_model("openrouter"),
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature
@@ -357,14 +502,14 @@ def call_openrouter(prompt: str, system_message: str, max_tokens: int, temperatu
         if json_mode:
             data["response_format"] = {"type": "json_object"}
             
-        response = requests.post(
+        response = client_registry.session("openrouter").post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
             json=data
         )
         
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        return _chat_completion_text("OpenRouter", response.json())
     except requests.exceptions.RequestException as e:
         error_message = str(e).lower()
         if "429" in error_message:
@@ -382,6 +527,7 @@ def call_deepseek(prompt: str, system_message: str, max_tokens: int, temperature
     if not api_key:
         raise ApiKeyMissingException("DeepSeek API key is missing")
     
+    import requests
     try:
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -394,20 +540,20 @@ def call_deepseek(prompt: str, system_message: str, max_tokens: int, temperature
         ]
         
         data = {
-            "model": "deepseek-r1-distill-llama-8b",
+            "model": configured_model("deepseek"),
             "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature
         }
         
-        response = requests.post(
+        response = client_registry.session("deepseek").post(
             "https://api.deepseek.com/v1/chat/completions",
             headers=headers,
             json=data
         )
         
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        return _chat_completion_text("DeepSeek", response.json())
     except requests.exceptions.RequestException as e:
         error_message = str(e).lower()
         if "429" in error_message:
@@ -419,6 +565,461 @@ def call_deepseek(prompt: str, system_message: str, max_tokens: int, temperature
         else:
             raise ProviderError(f"DeepSeek error: {str(e)}")
 
+# Map provider names to their respective call functions
+PROVIDER_CALL_FUNCTIONS = {
+    "openai": call_openai,
+    "anthropic": call_anthropic,
+    "gemini": call_gemini,
+    "mistral": call_mistral,
+    "groq": call_groq,
+    "openrouter": call_openrouter,
+    "deepseek": call_deepseek
+}
+
+def _provider_exception(provider_label: str, error: Exception) -> Exception:
+    """Map an SDK or HTTP error onto the exceptions the fallback logic understands."""
+    if isinstance(error, (RateLimitException, ApiKeyMissingException, ProviderUnavailableException, ProviderError)):
+        return error
+    error_message = str(error).lower()
+    if "429" in error_message or ("rate" in error_message and "limit" in error_message):
+        return RateLimitException(f"{provider_label} rate limit exceeded")
+    elif "401" in error_message or "403" in error_message or "auth" in error_message or "key" in error_message:
+        return ApiKeyMissingException(f"Invalid {provider_label} API key")
+    elif "connec" in error_message or "unavailable" in error_message:
+        return ProviderUnavailableException(f"Cannot connect to {provider_label} API")
+    return ProviderError(f"{provider_label} error: {str(error)}")
+
+async def _post_chat_completion_async(provider: str, url: str, headers: Dict[str, str], data: Dict[str, Any]) -> str:
+    """POST an OpenAI-compatible chat completion request with the shared async HTTP client."""
+    response = await client_registry.async_http(provider).post(url, headers=headers, json=data)
+    response.raise_for_status()
+    return _chat_completion_text(provider, response.json())
+
+async def call_openai_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the OpenAI API with the async client."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("OpenAI API key is missing")
+    
+    try:
+        import openai
+        client = client_registry.async_openai(api_key)
+        
+        kwargs = {
+            "model": configured_model("openai"),
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+            
+        response = await client.chat.completions.create(**kwargs)
+        choice = response.choices[0]
+        return _checked_text("OpenAI", choice.message.content, choice.finish_reason == "length")
+    except OutputTruncatedException:
+        raise
+    except openai.RateLimitError:
+        raise RateLimitException("OpenAI rate limit exceeded")
+    except openai.AuthenticationError:
+        raise ApiKeyMissingException("Invalid OpenAI API key")
+    except openai.APIConnectionError:
+        raise ProviderUnavailableException("Cannot connect to OpenAI API")
+    except Exception as e:
+        raise ProviderError(f"OpenAI error: {str(e)}")
+
+async def call_anthropic_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the Anthropic API with the async client."""
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Anthropic API key is missing")
+    
+    try:
+        client = client_registry.async_anthropic(api_key)
+        response = await client.messages.create(
+            model=configured_model("anthropic"),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_message,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return _checked_text("Anthropic", response.content[0].text, response.stop_reason == "max_tokens")
+    except Exception as e:
+        raise _provider_exception("Anthropic", e)
+
+async def call_gemini_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the Google Gemini API with generate_content_async."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Gemini API key is missing")
+    
+    try:
+        # Model discovery is blocking but cached, so it only runs once per key
+        model = await asyncio.to_thread(client_registry.gemini_model, api_key, configured_model("gemini"))
+        
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+            "top_p": 0.9,
+            "top_k": 40
+        }
+        
+        response = await model.generate_content_async(
+            f"{system_message}\n\n{prompt}",
+            generation_config=generation_config
+        )
+        return _checked_text("Gemini", response.text, _gemini_stopped_at_limit(response))
+    except Exception as e:
+        raise _provider_exception("Gemini", e)
+
+async def call_mistral_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the Mistral chat completions endpoint with the async HTTP client."""
+    api_key = os.environ.get("MISTRAL_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Mistral API key is missing")
+    
+    try:
+        return await _post_chat_completion_async(
+            "mistral",
+            "https://api.mistral.ai/v1/chat/completions",
+            {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            {
+                "model": configured_model("mistral"),
+                "messages": [
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            }
+        )
+    except Exception as e:
+        raise _provider_exception("Mistral", e)
+
+async def call_groq_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the Groq API with the async client."""
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Groq API key is missing")
+    
+    try:
+        client = client_registry.async_groq(api_key)
+        
+        kwargs = {
+            "model": configured_model("groq"),
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+            
+        response = await client.chat.completions.create(**kwargs)
+        choice = response.choices[0]
+        return _checked_text("Groq", choice.message.content, choice.finish_reason == "length")
+    except Exception as e:
+        raise _provider_exception("Groq", e)
+
+async def call_openrouter_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the OpenRouter API with the async HTTP client."""
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("OpenRouter API key is missing")
+    
+    data = {
+        "model": configured_model("openrouter"),
+        "messages": [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+    
+    if json_mode:
+        data["response_format"] = {"type": "json_object"}
+    
+    try:
+        return await _post_chat_completion_async(
+            "openrouter",
+            "https://openrouter.ai/api/v1/chat/completions",
+            {
+                "Authorization": f"Bearer {api_key}",
+                "HTTP-Referer": "https://ai-literature-review-generator.local",
+                "X-Title": "AI Literature Review Generator",
+                "Content-Type": "application/json"
+            },
+            data
+        )
+    except Exception as e:
+        raise _provider_exception("OpenRouter", e)
+
+async def call_deepseek_async(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> str:
+    """Call the DeepSeek API with the async HTTP client."""
+    api_key = os.environ.get("DEEPSEEK_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("DeepSeek API key is missing")
+    
+    try:
+        return await _post_chat_completion_async(
+            "deepseek",
+            "https://api.deepseek.com/v1/chat/completions",
+            {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            {
+                "model": configured_model("deepseek"),
+                "messages": [
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            }
+        )
+    except Exception as e:
+        raise _provider_exception("DeepSeek", e)
+
+# Map provider names to their async call functions
+ASYNC_PROVIDER_CALL_FUNCTIONS = {
+    "openai": call_openai_async,
+    "anthropic": call_anthropic_async,
+    "gemini": call_gemini_async,
+    "mistral": call_mistral_async,
+    "groq": call_groq_async,
+    "openrouter": call_openrouter_async,
+    "deepseek": call_deepseek_async
+}
+
+def _stream_chat_completion(provider: str, url: str, headers: Dict[str, str], data: Dict[str, Any]) -> Iterator[str]:
+    """Stream an OpenAI-compatible chat completion over server-sent events with the shared session."""
+    response = client_registry.session(provider).post(url, headers=headers, json=dict(data, stream=True), stream=True)
+    finish_reason = None
+    with response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                if finish_reason == "length":
+                    raise OutputTruncatedException(f"{provider} response reached the max_tokens limit", "")
+                return
+            choices = json.loads(payload).get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                yield delta
+            if choices and choices[0].get("finish_reason"):
+                finish_reason = choices[0]["finish_reason"]
+    # The connection closed without the end-of-stream marker
+    raise ProviderUnavailableException(f"{provider} stream ended before the response was complete")
+
+def stream_openai(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the OpenAI API."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("OpenAI API key is missing")
+    
+    try:
+        stream = client_registry.openai(api_key).chat.completions.create(
+            model=configured_model("openai"),
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        finish_reason = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+        if finish_reason is None:
+            raise ProviderUnavailableException("OpenAI stream ended before the response was complete")
+        if finish_reason == "length":
+            raise OutputTruncatedException("OpenAI response reached the max_tokens limit", "")
+    except Exception as e:
+        raise _provider_exception("OpenAI", e)
+
+def stream_anthropic(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the Anthropic API."""
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Anthropic API key is missing")
+    
+    try:
+        with client_registry.anthropic(api_key).messages.stream(
+            model=configured_model("anthropic"),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_message,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            yield from stream.text_stream
+            if stream.get_final_message().stop_reason == "max_tokens":
+                raise OutputTruncatedException("Anthropic response reached the max_tokens limit", "")
+    except Exception as e:
+        raise _provider_exception("Anthropic", e)
+
+def stream_gemini(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the Google Gemini API."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Gemini API key is missing")
+    
+    try:
+        model = client_registry.gemini_model(api_key, configured_model("gemini"))
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+            "top_p": 0.9,
+            "top_k": 40
+        }
+        truncated = False
+        for chunk in model.generate_content(f"{system_message}\n\n{prompt}", generation_config=generation_config, stream=True):
+            # The last chunk may carry only the finish reason
+            if chunk.parts:
+                yield chunk.text
+            truncated = _gemini_stopped_at_limit(chunk)
+        if truncated:
+            raise OutputTruncatedException("Gemini response reached the max_tokens limit", "")
+    except Exception as e:
+        raise _provider_exception("Gemini", e)
+
+def stream_mistral(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the Mistral API."""
+    api_key = os.environ.get("MISTRAL_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Mistral API key is missing")
+    
+    try:
+        from mistral.models.chat_completion import ChatMessage
+        
+        stream = client_registry.mistral(api_key).chat_stream(
+            model=configured_model("mistral"),
+            messages=[
+                ChatMessage(role="system", content=system_message),
+                ChatMessage(role="user", content=prompt)
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        finish_reason = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+        if finish_reason is None:
+            raise ProviderUnavailableException("Mistral stream ended before the response was complete")
+        if finish_reason == "length":
+            raise OutputTruncatedException("Mistral response reached the max_tokens limit", "")
+    except Exception as e:
+        raise _provider_exception("Mistral", e)
+
+def stream_groq(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the Groq API."""
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("Groq API key is missing")
+    
+    try:
+        stream = client_registry.groq(api_key).chat.completions.create(
+            model=configured_model("groq"),
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        finish_reason = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+        if finish_reason is None:
+            raise ProviderUnavailableException("Groq stream ended before the response was complete")
+        if finish_reason == "length":
+            raise OutputTruncatedException("Groq response reached the max_tokens limit", "")
+    except Exception as e:
+        raise _provider_exception("Groq", e)
+
+def stream_openrouter(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the OpenRouter API."""
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("OpenRouter API key is missing")
+    
+    try:
+        yield from _stream_chat_completion(
+            "openrouter",
+            "https://openrouter.ai/api/v1/chat/completions",
+            {
+                "Authorization": f"Bearer {api_key}",
+                "HTTP-Referer": "https://ai-literature-review-generator.local",
+                "X-Title": "AI Literature Review Generator",
+                "Content-Type": "application/json"
+            },
+            {
+                "model": configured_model("openrouter"),
+                "messages": [
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            }
+        )
+    except Exception as e:
+        raise _provider_exception("OpenRouter", e)
+
+def stream_deepseek(prompt: str, system_message: str, max_tokens: int, temperature: float, json_mode: bool) -> Iterator[str]:
+    """Stream a response from the DeepSeek API."""
+    api_key = os.environ.get("DEEPSEEK_API_KEY")
+    if not api_key:
+        raise ApiKeyMissingException("DeepSeek API key is missing")
+    
+    try:
+        yield from _stream_chat_completion(
+            "deepseek",
+            "https://api.deepseek.com/v1/chat/completions",
+            {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            {
+                "model": configured_model("deepseek"),
+                "messages": [
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            }
+        )
+    except Exception as e:
+        raise _provider_exception("DeepSeek", e)
+
+# Map provider names to their streaming call functions
+PROVIDER_STREAM_FUNCTIONS = {
+    "openai": stream_openai,
+    "anthropic": stream_anthropic,
+    "gemini": stream_gemini,
+    "mistral": stream_mistral,
+    "groq": stream_groq,
+    "openrouter": stream_openrouter,
+    "deepseek": stream_deepseek
+}
+
 def clean_json_response(content: str) -> str:
     """
     Clean a JSON response that might be wrapped in markdown code blocks.
@@ -439,152 +1040,740 @@ def clean_json_response(content: str) -> str:
     
     return content
 
-@retry(
-    retry=retry_if_exception_type((RateLimitException, ApiKeyMissingException)),
-    stop=stop_after_attempt(3),
-    wait=wait_random_exponential(min=1, max=60)
-)
-def call_provider_with_fallback(
-    prompt: str,
-    system_message: str = "You are a helpful assistant.",
-    max_tokens: int = 3000,
-    temperature: float = 0.7,
-    custom_provider_order: List[str] = None,
-    provider_config_path: str = "providers_config.json",
-    json_mode: bool = False
-) -> Dict[str, Any]:
-    """
-    Call AI providers with fallback if one fails.
-    
-    Args:
-        prompt: The user prompt to send to the model
-        system_message: System message for chat models
-        max_tokens: Maximum number of tokens to generate
-        temperature: Temperature for generation (0.0 to 1.0)
-        custom_provider_order: Optional custom order of provider names to try
-        provider_config_path: Path to the providers configuration JSON file
-        json_mode: Whether to request response in JSON format
-        
-    Returns:
-        Dict containing the response from the successful provider
-    """
-    providers = load_providers_config(provider_config_path)
+def _resolve_providers(
+    custom_provider_order: Optional[List[str]],
+    provider_config_path: str
+) -> Any:
+    """Resolve the providers to try and the errors recorded for those without API keys."""
+    # The registry only re-reads the config file when it changes
+    resolved = get_provider_registry(provider_config_path, PROVIDER_CALL_FUNCTIONS).resolve(custom_provider_order)
     
-    if not providers:
+    if not resolved.providers:
         raise ValueError("No providers configured. Please check your configuration file.")
     
-    # If custom order provided, reorder providers accordingly
-    if custom_provider_order:
-        # Create a mapping of provider names to their configurations
-        provider_map = {p["name"]: p for p in providers}
-        
-        # Create a new ordered list based on custom order
-        ordered_providers = []
-        for provider_name in custom_provider_order:
-            if provider_name in provider_map:
-                ordered_providers.append(provider_map[provider_name])
-        
-        # Add any remaining providers not in the custom order at the end
-        for provider in providers:
-            if provider["name"] not in custom_provider_order:
-                ordered_providers.append(provider)
-                
-        providers = ordered_providers
-    
     # Track errors for detailed reporting
-    errors = {}
-    available_providers = []
-    unavailable_providers = []
+    errors = {spec.name: f"API key not configured ({spec.api_key_env})" for spec in resolved.missing}
     
-    # First, check which providers have API keys available
-    for provider in providers:
-        provider_name = provider["name"]
-        api_key_env = provider["api_key_env"]
+    if resolved.missing:
+        logger.info(f"Skipping providers with missing API keys: {', '.join(spec.name for spec in resolved.missing)}")
         
-        if check_api_key_present(api_key_env):
-            available_providers.append(provider)
-        else:
-            unavailable_providers.append(provider_name)
-            errors[provider_name] = f"API key not configured ({api_key_env})"
-    
-    if unavailable_providers:
-        logger.info(f"Skipping providers with missing API keys: {', '.join(unavailable_providers)}")
-        
-    if not available_providers:
-        missing_keys = [f"{p['name']} ({p['api_key_env']})" for p in providers]
+    if not resolved.available:
+        missing_keys = [f"{spec.name} ({spec.api_key_env})" for spec in resolved.providers]
         raise ApiKeyMissingException(
             f"No API keys found for any provider. Please set at least one of: {', '.join(missing_keys)}"
         )
-    
-    logger.info(f"Attempting to use providers in order: {[p['name'] for p in available_providers]}")
-    
-    # Map provider names to their respective call functions
-    provider_call_functions = {
-        "openai": call_openai,
-        "anthropic": call_anthropic,
-        "gemini": call_gemini,
-        "mistral": call_mistral,
-        "groq": call_groq,
-        "openrouter": call_openrouter,
-        "deepseek": call_deepseek
+    return resolved, errors
+
+def _response_cache_keys(
+    cache: ResponseCache,
+    resolved: Any,
+    prompt: str,
+    system_message: str,
+    max_tokens: int,
+    temperature: float,
+    json_mode: bool
+) -> Dict[str, str]:
+    """Build the response cache key of every available provider."""
+    return {
+        spec.name: cache.make_key(spec.name, spec.default_model, system_message, prompt,
+                                  max_tokens, temperature, json_mode)
+        for spec, _ in resolved.available
     }
+
+def _healthy_providers(available: Any) -> Iterator[Any]:
+    """
+    Yield the available providers whose circuit allows a call.
     
-    # Now try each provider that has an API key
-    for provider in available_providers:
-        provider_name = provider["name"]
-        model = provider["default_model"]
-        
-        # Skip if we don't have a call function for this provider
-        if provider_name not in provider_call_functions:
-            logger.warning(f"No call function implemented for provider: {provider_name}")
+    Providers are checked lazily, so a half-open provider is only probed when
+    the ones before it have failed. If every circuit is open, all providers
+    are tried anyway rather than failing the request outright.
+    """
+    skipped = []
+    for spec, call_function in available:
+        if provider_health.allow(spec.name):
+            yield spec, call_function
+        else:
+            logger.info(f"Skipping provider {spec.name}: circuit open")
+            skipped.append((spec, call_function))
+    if skipped and len(skipped) == len(available):
+        logger.warning("All provider circuits are open; trying them anyway")
+        yield from skipped
+
+def _provider_max_tokens(spec: Any, request: Dict[str, Any]) -> int:
+    """
+    Return the output ceiling of a request for one provider.
+    
+    This is the request's max_tokens, within the model's output limit and
+    within what its context window leaves after the prompt (but never below
+    MIN_CONTINUATION_TOKENS); a longer answer is continued.
+    """
+    max_tokens = request["max_tokens"]
+    limit = spec.options.get("max_output_tokens")
+    if limit:
+        max_tokens = min(max_tokens, int(limit))
+    context_window = spec.options.get("context_window")
+    if context_window:
+        left = int(context_window) - estimate_request_tokens(request["system_message"], request["prompt"], 0,
+                                                             spec.default_model)
+        max_tokens = min(max_tokens, max(MIN_CONTINUATION_TOKENS, left))
+    return max_tokens
+
+def _sized_request(spec: Any, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the call arguments of a request for one provider.
+    
+    A request may carry a "stage" entry; its max_tokens is then the ceiling
+    and the provider is asked for the cap output_budgets derives from the
+    output lengths observed for that stage and provider.
+    """
+    arguments = {key: value for key, value in request.items() if key != "stage"}
+    arguments["max_tokens"] = output_budgets.cap(request.get("stage"), spec.name, _provider_max_tokens(spec, request))
+    return arguments
+
+def _continuation_request(spec: Any, request: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """Return the call arguments that ask a provider to continue a response that stopped at max_tokens."""
+    remaining = max(MIN_CONTINUATION_TOKENS, request["max_tokens"] - estimate_tokens(content, spec.default_model))
+    arguments = {key: value for key, value in request.items() if key != "stage"}
+    prompt = build_continuation_prompt(request["prompt"], content)
+    arguments.update(
+        prompt=prompt,
+        max_tokens=_provider_max_tokens(spec, dict(request, prompt=prompt, max_tokens=remaining)),
+        # The continuation is a fragment, which JSON mode would reject
+        json_mode=False
+    )
+    return arguments
+
+def _record_output(spec: Any, request: Dict[str, Any], content: str, cap: int, truncated: bool) -> None:
+    """Record the length of a finished response for the adaptive max_tokens of its stage."""
+    output_budgets.record(request.get("stage"), spec.name, estimate_tokens(content, spec.default_model),
+                          cap, _provider_max_tokens(spec, request), truncated)
+
+def _fitting_providers(candidates: List[Any], request: Dict[str, Any], errors: Dict[str, Any]) -> List[Any]:
+    """
+    Drop the providers that cannot serve the request, recording why.
+    
+    A provider is dropped if its configured context window cannot hold the
+    request, or if its max_output_tokens, over the first call and every
+    continuation, adds up to less than the request's max_tokens.
+    """
+    fitting = []
+    for spec, call_function in candidates:
+        limit = spec.options.get("max_output_tokens")
+        if limit and int(limit) * (1 + MAX_OUTPUT_CONTINUATIONS) < request["max_tokens"]:
+            errors[spec.name] = (f"Response may need {request['max_tokens']} tokens, more than {spec.default_model} "
+                                 f"returns in {1 + MAX_OUTPUT_CONTINUATIONS} calls of {limit} tokens")
+            logger.info(f"Skipping provider {spec.name}: {errors[spec.name]}")
             continue
-            
-        try:
-            logger.info(f"Trying provider: {provider_name} with model: {model}")
+        needed = context_overflow(spec, request["system_message"], request["prompt"], _sized_request(spec, request)["max_tokens"])
+        if needed is None:
+            fitting.append((spec, call_function))
+            continue
+        errors[spec.name] = (f"Request needs about {needed} tokens, more than the "
+                             f"{spec.options['context_window']}-token context window of {spec.default_model}")
+        logger.info(f"Skipping provider {spec.name}: {errors[spec.name]}")
+    return fitting
+
+# Continuations requested for one streamed response whose stream keeps breaking
+MAX_STREAM_CONTINUATIONS = 3
+
+# Continuations requested for one response that keeps stopping at max_tokens
+MAX_OUTPUT_CONTINUATIONS = 3
+
+# Smallest completion budget asked for when continuing a broken stream or a truncated response
+MIN_CONTINUATION_TOKENS = 256
+
+def build_continuation_prompt(prompt: str, partial: str) -> str:
+    """Build a prompt asking the model to continue a response that was cut off."""
+    return f"""{prompt}
+
+    Your previous response was cut off. This is what you had written so far:
+
+    {partial}
+
+    Continue exactly where it stops. Do not repeat any of it and do not add a preamble."""
+
+def _attempt_provider(spec: Any, call_function: Any, request: Dict[str, Any]) -> str:
+    """
+    Send one request to one provider, pacing it to its quota and recording the outcome.
+    
+    A response that stops at max_tokens is continued by the same provider,
+    up to MAX_OUTPUT_CONTINUATIONS times, rather than failing the request.
+    
+    Raises:
+        OutputTruncatedException: If the response still stops at max_tokens after the last continuation
+    """
+    logger.info(f"Trying provider: {spec.name} with model: {spec.default_model}")
+    
+    limiter = rate_limiters.limiter(spec)
+    arguments = _sized_request(spec, request)
+    cap = arguments["max_tokens"]
+    content = ""
+    continuations = 0
+    started = time.monotonic()
+    try:
+        while True:
+            # Pace each call to the provider's configured quota
+            if limiter is not None:
+                limiter.acquire(estimate_request_tokens(arguments["system_message"], arguments["prompt"], arguments["max_tokens"], spec.default_model))
             
             # Call the provider-specific function
-            content = provider_call_functions[provider_name](
-                prompt=prompt,
-                system_message=system_message,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                json_mode=json_mode
-            )
-            
-            logger.info(f"Successfully received response from {provider_name}")
-            return {
-                "content": content,
-                "provider": provider_name,
-                "model": model
-            }
-            
-        except (RateLimitException, ApiKeyMissingException, ProviderUnavailableException) as e:
-            error_msg = str(e)
-            errors[provider_name] = error_msg
-            logger.warning(f"Error with provider {provider_name}: {error_msg}")
-            # Continue to next provider
-            continue
+            try:
+                content += call_function(**arguments)
+                break
+            except OutputTruncatedException as e:
+                content += e.partial
+                if continuations >= MAX_OUTPUT_CONTINUATIONS:
+                    # Accepting the text would silently truncate it; let the next provider answer instead
+                    raise OutputTruncatedException(f"{spec.name} response still reached max_tokens after "
+                                                   f"{continuations} continuations", content)
+                continuations += 1
+                logger.info(f"Response from {spec.name} reached max_tokens ({arguments['max_tokens']}); requesting a continuation")
+                arguments = _continuation_request(spec, request, content)
+    except Exception as e:
+        # A response that is too long for the provider's output limit is no sign of an outage
+        if not isinstance(e, OutputTruncatedException):
+            provider_health.record_failure(spec.name, str(e))
+        provider_router.record(spec, False, time.monotonic() - started)
+        raise
+    
+    logger.info(f"Successfully received response from {spec.name}")
+    provider_health.record_success(spec.name)
+    provider_router.record(spec, True, time.monotonic() - started, estimate_tokens(content))
+    _record_output(spec, request, content, cap, continuations > 0)
+    return content
+
+async def _attempt_provider_async(spec: Any, call_function: Any, request: Dict[str, Any]) -> str:
+    """Async version of _attempt_provider."""
+    logger.info(f"Trying provider: {spec.name} with model: {spec.default_model}")
+    
+    limiter = rate_limiters.limiter(spec)
+    arguments = _sized_request(spec, request)
+    cap = arguments["max_tokens"]
+    content = ""
+    continuations = 0
+    started = time.monotonic()
+    try:
+        while True:
+            if limiter is not None:
+                await limiter.acquire_async(
+                    estimate_request_tokens(arguments["system_message"], arguments["prompt"], arguments["max_tokens"], spec.default_model)
+                )
+            try:
+                content += await call_function(**arguments)
+                break
+            except OutputTruncatedException as e:
+                content += e.partial
+                if continuations >= MAX_OUTPUT_CONTINUATIONS:
+                    # Accepting the text would silently truncate it; let the next provider answer instead
+                    raise OutputTruncatedException(f"{spec.name} response still reached max_tokens after "
+                                                   f"{continuations} continuations", content)
+                continuations += 1
+                logger.info(f"Response from {spec.name} reached max_tokens ({arguments['max_tokens']}); requesting a continuation")
+                arguments = _continuation_request(spec, request, content)
+    except Exception as e:
+        # A response that is too long for the provider's output limit is no sign of an outage
+        if not isinstance(e, OutputTruncatedException):
+            provider_health.record_failure(spec.name, str(e))
+        provider_router.record(spec, False, time.monotonic() - started)
+        raise
+    
+    logger.info(f"Successfully received response from {spec.name}")
+    provider_health.record_success(spec.name)
+    provider_router.record(spec, True, time.monotonic() - started, estimate_tokens(content))
+    _record_output(spec, request, content, cap, continuations > 0)
+    return content
+
+def _record_provider_error(errors: Dict[str, Any], provider_name: str, error: Exception) -> None:
+    errors[provider_name] = error
+    if isinstance(error, (RateLimitException, ApiKeyMissingException, ProviderUnavailableException)):
+        logger.warning(f"Error with provider {provider_name}: {str(error)}")
+    else:
+        logger.warning(f"Unexpected error with provider {provider_name}: {str(error)}")
+
+def _next_attempt(attempts: Iterator[Any], deadline: Optional[float] = None) -> Any:
+    """Return the next (spec, call function) pair that has a call function, or None."""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("Request deadline exceeded before the next provider could be tried")
+    for spec, call_function in attempts:
+        if call_function is not None:
+            return spec, call_function
+        logger.warning(f"No call function implemented for provider: {spec.name}")
+    return None
+
+def _try_providers(
+    attempts: Iterator[Any],
+    request: Dict[str, Any],
+    errors: Dict[str, Any],
+    deadline: Optional[float] = None
+) -> Any:
+    """Try providers one after another; return (spec, content) from the first that answers, or None."""
+    while True:
+        attempt = _next_attempt(attempts, deadline)
+        if attempt is None:
+            return None
+        spec, call_function = attempt
+        try:
+            return spec, _attempt_provider(spec, call_function, request)
         except Exception as e:
-            error_msg = str(e)
-            errors[provider_name] = error_msg
-            logger.warning(f"Unexpected error with provider {provider_name}: {error_msg}")
             # Continue to next provider for any error
+            _record_provider_error(errors, spec.name, e)
+
+def _race_providers(
+    attempts: Iterator[Any],
+    request: Dict[str, Any],
+    errors: Dict[str, Any],
+    deadline: Optional[float] = None,
+    stage: Optional[str] = None
+) -> Any:
+    """
+    Try providers in order, hedging a slow request to the next provider.
+    
+    Falls back like _try_providers, but once the request has waited longer
+    than the hedge delay of its stage since the latest provider was tried,
+    the same request is sent to the next provider (if there is one and the
+    hedging budget allows) and whichever answers first wins. The other
+    request is left to finish in the background and its answer is ignored.
+    
+    Returns:
+        Tuple of (spec, content) from the winning provider, or None if all failed
+    """
+    executor = request_hedging.executor()
+    started = time.monotonic()
+    hedge_delay = request_hedging.hedge_delay(stage)
+    pending = {}
+    upcoming = []
+    hedged = False
+    launched = started
+    
+    def launch() -> bool:
+        nonlocal launched
+        attempt = upcoming.pop() if upcoming else _next_attempt(attempts, deadline)
+        if attempt is None:
+            return False
+        pending[executor.submit(_attempt_provider, attempt[0], attempt[1], request)] = attempt[0]
+        launched = time.monotonic()
+        return True
+    
+    launch()
+    primary = next(iter(pending), None)
+    while pending:
+        timeout = None
+        if not hedged and hedge_delay is not None:
+            # The hedge timer runs from the latest launch, so a fallback is not hedged at once
+            timeout = max(0.0, launched + hedge_delay - time.monotonic())
+        if deadline is not None:
+            timeout = max(0.0, min(timeout if timeout is not None else float("inf"), deadline - time.monotonic()))
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded("Request deadline exceeded while waiting for providers")
+            # Slower than the hedge percentile: send the request to the next provider too
+            hedged = True
+            if not upcoming:
+                upcoming.extend(filter(None, [_next_attempt(attempts, deadline)]))
+            if upcoming and request_hedging.try_spend() and launch():
+                logger.info(f"Hedging request to {list(pending.values())[-1].name} "
+                            f"after {time.monotonic() - started:.1f}s")
             continue
+        for future in done:
+            spec = pending.pop(future)
+            try:
+                content = future.result()
+            except Exception as e:
+                _record_provider_error(errors, spec.name, e)
+                continue
+            hedge_won = primary in pending
+            if hedge_won:
+                # Only an answer counts as the first provider's latency, not a timeout or an error
+                primary.add_done_callback(lambda f: f.cancelled() or f.exception() is not None
+                                          or request_hedging.record_primary(time.monotonic() - started, stage))
+            request_hedging.record(time.monotonic() - started, hedge_won, stage)
+            return spec, content
+        if not pending:
+            launch()
+    return None
+
+async def _try_providers_async(
+    attempts: Iterator[Any],
+    request: Dict[str, Any],
+    errors: Dict[str, Any],
+    deadline: Optional[float] = None
+) -> Any:
+    """Async version of _try_providers."""
+    while True:
+        attempt = _next_attempt(attempts, deadline)
+        if attempt is None:
+            return None
+        spec, call_function = attempt
+        try:
+            return spec, await _attempt_provider_async(spec, call_function, request)
+        except Exception as e:
+            _record_provider_error(errors, spec.name, e)
+
+async def _race_providers_async(
+    attempts: Iterator[Any],
+    request: Dict[str, Any],
+    errors: Dict[str, Any],
+    deadline: Optional[float] = None,
+    stage: Optional[str] = None
+) -> Any:
+    """Async version of _race_providers; the losing request keeps running as a background task."""
+    started = time.monotonic()
+    hedge_delay = request_hedging.hedge_delay(stage)
+    pending = {}
+    upcoming = []
+    hedged = False
+    launched = started
+    
+    def launch() -> bool:
+        nonlocal launched
+        attempt = upcoming.pop() if upcoming else _next_attempt(attempts, deadline)
+        if attempt is None:
+            return False
+        task = asyncio.ensure_future(_attempt_provider_async(attempt[0], attempt[1], request))
+        # Failures of an ignored request are already recorded by _attempt_provider_async
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        pending[task] = attempt[0]
+        launched = time.monotonic()
+        return True
     
-    # If we've tried all providers and none worked
-    error_details = "\n".join([f"{k}: {v}" for k, v in errors.items()])
-    raise ProviderError(f"All providers failed. Details:\n{error_details}")
+    launch()
+    primary = next(iter(pending), None)
+    while pending:
+        timeout = None
+        if not hedged and hedge_delay is not None:
+            timeout = max(0.0, launched + hedge_delay - time.monotonic())
+        if deadline is not None:
+            timeout = max(0.0, min(timeout if timeout is not None else float("inf"), deadline - time.monotonic()))
+        done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded("Request deadline exceeded while waiting for providers")
+            hedged = True
+            if not upcoming:
+                upcoming.extend(filter(None, [_next_attempt(attempts, deadline)]))
+            if upcoming and request_hedging.try_spend() and launch():
+                logger.info(f"Hedging request to {list(pending.values())[-1].name} "
+                            f"after {time.monotonic() - started:.1f}s")
+            continue
+        for task in done:
+            spec = pending.pop(task)
+            try:
+                content = task.result()
+            except Exception as e:
+                _record_provider_error(errors, spec.name, e)
+                continue
+            hedge_won = primary in pending
+            if hedge_won:
+                # Only an answer counts as the first provider's latency, not a timeout or an error
+                primary.add_done_callback(lambda f: f.cancelled() or f.exception() is not None
+                                          or request_hedging.record_primary(time.monotonic() - started, stage))
+            request_hedging.record(time.monotonic() - started, hedge_won, stage)
+            return spec, content
+        if not pending:
+            launch()
+    return None
 
-@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(min=1, max=60))
-def analyze_pdf(text: str, filename: str, text_limit: int = 6000) -> PaperSummary:
-    """Analyze the content of a PDF and generate a structured summary."""
-    prompt = f"""Analyze the following academic paper and provide a detailed summary in JSON format:
+def call_provider_with_fallback(
+    prompt: str,
+    system_message: str = "You are a helpful assistant.",
+    max_tokens: int = 3000,
+    temperature: float = 0.7,
+    custom_provider_order: List[str] = None,
+    provider_config_path: str = "providers_config.json",
+    json_mode: bool = False,
+    use_cache: bool = True,
+    deadline: Optional[float] = None,
+    stage: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Call AI providers with fallback if one fails.
+    
+    If a response cache is configured, a cached response from any of the
+    available providers is returned without calling the API, and fresh
+    responses are stored for later runs. If hedging is enabled, a request
+    slower than the hedge percentile is also sent to the next provider and
+    the first answer wins.
+    
+    Args:
+        prompt: The user prompt to send to the model
+        system_message: System message for chat models
+        max_tokens: Maximum number of tokens to generate
+        temperature: Temperature for generation (0.0 to 1.0)
+        custom_provider_order: Optional custom order of provider names to try
+        provider_config_path: Path to the providers configuration JSON file
+        json_mode: Whether to request response in JSON format
+        use_cache: Whether to consult and update the response cache
+        deadline: Optional time.monotonic() value after which no further provider is tried
+        stage: Optional name of the pipeline stage; max_tokens is then a ceiling and each
+            provider is asked for a cap sized from the outputs it returned for that stage
+        
+    Returns:
+        Dict containing the response from the successful provider
+    """
+    resolved, errors = _resolve_providers(custom_provider_order, provider_config_path)
+    
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cache_keys = _response_cache_keys(cache, resolved, prompt, system_message, max_tokens, temperature, json_mode)
+        cached = cache.get_first(list(cache_keys.values()))
+        if cached is not None:
+            logger.info(f"Using cached response from {cached['provider']}")
+            return cached
+    
+    candidates = provider_router.order(resolved.available, max_tokens)
+    logger.info(f"Attempting to use providers in order: {[spec.name for spec, _ in candidates]}")
+    
+    request = {
+        "prompt": prompt,
+        "system_message": system_message,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "json_mode": json_mode,
+        "stage": stage
+    }
+    
+    # Now try each provider that has an API key and is not known to be down
+    attempts = _healthy_providers(_fitting_providers(candidates, request, errors))
+    if request_hedging.hedges_stage(stage):
+        outcome = _race_providers(attempts, request, errors, deadline, stage)
+    else:
+        outcome = _try_providers(attempts, request, errors, deadline)
+    
+    if outcome is None:
+        # If we've tried all providers and none worked
+        error_details = "\n".join([f"{k}: {v}" for k, v in errors.items()])
+        raise AllProvidersFailedException(f"All providers failed. Details:\n{error_details}", errors)
+    
+    spec, content = outcome
+    if cache is not None:
+        cache.put(cache_keys[spec.name], spec.name, spec.default_model, content)
+    return {
+        "content": content,
+        "provider": spec.name,
+        "model": spec.default_model
+    }
 
-    Filename: {filename}
-    Text: {text[:text_limit]}  # Limit text to {text_limit} characters
+async def call_provider_with_fallback_async(
+    prompt: str,
+    system_message: str = "You are a helpful assistant.",
+    max_tokens: int = 3000,
+    temperature: float = 0.7,
+    custom_provider_order: List[str] = None,
+    provider_config_path: str = "providers_config.json",
+    json_mode: bool = False,
+    use_cache: bool = True,
+    deadline: Optional[float] = None,
+    stage: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Async version of call_provider_with_fallback using ASYNC_PROVIDER_CALL_FUNCTIONS.
+    
+    Takes the same arguments and returns the same dict, but awaits the
+    providers' async clients so many calls can be in flight on one event loop.
+    """
+    resolved, errors = _resolve_providers(custom_provider_order, provider_config_path)
+    
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cache_keys = _response_cache_keys(cache, resolved, prompt, system_message, max_tokens, temperature, json_mode)
+        cached = cache.get_first(list(cache_keys.values()))
+        if cached is not None:
+            logger.info(f"Using cached response from {cached['provider']}")
+            return cached
+    
+    candidates = provider_router.order(resolved.available, max_tokens)
+    logger.info(f"Attempting to use providers in order: {[spec.name for spec, _ in candidates]}")
+    
+    request = {
+        "prompt": prompt,
+        "system_message": system_message,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "json_mode": json_mode,
+        "stage": stage
+    }
+    
+    attempts = (
+        (spec, ASYNC_PROVIDER_CALL_FUNCTIONS.get(spec.name))
+        for spec, _ in _healthy_providers(_fitting_providers(candidates, request, errors))
+    )
+    if request_hedging.hedges_stage(stage):
+        outcome = await _race_providers_async(attempts, request, errors, deadline, stage)
+    else:
+        outcome = await _try_providers_async(attempts, request, errors, deadline)
+    
+    if outcome is None:
+        error_details = "\n".join([f"{k}: {v}" for k, v in errors.items()])
+        raise AllProvidersFailedException(f"All providers failed. Details:\n{error_details}", errors)
+    
+    spec, content = outcome
+    if cache is not None:
+        cache.put(cache_keys[spec.name], spec.name, spec.default_model, content)
+    return {
+        "content": content,
+        "provider": spec.name,
+        "model": spec.default_model
+    }
 
-    Provide the summary in a structured JSON format with the following fields:
-    - title: string
+def _stream_attempt(spec: Any, stream_function: Any, request: Dict[str, Any], on_text: Any) -> str:
+    """
+    Stream one request from one provider, passing each piece of text to on_text.
+    
+    Raises:
+        StreamInterruptedException: If the stream broke after some text arrived
+        OutputTruncatedException: If the response stopped at max_tokens (with all of its text)
+    """
+    logger.info(f"Streaming from provider: {spec.name} with model: {spec.default_model}")
+    
+    limiter = rate_limiters.limiter(spec)
+    if limiter is not None:
+        limiter.acquire(estimate_request_tokens(request["system_message"], request["prompt"], request["max_tokens"], spec.default_model))
+    
+    started = time.monotonic()
+    received = []
+    truncated = False
+    try:
+        for text in stream_function(**request):
+            received.append(text)
+            on_text(text)
+    except OutputTruncatedException:
+        truncated = True
+    except Exception as e:
+        provider_health.record_failure(spec.name, str(e))
+        provider_router.record(spec, False, time.monotonic() - started)
+        if received:
+            raise StreamInterruptedException(f"{spec.name} stream broke off: {str(e)}", "".join(received)) from e
+        raise
+    
+    content = "".join(received)
+    logger.info(f"Finished streaming response from {spec.name}")
+    provider_health.record_success(spec.name)
+    provider_router.record(spec, True, time.monotonic() - started, estimate_tokens(content))
+    if truncated:
+        raise OutputTruncatedException(f"{spec.name} response reached the max_tokens limit", content)
+    return content
+
+def stream_provider_with_fallback(
+    prompt: str,
+    on_text: Any,
+    system_message: str = "You are a helpful assistant.",
+    max_tokens: int = 3000,
+    temperature: float = 0.7,
+    custom_provider_order: List[str] = None,
+    provider_config_path: str = "providers_config.json",
+    resume_from: str = "",
+    deadline: Optional[float] = None,
+    stage: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Stream a response from AI providers with fallback, passing text to on_text as it arrives.
+    
+    If a stream breaks after some text arrived, the text is kept and a
+    continuation is requested, first from the same provider and then from
+    the next ones. A response that stops at max_tokens is continued by the
+    same provider, up to MAX_OUTPUT_CONTINUATIONS times, and then by the
+    next one. Streamed responses are not hedged.
+    
+    Args:
+        prompt: The user prompt to send to the model
+        on_text: Function called with each new piece of the response
+        system_message: System message for chat models
+        max_tokens: Maximum number of tokens to generate
+        temperature: Temperature for generation (0.0 to 1.0)
+        custom_provider_order: Optional custom order of provider names to try
+        provider_config_path: Path to the providers configuration JSON file
+        resume_from: Text already received in an earlier attempt, which is continued
+        deadline: Optional time.monotonic() value after which no further provider is tried
+            (a response that has started streaming is continued regardless)
+        stage: Optional name of the pipeline stage, for adaptive max_tokens as in call_provider_with_fallback
+        
+    Returns:
+        Dict containing the whole response (resume_from included) and the last provider used
+    """
+    resolved, errors = _resolve_providers(custom_provider_order, provider_config_path)
+    
+    cache = get_response_cache() if not resume_from else None
+    if cache is not None:
+        cache_keys = _response_cache_keys(cache, resolved, prompt, system_message, max_tokens, temperature, False)
+        cached = cache.get_first(list(cache_keys.values()))
+        if cached is not None:
+            logger.info(f"Using cached response from {cached['provider']}")
+            on_text(cached["content"])
+            return cached
+    
+    candidates = [(spec, PROVIDER_STREAM_FUNCTIONS.get(spec.name)) for spec, _ in provider_router.order(resolved.available, max_tokens)]
+    logger.info(f"Attempting to stream from providers in order: {[spec.name for spec, _ in candidates]}")
+    
+    base_request = {"prompt": prompt, "system_message": system_message, "max_tokens": max_tokens, "stage": stage}
+    content = resume_from
+    continuations = 0
+    truncations = 0
+    truncated = False
+    cap = None
+    attempts = _healthy_providers(_fitting_providers(candidates, base_request, errors))
+    attempt = _next_attempt(attempts, deadline)
+    while attempt is not None:
+        spec, stream_function = attempt
+        request = _sized_request(spec, {
+            "prompt": build_continuation_prompt(prompt, content) if content else prompt,
+            "system_message": system_message,
+            "max_tokens": max(MIN_CONTINUATION_TOKENS, max_tokens - estimate_tokens(content)) if content else max_tokens,
+            "temperature": temperature,
+            "json_mode": False,
+            # Only a fresh request is sized from the stage's history
+            "stage": None if content else stage
+        })
+        if not content:
+            cap = request["max_tokens"]
+        try:
+            content += _stream_attempt(spec, stream_function, request, on_text)
+            break
+        except OutputTruncatedException as e:
+            content += e.partial
+            truncated = True
+            if truncations < MAX_OUTPUT_CONTINUATIONS:
+                truncations += 1
+                continuations += 1
+                logger.info(f"Response from {spec.name} reached max_tokens ({request['max_tokens']}); requesting a continuation")
+                continue
+            # The text so far is kept and the next provider continues it
+            logger.warning(f"Response from {spec.name} still reached max_tokens after {truncations} continuations")
+            _record_provider_error(errors, spec.name, e)
+        except StreamInterruptedException as e:
+            content += e.partial
+            _record_provider_error(errors, spec.name, e)
+            if continuations < MAX_STREAM_CONTINUATIONS:
+                continuations += 1
+                logger.info(f"Requesting a continuation from {spec.name} after {len(content)} characters")
+                continue
+        except Exception as e:
+            _record_provider_error(errors, spec.name, e)
+        # A response already under way is finished whatever the deadline
+        attempt = _next_attempt(attempts, None if content else deadline)
+        truncations = 0
+    else:
+        error_details = "\n".join([f"{k}: {v}" for k, v in errors.items()])
+        raise AllProvidersFailedException(f"All providers failed. Details:\n{error_details}", errors)
+    
+    if cap is not None:
+        _record_output(spec, base_request, content, cap, truncated)
+    if cache is not None and not continuations:
+        cache.put(cache_keys[spec.name], spec.name, spec.default_model, content)
+    return {
+        "content": content,
+        "provider": spec.name,
+        "model": spec.default_model
+    }
+
+# Most output tokens requested for one paper summary; observed lengths usually allow less
+ANALYSIS_MAX_TOKENS = 1000
+
+# System message for the per-paper analysis request
+ANALYSIS_SYSTEM_MESSAGE = "You are a helpful assistant that provides comprehensive academic summaries in JSON format. Respond with valid JSON only, no markdown code blocks."
+
+# Fields requested for each paper summary, as listed in the analysis prompts
+ANALYSIS_FIELDS = """    - title: string
     - authors: array of strings
     - year: integer
     - research_question: string
@@ -596,52 +1785,503 @@ def analyze_pdf(text: str, filename: str, text_limit: int = 6000) -> PaperSummar
     - limitations: string
     - future_research: string"""
 
+def build_analysis_prompt(text: str, filename: str, text_limit: int = 6000) -> str:
+    """Build the prompt asking for a structured summary of one paper."""
+    return f"""Analyze the following academic paper and provide a detailed summary in JSON format:
+
+    Filename: {filename}
+    Text: {text[:text_limit]}  # Limit text to {text_limit} characters
+
+    Provide the summary in a structured JSON format with the following fields:
+{ANALYSIS_FIELDS}"""
+
+def parse_analysis_response(response: Dict[str, Any], filename: str) -> PaperSummary:
+    """Parse a provider response to the analysis prompt into a PaperSummary."""
+    logger.info(f"Analysis of {filename} completed using {response['provider']} with model {response['model']}")
+    
+    # Clean the response in case it contains markdown code blocks
+    content = clean_json_response(response["content"])
+    
+    # Parse the response content as JSON and create PaperSummary
     try:
-        system_message = "You are a helpful assistant that provides comprehensive academic summaries in JSON format. Respond with valid JSON only, no markdown code blocks."
+        # Try the cleaned content first
+        return PaperSummary.model_validate_json(content)
+    except ValidationError as e:
+        logger.warning(f"Error parsing cleaned JSON: {str(e).splitlines()[0]}")
+        # Repair the response locally; only if that fails is the request retried
+        try:
+            summary = json_repairs.repair(response["content"], PaperSummary, REQUIRED_SUMMARY_FIELDS)
+        except ValueError:
+            raise e
+        logger.info(f"Recovered the malformed summary of {filename} locally instead of calling the provider again")
+        return summary
+
+def analyze_pdf(text: str, filename: str, text_limit: int = 6000) -> PaperSummary:
+    """Analyze the content of a PDF and generate a structured summary."""
+    prompt = build_analysis_prompt(text, filename, text_limit)
+
+    def attempt(number: int, deadline: Optional[float]) -> PaperSummary:
+        # A retry after an unparseable response must not be served the same response from the cache
         response = call_provider_with_fallback(
             prompt=prompt,
-            system_message=system_message,
-            max_tokens=1000,
+            system_message=ANALYSIS_SYSTEM_MESSAGE,
+            max_tokens=ANALYSIS_MAX_TOKENS,
             temperature=0.7,
-            json_mode=True
+            json_mode=True,
+            use_cache=number == 1,
+            deadline=deadline,
+            stage="analysis"
         )
+        return parse_analysis_response(response, filename)
+
+    try:
+        return request_retries.call(attempt)
+    except Exception as e:
+        logger.error(f"Error analyzing PDF {filename}: {str(e)}")
+        raise
+
+async def analyze_pdf_async(text: str, filename: str, text_limit: int = 6000) -> PaperSummary:
+    """Async version of analyze_pdf."""
+    prompt = build_analysis_prompt(text, filename, text_limit)
+
+    async def attempt(number: int, deadline: Optional[float]) -> PaperSummary:
+        response = await call_provider_with_fallback_async(
+            prompt=prompt,
+            system_message=ANALYSIS_SYSTEM_MESSAGE,
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            temperature=0.7,
+            json_mode=True,
+            use_cache=number == 1,
+            deadline=deadline,
+            stage="analysis"
+        )
+        return parse_analysis_response(response, filename)
+
+    try:
+        return await request_retries.call_async(attempt)
+    except Exception as e:
+        logger.error(f"Error analyzing PDF {filename}: {str(e)}")
+        raise
+
+# Output tokens allowed per paper in a packed request, as for a single-paper request
+PACKED_SUMMARY_TOKENS = ANALYSIS_MAX_TOKENS
+
+# Prompt tokens for the instructions of a packed request, and for the header of each paper in it
+PACK_PROMPT_TOKENS = 250
+PACK_PAPER_HEADER_TOKENS = 30
+
+# Rounds of packed requests before the papers still missing are analyzed one at a time
+PACK_ROUNDS = 2
+
+# System message for packed analysis requests
+PACKED_ANALYSIS_SYSTEM_MESSAGE = "You are a helpful assistant that provides comprehensive academic summaries in JSON format. Respond with a single valid JSON object only, no markdown code blocks."
+
+def pack_papers(papers: List[Any], token_budget: int, max_papers: int) -> List[List[Any]]:
+    """
+    Group papers into packs that fit a token budget.
+    
+    Papers are packed greedily in order. The budget covers the prompt and the
+    output reserved for the summaries; a paper that does not fit the budget
+    on its own gets a pack of its own.
+    
+    Args:
+        papers: List of (file path, extracted text, text limit) tuples
+        token_budget: Maximum prompt and output tokens per pack
+        max_papers: Maximum number of papers per pack
         
-        logger.info(f"Analysis of {filename} completed using {response['provider']} with model {response['model']}")
-        
-        # Clean the response in case it contains markdown code blocks
-        content = clean_json_response(response["content"])
+    Returns:
+        List of packs, each a list of papers
+    """
+    packs, current, used = [], [], PACK_PROMPT_TOKENS
+    for paper in papers:
+        _, text, text_limit = paper
+        cost = estimate_tokens(text[:text_limit]) + PACK_PAPER_HEADER_TOKENS + PACKED_SUMMARY_TOKENS
+        if current and (used + cost > token_budget or len(current) >= max_papers):
+            packs.append(current)
+            current, used = [], PACK_PROMPT_TOKENS
+        current.append(paper)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+def build_packed_analysis_prompt(pack: List[Any]) -> str:
+    """Build the prompt asking for structured summaries of several papers at once."""
+    papers = "\n\n".join(
+        f"""    Paper ID: {paper_id}
+    Filename: {os.path.basename(file_path)}
+    Text: {text[:text_limit]}"""
+        for paper_id, (file_path, text, text_limit) in enumerate(pack)
+    )
+    return f"""Analyze each of the following {len(pack)} academic papers and provide a detailed summary of each in JSON format.
+
+{papers}
+
+    Respond with a JSON object with a single field "summaries": an array holding one summary per paper, in any order.
+    Each summary is an object with the paper's "paper_id" (integer, as given above) and the following fields:
+{ANALYSIS_FIELDS}"""
+
+def parse_packed_analysis_response(response: Dict[str, Any], pack: List[Any]) -> Any:
+    """
+    Parse a provider response to a packed analysis prompt, validating each summary on its own.
+    
+    Args:
+        response: The provider response
+        pack: The papers in the request
         
-        # Parse the response content as JSON and create PaperSummary
+    Returns:
+        Tuple of (dict of file path to PaperSummary, dict of file path to failure reason)
+    """
+    content = clean_json_response(response["content"])
+    try:
+        elements = json.loads(content)
+    except json.JSONDecodeError:
         try:
-            # Try the cleaned content first
-            summary = PaperSummary.model_validate_json(content)
-        except Exception as e:
-            logger.warning(f"Error parsing cleaned JSON: {str(e)}")
-            # If that fails, try to parse the original content
-            summary = PaperSummary.model_validate_json(response["content"])
+            elements = parse_json_tolerant(response["content"])
+        except ValueError as e:
+            return {}, {file_path: f"unparseable packed response: {str(e)}" for file_path, _, _ in pack}
+    if isinstance(elements, dict):
+        elements = elements.get("summaries", [])
+    
+    summaries, failures = {}, {}
+    for element in elements if isinstance(elements, list) else []:
+        if not isinstance(element, dict):
+            continue
+        try:
+            paper_id = int(element.get("paper_id"))
+            file_path = pack[paper_id][0]
+        except (TypeError, ValueError, IndexError):
+            logger.warning(f"Ignoring summary with unknown paper_id {element.get('paper_id')!r} "
+                           f"in packed response from {response['provider']}")
+            continue
+        try:
+            summaries[file_path] = PaperSummary.model_validate(element)
+        except ValidationError as e:
+            try:
+                summaries[file_path] = json_repairs.repair("", PaperSummary, REQUIRED_SUMMARY_FIELDS, data=element)
+            except ValueError:
+                failures[file_path] = f"invalid summary in packed response: {str(e).splitlines()[0]}"
+    for file_path, _, _ in pack:
+        if file_path not in summaries and file_path not in failures:
+            failures[file_path] = "missing from packed response"
+    logger.info(f"Packed analysis of {len(pack)} papers completed using {response['provider']} "
+                f"with model {response['model']}: {len(summaries)} valid summaries")
+    return summaries, failures
+
+def analyze_pack(pack: List[Any], custom_provider_order: Optional[List[str]] = None, use_cache: bool = True) -> Any:
+    """
+    Analyze several papers with one request.
+    
+    Args:
+        pack: List of (file path, extracted text, text limit) tuples
+        custom_provider_order: Optional custom order of provider names
+        use_cache: Whether to consult and update the response cache (off for re-queued papers,
+            so a cached answer that failed validation is not returned again)
         
-        return summary
+    Returns:
+        Tuple of (dict of file path to PaperSummary, dict of file path to failure reason)
+    """
+    prompt = build_packed_analysis_prompt(pack)
+    try:
+        response = request_retries.call(lambda number, deadline: call_provider_with_fallback(
+            prompt=prompt,
+            system_message=PACKED_ANALYSIS_SYSTEM_MESSAGE,
+            max_tokens=PACKED_SUMMARY_TOKENS * len(pack),
+            temperature=0.7,
+            custom_provider_order=custom_provider_order,
+            json_mode=True,
+            use_cache=use_cache and number == 1,
+            deadline=deadline
+        ))
     except Exception as e:
-        logger.error(f"Error analyzing PDF {filename}: {str(e)}")
-        raise
+        logger.error(f"Packed analysis of {len(pack)} papers failed: {str(e).splitlines()[0]}")
+        return {}, {file_path: f"packed request failed: {str(e)}" for file_path, _, _ in pack}
+    return parse_packed_analysis_response(response, pack)
 
-def process_pdf(file_path: str, text_limit: int = 6000) -> PaperSummary:
+def analyze_packed(
+    papers: List[Any],
+    token_budget: int,
+    max_papers: int,
+    workers: int = 4,
+    custom_provider_order: Optional[List[str]] = None,
+    progress: Any = None
+) -> Any:
+    """
+    Analyze papers several per request.
+    
+    Papers whose summary is missing or fails validation are re-queued into
+    new packs, for up to PACK_ROUNDS rounds; re-queued packs bypass the
+    response cache.
+    
+    Args:
+        papers: List of (file path, extracted text, text limit) tuples
+        token_budget: Maximum prompt and output tokens per request
+        max_papers: Maximum number of papers per request
+        workers: Number of packed requests sent concurrently
+        custom_provider_order: Optional custom order of provider names
+        progress: Optional progress bar updated once per summarized paper
+        
+    Returns:
+        Tuple of (dict of file path to PaperSummary, dict of file path to failure reason);
+        failed papers are meant to be analyzed again one at a time
+    """
+    summaries, failures = {}, {}
+    pending = list(papers)
+    for round_number in range(1, PACK_ROUNDS + 1):
+        if not pending:
+            break
+        packs = pack_papers(pending, token_budget, max_papers)
+        logger.info(f"Packing round {round_number}: {len(pending)} papers in {len(packs)} requests")
+        failures = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for pack_summaries, pack_failures in executor.map(
+                    lambda pack: analyze_pack(pack, custom_provider_order, round_number == 1), packs):
+                summaries.update(pack_summaries)
+                failures.update(pack_failures)
+                if progress is not None:
+                    progress.update(len(pack_summaries))
+        pending = [paper for paper in pending if paper[0] in failures]
+        if pending:
+            logger.warning(f"Re-queueing {len(pending)} papers without a valid summary")
+    return summaries, failures
+
+def analyze_batch(
+    papers: List[Any],
+    submission_path: str,
+    custom_provider_order: Optional[List[str]] = None,
+    base_url: Optional[str] = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    timeout: float = DEFAULT_BATCH_TIMEOUT
+) -> Any:
+    """
+    Analyze papers with one submission to a provider's batch API.
+    
+    The first available provider (in provider order) that has a batch API is
+    used. Papers with a cached response are not submitted, and responses from
+    the batch are added to the response cache.
+    
+    Args:
+        papers: List of (file path, extracted text, text limit) tuples
+        submission_path: Where to write the JSONL submission file
+        custom_provider_order: Optional custom order of provider names
+        base_url: Optional API base URL overriding the provider's (e.g. a local stand-in server)
+        poll_interval: Seconds between batch status checks
+        timeout: Seconds to wait for the batch before cancelling it
+        
+    Returns:
+        Tuple of (dict of file path to PaperSummary, dict of file path to failure reason);
+        failed papers are meant to be analyzed again synchronously
+    """
+    resolved, _ = _resolve_providers(custom_provider_order, "providers_config.json")
+    spec = next((spec for spec, _ in resolved.available if spec.name in BATCH_CLIENTS), None)
+    if spec is None:
+        reason = f"no provider with a batch API ({', '.join(BATCH_CLIENTS)}) has an API key"
+        return {}, {file_path: reason for file_path, _, _ in papers}
+    client = BATCH_CLIENTS[spec.name](
+        os.environ[spec.api_key_env], spec.default_model, client_registry.session(spec.name), base_url)
+    
+    cache = get_response_cache()
+    summaries, failures = {}, {}
+    batch_requests, submitted = [], {}
+    for index, (file_path, text, text_limit) in enumerate(papers):
+        filename = os.path.basename(file_path)
+        request = {
+            "custom_id": f"paper-{index}",
+            "system_message": ANALYSIS_SYSTEM_MESSAGE,
+            "prompt": build_analysis_prompt(text, filename, text_limit),
+            "max_tokens": ANALYSIS_MAX_TOKENS,
+            "temperature": 0.7,
+            "json_mode": True
+        }
+        needed = context_overflow(spec, request["system_message"], request["prompt"], request["max_tokens"])
+        if needed is not None:
+            failures[file_path] = f"request of about {needed} tokens does not fit the context window of {spec.default_model}"
+            continue
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(spec.name, spec.default_model, request["system_message"], request["prompt"],
+                                       request["max_tokens"], request["temperature"], request["json_mode"])
+            cached = cache.get_first([cache_key])
+            if cached is not None:
+                try:
+                    summaries[file_path] = parse_analysis_response(cached, filename)
+                    continue
+                except Exception as e:
+                    logger.warning(f"Cached response for {filename} is unusable, submitting it again: {str(e)}")
+        batch_requests.append(request)
+        submitted[request["custom_id"]] = (file_path, cache_key)
+    
+    if not batch_requests:
+        return summaries, failures
+    contents, batch_failures = run_batch(client, batch_requests, submission_path, poll_interval, timeout)
+    
+    for custom_id, content in contents.items():
+        file_path, cache_key = submitted[custom_id]
+        response = {"content": content, "provider": spec.name, "model": spec.default_model}
+        try:
+            summaries[file_path] = parse_analysis_response(response, os.path.basename(file_path))
+        except Exception as e:
+            failures[file_path] = f"unparseable batch response: {str(e)}"
+            continue
+        if cache_key is not None:
+            cache.put(cache_key, spec.name, spec.default_model, content)
+    for custom_id, reason in batch_failures.items():
+        failures[submitted[custom_id][0]] = reason
+    return summaries, failures
+
+def process_pdf(file_path: str, text_limit: int = 6000, cache: Optional[ExtractionCache] = None) -> PaperSummary:
     """Process a single PDF file."""
     filename = os.path.basename(file_path)
     logger.info(f"Processing: {filename}")
-    text = extract_text_from_pdf(file_path)
+    text = extract_text_from_pdf(file_path, cache, char_budget=text_limit)
     return analyze_pdf(text, filename, text_limit)
 
-@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(min=1, max=60))
-def synthesize_reviews(summaries: List[PaperSummary], word_limit: int = 2500) -> str:
-    """Synthesize multiple paper summaries into a comprehensive literature review."""
-    # Create a list of citations for reference
+def extract_pdf_worker(
+    file_path: str,
+    cache: Optional[ExtractionCache] = None,
+    char_budget: Optional[int] = None,
+    section_token_budget: Optional[int] = None,
+    backend: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    token_limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Extract the text of a PDF in a pipeline worker process.
+
+    Args:
+        file_path: Path to the PDF file
+        cache: Optional extraction cache (a per-task copy when run in a process pool)
+        char_budget: Number of characters needed downstream (default: whole document)
+        section_token_budget: If set, select the paper's sections within this many tokens
+            instead of returning the head of the document
+        backend: Name of the extraction backend (default: DEFAULT_BACKEND, PyPDF2)
+        token_budget: Number of tokens needed downstream, as an alternative to char_budget
+        token_limit: If set, the text is trimmed to this many tokens
+
+    Returns:
+        Dict with the extracted "text", the PDF's "content_hash" (so the parent
+        need not hash it again), the worker's "cache_stats" and, when sections
+        were selected, the "section_selection" details
+    """
+    content_hash = hash_file(file_path)
+    selection = None
+    if section_token_budget:
+        # Section selection needs the whole document with its line structure
+        full_text = extract_text_from_pdf(file_path, cache, preserve_lines=True, backend=backend,
+                                          content_hash=content_hash)
+        selection = select_sections(full_text, section_token_budget)
+        text = selection["text"]
+    else:
+        text = extract_text_from_pdf(file_path, cache, char_budget=char_budget, token_budget=token_budget,
+                                     backend=backend, content_hash=content_hash)
+        if token_limit:
+            text = trim_to_tokens(text, token_limit)
+    return {
+        "text": text,
+        "content_hash": content_hash,
+        "cache_stats": cache.stats() if cache is not None else {},
+        "section_selection": selection
+    }
+
+# Maximum number of tokens requested for the literature review when no length is given
+SYNTHESIS_MAX_TOKENS = 3000
+
+# Approximate tokens per English word, for turning a word limit into an output budget
+TOKENS_PER_WORD = 1.4
+
+# Extra output tokens allowed for headings and the reference markers of a review
+SYNTHESIS_OVERHEAD_TOKENS = 200
+
+def synthesis_max_tokens(word_limit: int) -> int:
+    """Return the output tokens a literature review of word_limit words may need."""
+    return int(word_limit * TOKENS_PER_WORD) + SYNTHESIS_OVERHEAD_TOKENS
+
+class ReviewStreamWriter:
+    """
+    Writes a streamed literature review to its output file as it arrives.
+    
+    The file is flushed after every piece, so the review can be read while it
+    is still being generated, and a progress bar shows the approximate number
+    of tokens received.
+    """
+    
+    def __init__(self, path: str, max_tokens: int = SYNTHESIS_MAX_TOKENS):
+        self.path = path
+        self._parts = []
+        self._chars = 0
+        from tqdm import tqdm
+        self._file = open(path, 'w')
+        self._progress = tqdm(total=max_tokens, desc="Streaming review", unit="tok")
+    
+    @property
+    def text(self) -> str:
+        """The review text written so far."""
+        return "".join(self._parts)
+    
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._file.write(text)
+        self._file.flush()
+        self._chars += len(text)
+        self._progress.update(self._chars // CHARS_PER_TOKEN - self._progress.n)
+    
+    def close(self) -> None:
+        self._progress.close()
+        self._file.close()
+
+# Prompt tokens of one synthesis request, above which summaries are synthesized hierarchically
+SYNTHESIS_GROUP_TOKENS = 24000
+
+# Word limit of each intermediate thematic synthesis
+PARTIAL_SYNTHESIS_WORDS = 800
+
+# Smallest group budget accepted, so every group holds several intermediate syntheses and each level shrinks
+MIN_SYNTHESIS_GROUP_TOKENS = 4 * int(PARTIAL_SYNTHESIS_WORDS * 1.4)
+
+# Most levels of intermediate syntheses before the final review is written from what is left
+MAX_SYNTHESIS_LEVELS = 6
+
+# System message for every synthesis request
+SYNTHESIS_SYSTEM_MESSAGE = """You are a helpful assistant that creates comprehensive, well-structured literature reviews.
+        Always include proper academic in-text citations when discussing findings, methods, or arguments from the papers."""
+
+_CITATION_GROUP = re.compile(r"\(([^()]*\d{4}[a-z]?)\)")
+
+def assign_citations(summaries: List[PaperSummary]) -> List[str]:
+    """
+    Return the in-text citation of each paper, as "Surname (Year)".
+    
+    Papers that would get the same citation are told apart with a letter
+    after the year, as in APA style: "Smith (2020a)", "Smith (2020b)".
+    """
     citations = []
     for summary in summaries:
         authors = summary.authors[0].split()[-1] if summary.authors else "Unknown"
         citations.append(f"{authors} ({summary.year})")
-    
-    prompt = f"""Create a comprehensive literature review based on the following paper summaries. 
+    counts = {}
+    for citation in citations:
+        counts[citation] = counts.get(citation, 0) + 1
+    seen = {}
+    for index, citation in enumerate(citations):
+        if counts[citation] > 1:
+            seen[citation] = seen.get(citation, 0) + 1
+            citations[index] = f"{citation[:-1]}{chr(ord('a') + seen[citation] - 1)})"
+    return citations
+
+def unknown_citations(review: str, citations: List[str]) -> List[str]:
+    """Return the parenthetical citations in a review that are not in the list of available citations."""
+    known = {citation.replace(" (", ", ").rstrip(")") for citation in citations}
+    unknown = []
+    for group in _CITATION_GROUP.findall(review):
+        for reference in group.split(";"):
+            reference = reference.strip()
+            if "," in reference and reference not in known and reference not in unknown:
+                unknown.append(reference)
+    return unknown
+
+def build_review_prompt(citations: List[str], word_limit: int, material_label: str, material: str) -> str:
+    """Build the prompt of the final literature review from paper summaries or intermediate syntheses."""
+    return f"""Create a comprehensive literature review based on the following {material_label.lower()}. 
     Focus on synthesizing information, comparing and contrasting key arguments, methodologies, and significance of findings. 
     Highlight any contradictions, agreements, or trends between authors. 
     Discuss the evolution of ideas and methodologies in the field.
@@ -656,7 +2296,7 @@ def synthesize_reviews(summaries: List[PaperSummary], word_limit: int = 2500) ->
     - When discussing multiple papers: (Smith, 2020; Jones, 2021)
     - When the finding is directly quoted or central: Smith (2020) demonstrated that...
 
-    Paper Summaries: {[summary.dict() for summary in summaries]}
+    {material_label}: {material}
 
     Structure the review as follows:
     1. Introduction (with overview of the field and key themes)
@@ -672,27 +2312,183 @@ def synthesize_reviews(summaries: List[PaperSummary], word_limit: int = 2500) ->
     - Compare and contrast findings across multiple papers where relevant
     - Use proper citation format consistently throughout the text"""
 
+def build_partial_synthesis_prompt(material: List[str], citations: List[str], from_summaries: bool) -> str:
+    """Build the prompt of an intermediate thematic synthesis of a group of summaries or syntheses."""
+    material_label = "Paper Summaries" if from_summaries else "Thematic Syntheses"
+    return f"""Create a thematic synthesis of the following {material_label.lower()}. It will be merged with syntheses of other papers into a full literature review, so do not write an introduction or a conclusion.
+    Organize it by theme. For each theme, compare and contrast the arguments, theoretical frameworks, methodologies and findings, and note agreements, contradictions, trends and gaps.
+    Keep the synthesis under {PARTIAL_SYNTHESIS_WORDS} words.
+
+    IMPORTANT: Support every point with in-text citations in parentheses, e.g. (Smith, 2020) or (Smith, 2020; Jones, 2021).
+    Use only these citations, exactly as written, and keep every citation from the material that supports a point you make:
+    {', '.join(citations)}
+
+    {material_label}:
+
+    {chr(10).join(material)}"""
+
+def _group_by_tokens(items: List[Any], token_budget: int) -> List[List[Any]]:
+    """Group (text, citations) items in order so that each group's text and citation list fit the token budget."""
+    groups, group, used = [], [], 0
+    for item in items:
+        # The prompt of a group lists the citations of every paper it covers
+        cost = estimate_tokens(item[0]) + estimate_tokens(", ".join(item[1]))
+        if group and used + cost > token_budget:
+            groups.append(group)
+            group, used = [], 0
+        group.append(item)
+        used += cost
+    if group:
+        groups.append(group)
+    return groups
+
+def _synthesize_group(group: List[Any], from_summaries: bool) -> Any:
+    """Synthesize one group into a (text, citations) item for the next level."""
+    citations = [citation for _, group_citations in group for citation in group_citations]
+    prompt = build_partial_synthesis_prompt([text for text, _ in group], citations, from_summaries)
+    response = request_retries.call(lambda number, deadline: call_provider_with_fallback(
+        prompt=prompt,
+        system_message=SYNTHESIS_SYSTEM_MESSAGE,
+        max_tokens=synthesis_max_tokens(PARTIAL_SYNTHESIS_WORDS),
+        temperature=0.7,
+        deadline=deadline,
+        stage="partial_synthesis"
+    ))
+    return response["content"], citations
+
+def reduce_summaries(
+    summaries: List[PaperSummary],
+    citations: List[str],
+    group_tokens: int = SYNTHESIS_GROUP_TOKENS,
+    workers: int = 4
+) -> List[Any]:
+    """
+    Reduce paper summaries level by level into intermediate syntheses that fit one synthesis request.
+    
+    Summaries are grouped in order within group_tokens and each group is
+    synthesized in parallel; the syntheses are then grouped and synthesized
+    again until a single group is left. If a level could not shrink (every
+    item fills a group on its own), items are merged in pairs instead, and
+    after MAX_SYNTHESIS_LEVELS levels the remaining items are returned as
+    they are. Every intermediate synthesis keeps
+    the citations of the papers it covers, so the citations stay the same
+    at every level.
+    
+    Args:
+        summaries: Summaries of the papers to review
+        citations: In-text citation of each paper, from assign_citations
+        group_tokens: Prompt tokens of the material in one synthesis request
+        workers: Number of groups synthesized concurrently
+        
+    Returns:
+        List of (synthesis text, citations it covers) for the final review
+    """
+    group_tokens = max(group_tokens, MIN_SYNTHESIS_GROUP_TOKENS)
+    items = [(f"Citation: {citation}\n{json.dumps(summary.model_dump())}", [citation])
+             for summary, citation in zip(summaries, citations)]
+    from_summaries = True
+    level = 0
+    groups = _group_by_tokens(items, group_tokens)
+    while len(groups) > 1:
+        if level >= MAX_SYNTHESIS_LEVELS:
+            logger.warning(f"Stopping after {level} synthesis levels with {len(items)} syntheses left")
+            break
+        if len(groups) >= len(items):
+            # Each item fills a group on its own, so grouping by budget would never shrink the level
+            logger.warning(f"Syntheses exceed half of the {group_tokens}-token group budget; merging them in pairs")
+            groups = [items[index:index + 2] for index in range(0, len(items), 2)]
+        level += 1
+        logger.info(f"Synthesis level {level}: {len(items)} {'summaries' if from_summaries else 'syntheses'} "
+                    f"in {len(groups)} groups")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            items = list(executor.map(lambda group: _synthesize_group(group, from_summaries), groups))
+        from_summaries = False
+        groups = _group_by_tokens(items, group_tokens)
+    return items
+
+def synthesize_reviews(
+    summaries: List[PaperSummary],
+    word_limit: int = 2500,
+    stream: Optional[ReviewStreamWriter] = None,
+    group_tokens: int = SYNTHESIS_GROUP_TOKENS,
+    workers: int = 4,
+    citations: Optional[List[str]] = None
+) -> str:
+    """
+    Synthesize multiple paper summaries into a comprehensive literature review.
+    
+    If the summaries do not fit one request of group_tokens, they are first
+    reduced to intermediate thematic syntheses (see reduce_summaries), and
+    the review is written from those.
+    
+    Args:
+        summaries: Summaries of the papers to review
+        word_limit: Word limit for the review
+        stream: If given, the review is streamed into this writer as it is generated
+        group_tokens: Prompt tokens of the material in one synthesis request
+        workers: Number of intermediate syntheses generated concurrently
+        citations: In-text citation of each paper (default: assign_citations(summaries))
+        
+    Returns:
+        The literature review
+    """
+    # Create a list of citations for reference
+    if citations is None:
+        citations = assign_citations(summaries)
+    
+    prompt = build_review_prompt(citations, word_limit, "Paper Summaries", f"{[summary.dict() for summary in summaries]}")
+
     try:
-        system_message = """You are a helpful assistant that creates comprehensive, well-structured literature reviews.
-        Always include proper academic in-text citations when discussing findings, methods, or arguments from the papers."""
-        response = call_provider_with_fallback(
-            prompt=prompt,
-            system_message=system_message,
-            max_tokens=3000,
-            temperature=0.7
-        )
+        if estimate_tokens(prompt) > max(group_tokens, MIN_SYNTHESIS_GROUP_TOKENS):
+            partials = reduce_summaries(summaries, citations, group_tokens, workers)
+            prompt = build_review_prompt(
+                citations, word_limit, "Thematic Syntheses",
+                "\n\n".join(f"Synthesis {number}:\n{text}" for number, (text, _) in enumerate(partials, 1))
+            )
+        
+        if stream is not None:
+            # A retry continues from the text already written instead of starting over
+            response = request_retries.call(lambda number, deadline: stream_provider_with_fallback(
+                prompt=prompt,
+                on_text=stream.write,
+                system_message=SYNTHESIS_SYSTEM_MESSAGE,
+                max_tokens=synthesis_max_tokens(word_limit),
+                temperature=0.7,
+                resume_from=stream.text,
+                deadline=deadline,
+                stage="synthesis"
+            ), stage="synthesis")
+        else:
+            response = request_retries.call(lambda number, deadline: call_provider_with_fallback(
+                prompt=prompt,
+                system_message=SYNTHESIS_SYSTEM_MESSAGE,
+                max_tokens=synthesis_max_tokens(word_limit),
+                temperature=0.7,
+                deadline=deadline,
+                stage="synthesis"
+            ), stage="synthesis")
         
         logger.info(f"Literature review synthesis completed using {response['provider']} with model {response['model']}")
+        unknown = unknown_citations(response["content"], citations)
+        if unknown:
+            logger.warning(f"Review cites {len(unknown)} works that are not among the reviewed papers: {', '.join(unknown[:10])}")
         return response["content"]
     except Exception as e:
         logger.error(f"Error synthesizing literature review: {str(e)}")
         raise
 
-def create_apa_citation(summary: PaperSummary) -> str:
-    """Create an APA 7th edition style citation for a paper."""
+def create_apa_citation(summary: PaperSummary, year_label: Optional[str] = None) -> str:
+    """
+    Create an APA 7th edition style citation for a paper.
+    
+    Args:
+        summary: The paper's summary
+        year_label: Year as cited in the text, e.g. "2020a" for one of several Smith (2020) papers
+    """
+    year = year_label or summary.year
     # Handle case where there are no authors
     if not summary.authors:
-        return f"Unknown. ({summary.year}). {summary.title}."
+        return f"Unknown. ({year}). {summary.title}."
 
     # Format authors: Last name, First initial. for all authors
     formatted_authors = []
@@ -723,14 +2519,23 @@ def create_apa_citation(summary: PaperSummary) -> str:
     if title.endswith('.'):
         title = title[:-1]
     
-    return f"{authors_string} ({summary.year}). {title}."
+    return f"{authors_string} ({year}). {title}."
 
-def create_paper_list(summaries: List[PaperSummary]) -> str:
-    """Create a formatted list of reviewed papers with APA citations."""
+def create_paper_list(summaries: List[PaperSummary], citations: Optional[List[str]] = None) -> str:
+    """
+    Create a formatted list of reviewed papers with APA citations.
+    
+    Args:
+        summaries: Summaries of the reviewed papers
+        citations: In-text citation of each paper from assign_citations, so that
+            the letters telling apart papers with the same author and year match the review
+    """
+    if citations is None:
+        citations = assign_citations(summaries)
     paper_list = "## List of Reviewed Papers\n\n"
-    for summary in summaries:
+    for summary, in_text in zip(summaries, citations):
         try:
-            citation = create_apa_citation(summary)
+            citation = create_apa_citation(summary, in_text[in_text.rindex("(") + 1:-1])
             paper_list += f"- {citation}\n"
         except Exception as e:
             logger.error(f"Error creating citation for paper: {summary.title}. Error: {str(e)}")
@@ -751,32 +2556,183 @@ def parse_args():
     parser = argparse.ArgumentParser(description='Generate literature reviews from PDF papers.')
     parser.add_argument('--individual-summary-length', type=int, default=6000,
                       help='Character limit for initial text analysis per paper (default: 6000)')
+    parser.add_argument('--individual-summary-tokens', type=int, default=None,
+                      help='Token limit for initial text analysis per paper, used instead of the character limit '
+                           '(counted with tiktoken when installed)')
     parser.add_argument('--final-review-length', type=int, default=7000,
                       help='Word limit for the final literature review (default: 7000)')
     parser.add_argument('--custom-provider-order', type=str, nargs='+',
                       help='Custom order of providers to try (e.g., "gemini openai anthropic")')
     parser.add_argument('--files_to_process', type=int, default=None,
                       help='Limit the number of PDF files to process (default: process all files)')
+    parser.add_argument('--incremental', action='store_true',
+                      help='Only analyze new or changed PDFs and reuse stored summaries for the rest')
+    parser.add_argument('--manifest', type=str, default=None,
+                      help='Path of the manifest of processed PDFs (default: .cache/manifest.json next to main.py)')
+    parser.add_argument('--no-recursive', action='store_true',
+                      help='Only look for PDFs directly inside the PDF folder, not in its subfolders')
+    parser.add_argument('--gemini-models-ttl', type=float, default=24,
+                      help='Hours a discovered list of Gemini models is reused before asking the API again (default: 24)')
+    parser.add_argument('--batch', action='store_true',
+                      help='Analyze all PDFs in one submission to the OpenAI or Anthropic batch API '
+                           '(slower but cheaper; failed papers are analyzed synchronously)')
+    parser.add_argument('--batch-base-url', type=str, default=None,
+                      help='Base URL of the batch API, e.g. a local stand-in server (default: the provider\'s)')
+    parser.add_argument('--batch-poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                      help='Seconds between batch status checks (default: 30)')
+    parser.add_argument('--batch-timeout', type=float, default=DEFAULT_BATCH_TIMEOUT / 3600,
+                      help='Hours to wait for a batch before cancelling it (default: 24)')
+    parser.add_argument('--pack-tokens', type=int, default=0,
+                      help='Summarize several papers per request, filling up to this many prompt and output tokens; '
+                           '0 sends one paper per request (default: 0)')
+    parser.add_argument('--pack-max-papers', type=int, default=4,
+                      help='Maximum number of papers per request with --pack-tokens (default: 4)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                      help='Analyze PDFs on an asyncio event loop with the providers\' async clients')
+    parser.add_argument('--max-in-flight', type=int, default=64,
+                      help='Maximum number of concurrent provider requests with --async (default: 64)')
+    parser.add_argument('--synthesis-group-tokens', type=int, default=24000,
+                      help='Prompt tokens of summaries per synthesis request; larger corpora are synthesized in levels (default: 24000)')
+    parser.add_argument('--startup-profile', action='store_true',
+                      help='Print the import time of each module loaded at startup and of the provider SDKs')
+    parser.add_argument('--stream', action='store_true',
+                      help='Stream the literature review into the output file as it is generated')
+    parser.add_argument('--adaptive-routing', action='store_true',
+                      help='Reorder providers within each configured tier by their measured latency and success rate')
+    parser.add_argument('--hedge', action='store_true',
+                      help='Send requests slower than the hedge percentile to the next provider as well')
+    parser.add_argument('--hedge-percentile', type=float, default=95,
+                      help='Percentile of recent latency after which a request is hedged (default: 95)')
+    parser.add_argument('--hedge-budget', type=float, default=0.1,
+                      help='Maximum fraction of requests that may be hedged, at most 1.0 (default: 0.1)')
+    parser.add_argument('--max-attempts', type=int, default=3,
+                      help='Attempts per paper analysis or synthesis, the first try included (default: 3)')
+    parser.add_argument('--request-deadline', type=float, default=300,
+                      help='Seconds a paper analysis may take across all its attempts, 0 for none (default: 300)')
+    parser.add_argument('--synthesis-deadline', type=float, default=1800,
+                      help='Seconds the literature review may take across all its attempts, 0 for none (default: 1800)')
+    parser.add_argument('--retry-budget', type=float, default=0.2,
+                      help='Retries allowed per request for the whole run, on top of 10 (default: 0.2)')
+    parser.add_argument('--no-adaptive-max-tokens', action='store_true',
+                      help='Always request the full output budget instead of sizing max_tokens from observed output lengths')
+    parser.add_argument('--max-tokens-headroom', type=float, default=1.3,
+                      help='Multiplier applied to the p95 of observed output lengths when sizing max_tokens (default: 1.3)')
+    parser.add_argument('--circuit-failure-threshold', type=int, default=3,
+                      help='Consecutive failures after which a provider is skipped (default: 3)')
+    parser.add_argument('--circuit-cooldown', type=float, default=60,
+                      help='Seconds before a skipped provider is probed again (default: 60)')
+    parser.add_argument('--persist-provider-health', action='store_true',
+                      help='Remember providers that are down across runs (.cache/provider_health.json)')
+    parser.add_argument('--no-response-cache', action='store_true',
+                      help='Always call the providers instead of reusing cached responses')
+    parser.add_argument('--response-cache-path', type=str, default=None,
+                      help='SQLite file for cached provider responses (default: .cache/responses.sqlite3 next to main.py)')
+    parser.add_argument('--response-cache-ttl', type=float, default=168,
+                      help='Hours a cached provider response stays valid (default: 168)')
+    parser.add_argument('--response-cache-size', type=int, default=256,
+                      help='Maximum size of cached provider responses in MB (default: 256)')
+    parser.add_argument('--extraction-cache-dir', type=str, default=None,
+                      help='Directory for the extracted text cache (default: .cache/extraction next to main.py)')
+    parser.add_argument('--extraction-cache-size', type=int, default=512,
+                      help='Maximum size of the extracted text cache in MB (default: 512)')
+    parser.add_argument('--no-extraction-cache', action='store_true',
+                      help='Always re-extract PDF text instead of using the cache')
+    parser.add_argument('--full-extraction', action='store_true',
+                      help='Extract every page instead of stopping once the analysis text budget is covered')
+    parser.add_argument('--select-sections', action='store_true',
+                      help='Send the abstract, methods, results, discussion and conclusions within a token budget '
+                           'instead of the first characters of each paper')
+    parser.add_argument('--section-token-budget', type=int, default=1200,
+                      help='Token budget per paper when --select-sections is used (default: 1200)')
+    parser.add_argument('--pdf-backend', type=str, default='auto', choices=['auto'] + list(BACKENDS),
+                      help='PDF text extraction backend; "auto" picks the fastest installed one '
+                           'according to the last "python pdf_backends.py" benchmark (default: auto)')
+    parser.add_argument('--extract-workers', type=int, default=os.cpu_count() or 1,
+                      help='Number of processes extracting PDF text (default: number of CPUs)')
+    parser.add_argument('--extract-timeout', type=float, default=120,
+                      help='Seconds before extracting one PDF is abandoned and its worker killed; 0 disables (default: 120)')
+    parser.add_argument('--extract-memory-limit', type=int, default=None,
+                      help='Memory limit in MB for each extraction process (default: no limit)')
+    parser.add_argument('--analysis-workers', type=int, default=4,
+                      help='Number of threads sending papers to the AI providers (default: 4)')
+    parser.add_argument('--pipeline-queue-size', type=int, default=None,
+                      help='Extracted papers allowed to wait for analysis (default: 2 x analysis workers, or --max-in-flight with --async)')
     return parser.parse_args()
 
+def warm_up_providers(custom_provider_order: Optional[List[str]], asynchronous: bool) -> List[str]:
+    """
+    Start importing SDKs and building clients for the configured providers that have API keys.
+    
+    Only those providers' SDKs are loaded, in a background thread, so PDF
+    discovery and extraction run meanwhile and the first analysis call does
+    not pay for the imports.
+    
+    Returns:
+        Names of the providers being warmed up, in the order they will be tried
+    """
+    resolved = get_provider_registry("providers_config.json", PROVIDER_CALL_FUNCTIONS).resolve(custom_provider_order)
+    providers = [(spec.name, os.environ[spec.api_key_env], spec.default_model) for spec, _ in resolved.available]
+    if providers:
+        client_registry.warm_up(providers, asynchronous=asynchronous)
+    return [name for name, _, _ in providers]
+
+def print_startup_profile(providers: List[str]) -> None:
+    """Print the import cost of main.py's modules and of the given providers' SDKs."""
+    modules = ["main"]
+    for provider in providers:
+        modules += [module for module in PROVIDER_MODULES.get(provider, ()) if module not in modules]
+    costs = measure_import_costs(modules, os.path.dirname(os.path.abspath(__file__)))
+    print(format_startup_profile(costs, modules[0]))
+
 def main():
     try:
         # Load environment variables from .env file
         load_dotenv()
         
         args = parse_args()
+        
+        # Size provider connection pools to the number of concurrent analysis calls
+        client_registry.configure(
+            max_connections=args.max_in_flight if args.use_async else args.analysis_workers,
+            gemini_models_ttl=args.gemini_models_ttl * 3600,
+            gemini_models_cache_path=os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), '.cache', 'gemini_models.json')
+        )
+        # Load the providers' SDKs while the PDFs are found and extracted
+        warmed_up = warm_up_providers(args.custom_provider_order or None, args.use_async)
+        if args.startup_profile:
+            print_startup_profile(warmed_up)
+        
+        from tqdm import tqdm
         pdf_folder = find_pdf_folder()
-        pdf_files = [f for f in os.listdir(pdf_folder) if f.endswith('.pdf')]
+        pdf_paths = discover_pdfs(pdf_folder, recursive=not args.no_recursive)
         
-        if not pdf_files:
+        if not pdf_paths:
             logger.error("No PDF files found in the PDF folder. Exiting.")
             return
         
+        # Track processed PDFs so unchanged ones can reuse their stored summaries
+        manifest = CorpusManifest(args.manifest or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '.cache', 'manifest.json'))
+        manifest.prune(pdf_paths)
+        
         # Limit the number of files to process if specified
         if args.files_to_process is not None and args.files_to_process > 0:
-            pdf_files = pdf_files[:args.files_to_process]
+            pdf_paths = pdf_paths[:args.files_to_process]
             logger.info(f"Processing {args.files_to_process} PDF files.")
         
+        summaries = []
+        if args.incremental:
+            unchanged, pdf_paths = manifest.classify(pdf_paths)
+            for file_path, summary_id in unchanged.items():
+                try:
+                    summaries.append(PaperSummary.model_validate(manifest.load_summary(summary_id)))
+                except Exception as e:
+                    logger.warning(f"Stored summary for {os.path.basename(file_path)} is unusable, re-analyzing: {str(e)}")
+                    pdf_paths.append(file_path)
+            logger.info(f"Incremental mode: reusing {len(summaries)} stored summaries, "
+                        f"analyzing {len(pdf_paths)} new or changed PDFs")
+        
         # Configure custom provider order if specified
         custom_provider_order = args.custom_provider_order if args.custom_provider_order else None
         if custom_provider_order:
@@ -790,36 +2746,245 @@ def main():
         else:
             logger.info(f"Saving reviews to existing directory: {reviews_dir}")
         
-        summaries = []
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(process_pdf, os.path.join(pdf_folder, pdf), args.individual_summary_length) 
-                      for pdf in pdf_files]
-            for future in tqdm(as_completed(futures), total=len(pdf_files), desc="Analyzing PDFs"):
+        # Set up the extracted text cache unless disabled
+        extraction_cache = None
+        if not args.no_extraction_cache:
+            cache_dir = args.extraction_cache_dir or os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), '.cache', 'extraction')
+            extraction_cache = ExtractionCache(cache_dir, max_bytes=args.extraction_cache_size * 1024 * 1024)
+        
+        provider_router.configure(enabled=args.adaptive_routing)
+        request_hedging.configure(enabled=args.hedge, hedge_percentile=args.hedge_percentile, budget=args.hedge_budget)
+        request_retries.configure(
+            max_attempts=args.max_attempts,
+            deadline=args.request_deadline,
+            stage_deadlines={"synthesis": args.synthesis_deadline},
+            retry_ratio=args.retry_budget
+        )
+        output_budgets.configure(enabled=not args.no_adaptive_max_tokens, headroom=args.max_tokens_headroom)
+        
+        # Skip providers that keep failing until their cool-down has passed
+        provider_health.configure(
+            failure_threshold=args.circuit_failure_threshold,
+            cooldown=args.circuit_cooldown,
+            state_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'provider_health.json')
+            if args.persist_provider_health else None
+        )
+        
+        # Reuse provider responses from earlier runs unless disabled
+        response_cache = None
+        if not args.no_response_cache:
+            response_cache = ResponseCache(
+                args.response_cache_path or os.path.join(
+                    os.path.dirname(os.path.abspath(__file__)), '.cache', 'responses.sqlite3'),
+                ttl=args.response_cache_ttl * 3600,
+                max_bytes=args.response_cache_size * 1024 * 1024
+            )
+        set_response_cache(response_cache)
+        
+        pdf_backend = select_backend(args.pdf_backend)
+        section_stats = SectionSelectionStats() if args.select_sections else None
+        
+        def prepare_analysis(extracted: Dict[str, Any]) -> int:
+            """Record the extraction stats of one PDF and return the text limit to analyze with."""
+            if extraction_cache is not None:
+                extraction_cache.merge_stats(extracted["cache_stats"])
+            text_limit = args.individual_summary_length
+            if args.individual_summary_tokens:
+                # Already trimmed to the token budget by the extraction worker
+                text_limit = len(extracted["text"])
+            selection = extracted["section_selection"]
+            if selection is not None:
+                head_tokens = min(selection["original_tokens"],
+                                  args.individual_summary_tokens or args.individual_summary_length // CHARS_PER_TOKEN)
+                section_stats.record(selection, head_tokens)
+                # The selected sections already fit the budget; don't cut them again
+                text_limit = len(extracted["text"])
+            return text_limit
+        
+        def analyze_extracted(file_path: str, extracted: Dict[str, Any]) -> PaperSummary:
+            text_limit = prepare_analysis(extracted)
+            summary = analyze_pdf(extracted["text"], os.path.basename(file_path), text_limit)
+            manifest.record(file_path, summary.model_dump(), extracted["content_hash"])
+            return summary
+        
+        async def analyze_extracted_async(file_path: str, extracted: Dict[str, Any]) -> PaperSummary:
+            text_limit = prepare_analysis(extracted)
+            summary = await analyze_pdf_async(extracted["text"], os.path.basename(file_path), text_limit)
+            manifest.record(file_path, summary.model_dump(), extracted["content_hash"])
+            return summary
+        
+        pipeline_options = dict(
+            extract_fn=partial(
+                extract_pdf_worker,
+                cache=extraction_cache,
+                char_budget=None if args.full_extraction or args.individual_summary_tokens
+                else args.individual_summary_length,
+                section_token_budget=args.section_token_budget if args.select_sections else None,
+                backend=pdf_backend,
+                token_budget=None if args.full_extraction else args.individual_summary_tokens,
+                token_limit=args.individual_summary_tokens
+            ),
+            extract_workers=args.extract_workers,
+            queue_size=args.pipeline_queue_size,
+            extract_timeout=args.extract_timeout or None,
+            extract_memory_limit_mb=args.extract_memory_limit
+        )
+        
+        # Batches and packed requests need the text of several papers at once, so extract everything first
+        extract_first = args.batch or args.pack_tokens > 0
+        if args.batch and args.pack_tokens > 0:
+            logger.warning("--pack-tokens is ignored with --batch")
+        
+        with tqdm(total=len(pdf_paths), desc="Extracting PDFs" if extract_first else "Analyzing PDFs") as progress:
+            if extract_first:
+                # Only extract here; the papers are analyzed together below
+                extracted_papers, failures = run_pipeline(
+                    pdf_paths,
+                    analyze_fn=lambda file_path, extracted: (extracted["text"], prepare_analysis(extracted),
+                                                             extracted["content_hash"]),
+                    analyze_workers=args.analysis_workers,
+                    progress=progress,
+                    **pipeline_options
+                )
+            elif args.use_async:
+                # Extract in a process pool and analyze on an event loop, bounded only by max_in_flight
+                async def run_async_pipeline():
+                    try:
+                        return await run_pipeline_async(
+                            pdf_paths,
+                            analyze_fn=analyze_extracted_async,
+                            max_in_flight=args.max_in_flight,
+                            progress=progress,
+                            **pipeline_options
+                        )
+                    finally:
+                        await client_registry.aclose()
+                results, failures = asyncio.run(run_async_pipeline())
+            else:
+                # Extract in a process pool and analyze in a thread pool, overlapping the two stages
+                results, failures = run_pipeline(
+                    pdf_paths,
+                    analyze_fn=analyze_extracted,
+                    analyze_workers=args.analysis_workers,
+                    progress=progress,
+                    **pipeline_options
+                )
+        if extract_first:
+            results = []
+            papers = [(file_path, text, text_limit) for file_path, (text, text_limit, _) in extracted_papers]
+            content_hashes = {file_path: content_hash for file_path, (_, _, content_hash) in extracted_papers}
+            if args.batch:
                 try:
-                    summary = future.result()
-                    summaries.append(summary)
+                    grouped_summaries, grouped_failures = analyze_batch(
+                        papers,
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'batches',
+                                     f'analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.jsonl'),
+                        custom_provider_order,
+                        base_url=args.batch_base_url,
+                        poll_interval=args.batch_poll_interval,
+                        timeout=args.batch_timeout * 3600
+                    )
                 except Exception as e:
-                    logger.error(f"Error processing PDF: {str(e)}")
+                    logger.error(f"Batch analysis failed: {str(e)}")
+                    grouped_summaries, grouped_failures = {}, {file_path: str(e) for file_path, _, _ in papers}
+            else:
+                with tqdm(total=len(papers), desc="Analyzing PDFs") as progress:
+                    grouped_summaries, grouped_failures = analyze_packed(
+                        papers,
+                        args.pack_tokens,
+                        args.pack_max_papers,
+                        workers=args.analysis_workers,
+                        custom_provider_order=custom_provider_order,
+                        progress=progress
+                    )
+            for file_path, summary in grouped_summaries.items():
+                manifest.record(file_path, summary.model_dump(), content_hashes[file_path])
+                results.append((file_path, summary))
+            
+            # Analyze whatever the batch or the packed requests could not handle one paper at a time
+            retry_papers = [paper for paper in papers if paper[0] in grouped_failures]
+            if retry_papers:
+                logger.warning(f"Analyzing {len(retry_papers)} papers one at a time "
+                               f"(e.g. {os.path.basename(retry_papers[0][0])}: {grouped_failures[retry_papers[0][0]]})")
+                
+                def analyze_paper(paper: Any) -> PaperSummary:
+                    file_path, text, text_limit = paper
+                    summary = analyze_pdf(text, os.path.basename(file_path), text_limit)
+                    manifest.record(file_path, summary.model_dump(), content_hashes[file_path])
+                    return summary
+                
+                with ThreadPoolExecutor(max_workers=args.analysis_workers) as executor:
+                    futures = {executor.submit(analyze_paper, paper): paper[0] for paper in retry_papers}
+                    for future in tqdm(futures, desc="Analyzing PDFs"):
+                        try:
+                            results.append((futures[future], future.result()))
+                        except Exception as e:
+                            failures[futures[future]] = f"analysis failed: {str(e)}"
+        
+        manifest.save()
+        summaries.extend(summary for _, summary in results)
+        for file_path, reason in failures.items():
+            logger.error(f"Error processing PDF {os.path.basename(file_path)}: {reason}")
+        if failures:
+            logger.warning(f"{len(failures)} of {len(pdf_paths)} PDFs failed")
+
+        if extraction_cache is not None:
+            cache_stats = extraction_cache.stats()
+            logger.info(f"Extraction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                        f"{cache_stats['evictions']} evictions")
+
+        if section_stats is not None:
+            logger.info(section_stats.summary())
 
         if not summaries:
             logger.error("No papers were successfully processed. Exiting.")
             return
 
-        logger.info("Synthesizing literature review...")
-        literature_review = synthesize_reviews(summaries, args.final_review_length)
-        
-        paper_list = create_paper_list(summaries)
-        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_filename = f'literature_review_{timestamp}.md'
         output_path = os.path.join(reviews_dir, output_filename)
         
-        with open(output_path, 'w') as f:
-            f.write(literature_review)
-            f.write("\n\n")
-            f.write(paper_list)
+        # The review and the paper list share one set of citations
+        citations = assign_citations(summaries)
+        paper_list = create_paper_list(summaries, citations)
+        
+        logger.info("Synthesizing literature review...")
+        if args.stream:
+            # Append the review to the output file as it is generated
+            stream = ReviewStreamWriter(output_path, synthesis_max_tokens(args.final_review_length))
+            try:
+                synthesize_reviews(summaries, args.final_review_length, stream=stream,
+                                   group_tokens=args.synthesis_group_tokens, workers=args.analysis_workers,
+                                   citations=citations)
+            finally:
+                stream.close()
+            with open(output_path, 'a') as f:
+                f.write("\n\n")
+                f.write(paper_list)
+        else:
+            literature_review = synthesize_reviews(summaries, args.final_review_length,
+                                                   group_tokens=args.synthesis_group_tokens, workers=args.analysis_workers,
+                                                   citations=citations)
+            
+            with open(output_path, 'w') as f:
+                f.write(literature_review)
+                f.write("\n\n")
+                f.write(paper_list)
         
         logger.info(f"Literature review completed and saved as {output_path}")
+        logger.info(client_registry.summary())
+        logger.info(rate_limiters.summary())
+        logger.info(provider_health.summary())
+        logger.info(request_retries.summary())
+        logger.info(json_repairs.summary())
+        logger.info(output_budgets.summary())
+        if args.adaptive_routing:
+            logger.info(provider_router.summary())
+        if args.hedge:
+            logger.info(request_hedging.summary())
+        if response_cache is not None:
+            logger.info(response_cache.summary())
     
     except FileNotFoundError as e:
         logger.error(str(e))
@@ -0,0 +1,144 @@
+import math
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+from hedging import percentile
+
+logger = logging.getLogger(__name__)
+
+# Output tokens observed per stage and provider before the cap is derived from them
+MIN_SAMPLES = 5
+
+# Number of recent output lengths the cap is computed from
+WINDOW_SIZE = 100
+
+# Percentile of recent output lengths the cap must cover
+DEFAULT_OUTPUT_PERCENTILE = 95.0
+
+# Multiplier applied to that percentile, so ordinary variation does not hit the cap
+DEFAULT_HEADROOM = 1.3
+
+# Smallest cap ever requested, whatever the history says
+MIN_OUTPUT_TOKENS = 256
+
+class OutputBudget:
+    """
+    Sizes max_tokens for each request from the output lengths actually observed.
+
+    Every request belongs to a stage (such as "analysis" or "synthesis")
+    with a ceiling derived from the length asked for. Until MIN_SAMPLES
+    responses of a stage have come from a provider, the ceiling is used;
+    after that the cap is the configured percentile of that provider's recent
+    output lengths times the headroom, never above the ceiling. A response
+    that reaches the cap is continued rather than retried, and its full
+    length is recorded, so the cap grows back when outputs get longer.
+
+    Smaller caps reserve less of a provider's tokens-per-minute budget and
+    keep requests within small context windows.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        output_percentile: float = DEFAULT_OUTPUT_PERCENTILE,
+        headroom: float = DEFAULT_HEADROOM
+    ):
+        self.enabled = enabled
+        self.output_percentile = output_percentile
+        self.headroom = headroom
+        self._history: Dict[Tuple[str, str], deque] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        output_percentile: Optional[float] = None,
+        headroom: Optional[float] = None
+    ) -> None:
+        """
+        Turn adaptive sizing on or off and set how much room the cap leaves.
+
+        Args:
+            enabled: Whether caps are derived from observed output lengths (the ceiling is used otherwise)
+            output_percentile: Percentile of recent output lengths the cap must cover
+            headroom: Multiplier applied to that percentile (at least 1)
+        """
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if output_percentile is not None:
+                self.output_percentile = min(max(output_percentile, 1.0), 100.0)
+            if headroom is not None:
+                self.headroom = max(1.0, headroom)
+
+    def _stage_counts(self, stage: str) -> Dict[str, int]:
+        return self._counts.setdefault(stage, {"requests": 0, "truncations": 0, "reserved": 0, "ceiling": 0})
+
+    def cap(self, stage: Optional[str], provider: str, ceiling: int) -> int:
+        """
+        Return the max_tokens to request from a provider for one request of a stage.
+
+        Args:
+            stage: The request's stage, or None for a request that is not sized adaptively
+            provider: Name of the provider the request goes to
+            ceiling: Largest number of output tokens the request may need
+        """
+        if stage is None or not self.enabled:
+            return ceiling
+        with self._lock:
+            samples = list(self._history.get((stage, provider), ()))
+        if len(samples) < MIN_SAMPLES:
+            return ceiling
+        observed = percentile(samples, self.output_percentile)
+        return min(ceiling, max(MIN_OUTPUT_TOKENS, math.ceil(observed * self.headroom)))
+
+    def record(self, stage: Optional[str], provider: str, output_tokens: int, cap: int, ceiling: int,
+               truncated: bool = False) -> None:
+        """
+        Record the output of one finished request.
+
+        Args:
+            stage: The request's stage (nothing is recorded for None)
+            provider: Name of the provider that answered
+            output_tokens: Tokens in the whole response, continuations included
+            cap: max_tokens of the first call
+            ceiling: max_tokens the request would have reserved without adaptive sizing
+            truncated: Whether the first call stopped at its cap and had to be continued
+        """
+        if stage is None:
+            return
+        with self._lock:
+            self._history.setdefault((stage, provider), deque(maxlen=WINDOW_SIZE)).append(output_tokens)
+            counts = self._stage_counts(stage)
+            counts["requests"] += 1
+            counts["reserved"] += cap
+            counts["ceiling"] += ceiling
+            if truncated:
+                counts["truncations"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per stage the requests, truncations, reserved output tokens and current caps per provider."""
+        with self._lock:
+            stats = {stage: dict(counts) for stage, counts in self._counts.items()}
+            history = {key: list(samples) for key, samples in self._history.items()}
+        for (stage, provider), samples in history.items():
+            stats[stage].setdefault("p95_output_tokens", {})[provider] = percentile(samples, 95)
+        return stats
+
+    def summary(self) -> str:
+        """Return a one-line report of output sizing and truncations."""
+        stats = self.stats()
+        if not stats:
+            return "Output budget: no requests sized"
+        parts = []
+        for stage, counts in sorted(stats.items()):
+            saved = counts["ceiling"] - counts["reserved"]
+            parts.append(f"{stage} {counts['requests']} requests, {counts['truncations']} continued after hitting "
+                         f"max_tokens, {saved} output tokens less reserved than the fixed caps")
+        return "Output budget: " + "; ".join(parts)
+
+# Shared by every provider call in the process
+output_budgets = OutputBudget()
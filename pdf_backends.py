@@ -0,0 +1,299 @@
+import os
+import io
+import json
+import mmap
+import time
+import logging
+import argparse
+import importlib
+import importlib.util
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Backend used when nothing faster is installed
+DEFAULT_BACKEND = "pypdf2"
+
+# Order in which installed backends are preferred when no benchmark results exist
+BACKEND_PREFERENCE = ["pypdf2", "pypdfium2", "pdfminer"]
+
+# Where benchmark results are stored, relative to this file
+DEFAULT_BENCHMARK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'backend_benchmark.json')
+
+class MappedFile(mmap.mmap):
+    """Read-only memory map with the file-object methods PDF libraries expect."""
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        # mmap.seek returns None, file objects return the new position
+        super().seek(offset, whence)
+        return self.tell()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+@contextmanager
+def open_mapped(pdf_path: str) -> Iterator[Any]:
+    """
+    Open a PDF as a read-only memory map.
+
+    Empty files cannot be mapped and are returned as an empty in-memory stream,
+    which the backends then reject with their usual errors.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Yields:
+        A seekable, readable file-like view of the PDF
+    """
+    with open(pdf_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield io.BytesIO(b"")
+            return
+        mapping = MappedFile(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapping
+        finally:
+            mapping.close()
+
+class ExtractionBackend(ABC):
+    """Base class for PDF text extraction backends."""
+
+    # Short identifier used on the command line and in cache keys
+    name = ""
+    # Importable module providing the backend
+    module = ""
+    # Distribution name used to look up the installed version
+    distribution = ""
+
+    def is_available(self) -> bool:
+        """Return True if the backend's library is installed."""
+        return importlib.util.find_spec(self.module) is not None
+
+    def version(self) -> str:
+        """Return the installed version of the backend's library."""
+        try:
+            from importlib.metadata import version
+            return version(self.distribution)
+        except Exception:
+            return "unknown"
+
+    @abstractmethod
+    def iter_page_texts(self, stream: Any) -> Iterator[str]:
+        """
+        Yield the raw text of each page, decoding pages only as they are requested.
+
+        Args:
+            stream: Seekable file-like view of the PDF (usually a memory map)
+
+        Yields:
+            The extracted text of each page
+        """
+
+class PyPDF2Backend(ExtractionBackend):
+    name = "pypdf2"
+    module = "PyPDF2"
+    distribution = "PyPDF2"
+
+    def iter_page_texts(self, stream: Any) -> Iterator[str]:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(stream)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+class PdfiumBackend(ExtractionBackend):
+    name = "pypdfium2"
+    module = "pypdfium2"
+    distribution = "pypdfium2"
+
+    def iter_page_texts(self, stream: Any) -> Iterator[str]:
+        import pypdfium2
+        document = pypdfium2.PdfDocument(stream)
+        try:
+            for index in range(len(document)):
+                page = document[index]
+                text_page = page.get_textpage()
+                try:
+                    yield text_page.get_text_range()
+                finally:
+                    text_page.close()
+                    page.close()
+        finally:
+            document.close()
+
+class PdfminerBackend(ExtractionBackend):
+    name = "pdfminer"
+    module = "pdfminer"
+    distribution = "pdfminer.six"
+
+    def iter_page_texts(self, stream: Any) -> Iterator[str]:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        resources = PDFResourceManager()
+        output = io.StringIO()
+        device = TextConverter(resources, output, laparams=LAParams())
+        interpreter = PDFPageInterpreter(resources, device)
+        try:
+            for page in PDFPage.get_pages(stream):
+                interpreter.process_page(page)
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+        finally:
+            device.close()
+
+BACKENDS = {backend.name: backend for backend in (PyPDF2Backend(), PdfiumBackend(), PdfminerBackend())}
+
+def get_backend(name: Optional[str] = None) -> ExtractionBackend:
+    """
+    Look up an installed extraction backend by name.
+
+    Args:
+        name: Backend name (default: DEFAULT_BACKEND)
+
+    Returns:
+        The backend instance
+    """
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    backend = BACKENDS[name]
+    if not backend.is_available():
+        raise ImportError(f"PDF backend '{name}' is not installed. Install using: pip install {backend.distribution}")
+    return backend
+
+def available_backends() -> List[str]:
+    """Return the names of all installed backends."""
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+def load_benchmark_results(benchmark_path: str = DEFAULT_BENCHMARK_PATH) -> Dict[str, Dict[str, Any]]:
+    """Load stored benchmark results, returning an empty dict if there are none."""
+    try:
+        with open(benchmark_path, 'r') as f:
+            return json.load(f).get("backends", {})
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.debug(f"No PDF backend benchmark results loaded: {str(e)}")
+        return {}
+
+def select_backend(preferred: str = "auto", benchmark_path: str = DEFAULT_BENCHMARK_PATH) -> str:
+    """
+    Choose the extraction backend to use.
+
+    With "auto", the installed backend with the highest benchmarked throughput
+    among those that extracted every benchmark file without errors is
+    chosen; without such results, the first installed backend in
+    BACKEND_PREFERENCE (PyPDF2 first) is used.
+
+    Args:
+        preferred: A backend name, or "auto"
+        benchmark_path: Path to stored benchmark results
+
+    Returns:
+        The name of the selected backend
+    """
+    if preferred != "auto":
+        return get_backend(preferred).name
+
+    installed = available_backends()
+    results = load_benchmark_results(benchmark_path)
+    # A backend that failed on some benchmark files is not trusted, however fast it was
+    measured = [name for name in installed
+                if results.get(name, {}).get("pages_per_second") and not results[name].get("errors")]
+    if measured:
+        fastest = max(measured, key=lambda name: results[name]["pages_per_second"])
+        logger.info(f"Using PDF backend {fastest} ({results[fastest]['pages_per_second']:.1f} pages/s in benchmark)")
+        return fastest
+
+    for name in BACKEND_PREFERENCE:
+        if name in installed:
+            logger.info(f"Using PDF backend {name} (no benchmark results, run: python pdf_backends.py)")
+            return name
+    return DEFAULT_BACKEND
+
+def benchmark_backends(
+    pdf_folder: str,
+    backends: Optional[List[str]] = None,
+    max_files: Optional[int] = None,
+    benchmark_path: Optional[str] = DEFAULT_BENCHMARK_PATH
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Measure the extraction throughput of each installed backend on a folder of PDFs.
+
+    Args:
+        pdf_folder: Folder containing the PDFs to extract
+        backends: Names of the backends to benchmark (default: all installed)
+        max_files: Limit on the number of PDFs used
+        benchmark_path: Where to store the results (None to skip saving)
+
+    Returns:
+        Dict of backend name to its pages, bytes, errors, elapsed seconds and throughput
+    """
+    pdf_files = sorted(os.path.join(pdf_folder, f) for f in os.listdir(pdf_folder) if f.lower().endswith('.pdf'))
+    if max_files:
+        pdf_files = pdf_files[:max_files]
+
+    results = {}
+    for name in backends or available_backends():
+        backend = get_backend(name)
+        pages = 0
+        total_bytes = 0
+        errors = 0
+        start = time.perf_counter()
+        for pdf_path in pdf_files:
+            try:
+                with open_mapped(pdf_path) as stream:
+                    for _ in backend.iter_page_texts(stream):
+                        pages += 1
+                total_bytes += os.path.getsize(pdf_path)
+            except Exception as e:
+                errors += 1
+                logger.warning(f"{name} failed on {os.path.basename(pdf_path)}: {str(e)}")
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "version": backend.version(),
+            "files": len(pdf_files),
+            "errors": errors,
+            "pages": pages,
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(pages / elapsed, 2) if elapsed > 0 else 0.0,
+            "mb_per_second": round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        logger.info(f"{name}: {pages} pages in {elapsed:.2f}s ({results[name]['pages_per_second']} pages/s, {errors} errors)")
+
+    if benchmark_path:
+        os.makedirs(os.path.dirname(benchmark_path), exist_ok=True)
+        with open(benchmark_path, 'w') as f:
+            json.dump({"pdf_folder": pdf_folder, "timestamp": time.time(), "backends": results}, f, indent=2)
+        logger.info(f"Benchmark results saved to {benchmark_path}")
+    return results
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Benchmark the installed PDF text extraction backends.')
+    parser.add_argument('--pdf-folder', type=str,
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PDF'),
+                        help='Folder of PDFs to benchmark against (default: PDF next to this script)')
+    parser.add_argument('--backends', type=str, nargs='+', default=None,
+                        help=f'Backends to benchmark (default: all installed of {", ".join(BACKENDS)})')
+    parser.add_argument('--max-files', type=int, default=None,
+                        help='Limit the number of PDFs used (default: all)')
+    parser.add_argument('--output', type=str, default=DEFAULT_BENCHMARK_PATH,
+                        help='Where to store the results (default: .cache/backend_benchmark.json)')
+    args = parser.parse_args()
+
+    benchmark = benchmark_backends(args.pdf_folder, args.backends, args.max_files, args.output)
+    print(f"{'backend':<12}{'pages/s':>10}{'MB/s':>8}{'errors':>8}")
+    for backend_name, result in sorted(benchmark.items(), key=lambda item: -item[1]["pages_per_second"]):
+        print(f"{backend_name:<12}{result['pages_per_second']:>10}{result['mb_per_second']:>8}{result['errors']:>8}")
@@ -0,0 +1,210 @@
+import os
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from extraction_watchdog import WatchdogPool
+
+logger = logging.getLogger(__name__)
+
+# Marker telling an analysis worker that the extraction stage has finished
+_STAGE_DONE = object()
+
+def run_pipeline(
+    items: Iterable[Any],
+    extract_fn: Callable[[Any], Any],
+    analyze_fn: Callable[[Any, Any], Any],
+    extract_workers: Optional[int] = None,
+    analyze_workers: int = 4,
+    queue_size: Optional[int] = None,
+    progress: Any = None,
+    extract_timeout: Optional[float] = None,
+    extract_memory_limit_mb: Optional[int] = None
+) -> Tuple[List[Tuple[Any, Any]], Dict[Any, str]]:
+    """
+    Run items through a two-stage extraction/analysis pipeline.
+
+    The CPU-bound extraction stage runs in a process pool and hands its
+    output to the I/O-bound analysis stage through a bounded queue, so
+    analysis starts as soon as the first item is extracted and extraction
+    pauses when analysis falls behind.
+
+    When a timeout or memory limit is given, extraction runs in a WatchdogPool
+    so a stuck or runaway item is killed and recorded as failed without
+    holding up the rest of the batch.
+
+    Args:
+        items: The items to process (e.g. PDF paths)
+        extract_fn: Picklable function run in a worker process for each item
+        analyze_fn: Function run in a worker thread with (item, extract_fn result)
+        extract_workers: Number of extraction processes (default: CPU count)
+        analyze_workers: Number of analysis threads
+        queue_size: Capacity of the queue between the stages (default: 2 x analyze_workers)
+        progress: Optional progress bar updated once per finished item
+        extract_timeout: Wall-clock limit in seconds for extracting one item
+        extract_memory_limit_mb: Memory limit in MB for each extraction process
+
+    Returns:
+        Tuple of (list of (item, analysis result), dict of item to failure reason)
+    """
+    extract_workers = extract_workers or os.cpu_count() or 1
+    queue_size = queue_size or analyze_workers * 2
+    handoff = queue.Queue(maxsize=queue_size)
+    results = []
+    failures = {}
+    lock = threading.Lock()
+
+    def finish(item: Any, result: Any = None, error: Optional[str] = None) -> None:
+        with lock:
+            if error is None:
+                results.append((item, result))
+            else:
+                failures[item] = error
+            if progress is not None:
+                progress.update(1)
+
+    def extraction_stage() -> None:
+        remaining = iter(items)
+        pending = {}
+        try:
+            if extract_timeout or extract_memory_limit_mb:
+                executor = WatchdogPool(extract_workers, timeout=extract_timeout,
+                                        memory_limit_mb=extract_memory_limit_mb)
+            else:
+                executor = ProcessPoolExecutor(max_workers=extract_workers)
+            with executor as pool:
+                # Keep every process busy without queueing the whole corpus up front
+                max_in_flight = extract_workers * 2
+
+                def refill() -> None:
+                    while len(pending) < max_in_flight:
+                        item = next(remaining, _STAGE_DONE)
+                        if item is _STAGE_DONE:
+                            return
+                        pending[pool.submit(extract_fn, item)] = item
+
+                refill()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = pending.pop(future)
+                        try:
+                            payload = future.result()
+                        except Exception as e:
+                            logger.error(f"Extraction failed for {item}: {str(e)}")
+                            finish(item, error=f"extraction failed: {str(e)}")
+                            continue
+                        # Blocks while the analysis stage is behind
+                        handoff.put((item, payload))
+                    refill()
+        except Exception as e:
+            logger.error(f"Extraction stage aborted: {str(e)}")
+            for item in list(pending.values()) + list(remaining):
+                finish(item, error=f"extraction stage aborted: {str(e)}")
+        finally:
+            for _ in range(analyze_workers):
+                handoff.put(_STAGE_DONE)
+
+    def analysis_worker() -> None:
+        while True:
+            entry = handoff.get()
+            if entry is _STAGE_DONE:
+                return
+            item, payload = entry
+            try:
+                result = analyze_fn(item, payload)
+            except Exception as e:
+                logger.error(f"Analysis failed for {item}: {str(e)}")
+                finish(item, error=f"analysis failed: {str(e)}")
+            else:
+                finish(item, result)
+
+    producer = threading.Thread(target=extraction_stage, name="pipeline-extraction", daemon=True)
+    producer.start()
+    with ThreadPoolExecutor(max_workers=analyze_workers, thread_name_prefix="pipeline-analysis") as executor:
+        workers = [executor.submit(analysis_worker) for _ in range(analyze_workers)]
+        for worker in workers:
+            worker.result()
+    producer.join()
+
+    return results, failures
+
+async def run_pipeline_async(
+    items: Iterable[Any],
+    extract_fn: Callable[[Any], Any],
+    analyze_fn: Callable[[Any, Any], Awaitable[Any]],
+    extract_workers: Optional[int] = None,
+    max_in_flight: int = 64,
+    queue_size: Optional[int] = None,
+    progress: Any = None,
+    extract_timeout: Optional[float] = None,
+    extract_memory_limit_mb: Optional[int] = None
+) -> Tuple[List[Tuple[Any, Any]], Dict[Any, str]]:
+    """
+    Run items through the extraction/analysis pipeline on an asyncio event loop.
+
+    Extraction runs in a process pool as in run_pipeline, while analysis is a
+    coroutine, so the number of concurrent provider requests is limited only
+    by max_in_flight rather than by a thread count. At most max_in_flight +
+    queue_size items are extracted but not yet analyzed at any time.
+
+    Args:
+        items: The items to process (e.g. PDF paths)
+        extract_fn: Picklable function run in a worker process for each item
+        analyze_fn: Coroutine function awaited with (item, extract_fn result)
+        extract_workers: Number of extraction processes (default: CPU count)
+        max_in_flight: Maximum number of concurrent analysis coroutines
+        queue_size: Number of extracted items allowed to wait for analysis (default: max_in_flight)
+        progress: Optional progress bar updated once per finished item
+        extract_timeout: Wall-clock limit in seconds for extracting one item
+        extract_memory_limit_mb: Memory limit in MB for each extraction process
+
+    Returns:
+        Tuple of (list of (item, analysis result), dict of item to failure reason)
+    """
+    extract_workers = extract_workers or os.cpu_count() or 1
+    queue_size = queue_size if queue_size is not None else max_in_flight
+    extract_slots = asyncio.Semaphore(extract_workers * 2)
+    analysis_slots = asyncio.Semaphore(max_in_flight)
+    # Bounds the items between the start of extraction and the end of analysis
+    window = asyncio.Semaphore(max_in_flight + queue_size)
+    results = []
+    failures = {}
+    loop = asyncio.get_running_loop()
+
+    def finish(item: Any, result: Any = None, error: Optional[str] = None) -> None:
+        if error is None:
+            results.append((item, result))
+        else:
+            failures[item] = error
+        if progress is not None:
+            progress.update(1)
+
+    async def process(pool: Any, item: Any) -> None:
+        async with window:
+            async with extract_slots:
+                try:
+                    payload = await loop.run_in_executor(pool, extract_fn, item)
+                except Exception as e:
+                    logger.error(f"Extraction failed for {item}: {str(e)}")
+                    finish(item, error=f"extraction failed: {str(e)}")
+                    return
+            async with analysis_slots:
+                try:
+                    result = await analyze_fn(item, payload)
+                except Exception as e:
+                    logger.error(f"Analysis failed for {item}: {str(e)}")
+                    finish(item, error=f"analysis failed: {str(e)}")
+                    return
+            finish(item, result)
+
+    if extract_timeout or extract_memory_limit_mb:
+        executor = WatchdogPool(extract_workers, timeout=extract_timeout, memory_limit_mb=extract_memory_limit_mb)
+    else:
+        executor = ProcessPoolExecutor(max_workers=extract_workers)
+    with executor as pool:
+        await asyncio.gather(*(process(pool, item) for item in items))
+
+    return results, failures
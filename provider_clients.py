@@ -0,0 +1,487 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default number of pooled keep-alive connections per provider
+DEFAULT_MAX_CONNECTIONS = 4
+
+# Seconds a discovered list of Gemini models stays valid
+DEFAULT_GEMINI_MODELS_TTL = 24 * 3600
+
+# SDK modules imported by each provider's clients, slowest first
+PROVIDER_MODULES = {
+    "openai": ("openai",),
+    "anthropic": ("anthropic",),
+    "gemini": ("google.generativeai",),
+    "mistral": ("mistral.client", "mistral.models.chat_completion"),
+    "groq": ("groq",),
+    "openrouter": ("requests",),
+    "deepseek": ("requests",)
+}
+
+# Modules the async clients of providers called over plain HTTP are built from
+ASYNC_HTTP_MODULES = ("httpx",)
+
+def resolve_gemini_model_name(model_name: str, available_models: List[str]) -> str:
+    """
+    Match a configured Gemini model name against the models the API offers.
+
+    Args:
+        model_name: The configured model name, with or without the "models/" prefix
+        available_models: Model names returned by the Gemini API
+
+    Returns:
+        The model name to use
+    """
+    if model_name in available_models:
+        return model_name
+
+    logger.warning(f"Model {model_name} not found in available models. Using fallback.")
+    # Try with different formatting
+    alt_model_name = model_name.replace("models/", "")
+    if f"models/{alt_model_name}" in available_models:
+        return f"models/{alt_model_name}"
+    if alt_model_name in available_models:
+        return alt_model_name
+
+    # Last resort: use any available gemini model
+    for name in available_models:
+        if "gemini" in name:
+            logger.warning(f"Using fallback Gemini model: {name}")
+            return name
+    raise ValueError("No Gemini models available")
+
+class ClientRegistry:
+    """
+    Thread-safe registry of long-lived provider clients.
+
+    Each provider client is built once per API key and then shared by every
+    call, so TLS sessions and keep-alive connections are reused across papers.
+    Connection pools are sized to the configured concurrency.
+    """
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.gemini_models_ttl = DEFAULT_GEMINI_MODELS_TTL
+        self.gemini_models_cache_path = None
+        self._gemini_models = {}
+        self._clients = {}
+        self._stats = {}
+        self._response_hooks = []
+        self._warm_ups = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        max_connections: Optional[int] = None,
+        gemini_models_ttl: Optional[float] = None,
+        gemini_models_cache_path: Optional[str] = None
+    ) -> None:
+        """
+        Configure clients built from now on.
+
+        Args:
+            max_connections: Maximum number of concurrent connections per provider
+            gemini_models_ttl: Seconds a discovered list of Gemini models stays valid
+            gemini_models_cache_path: File the Gemini model list is persisted to between runs
+        """
+        with self._lock:
+            if max_connections is not None:
+                self.max_connections = max(1, max_connections)
+            if gemini_models_ttl is not None:
+                self.gemini_models_ttl = gemini_models_ttl
+            if gemini_models_cache_path is not None:
+                self.gemini_models_cache_path = gemini_models_cache_path
+
+    def _provider_stats(self, provider: str) -> Dict[str, int]:
+        return self._stats.setdefault(provider, {"clients_created": 0, "client_reuses": 0, "http_requests": 0})
+
+    def _count_request(self, provider: str) -> None:
+        with self._lock:
+            self._provider_stats(provider)["http_requests"] += 1
+
+    def add_response_hook(self, hook: Callable[[str, Mapping[str, str]], None]) -> None:
+        """
+        Register a function called with (provider, headers) for every HTTP response.
+
+        Args:
+            hook: Function receiving the provider name and the response headers
+        """
+        with self._lock:
+            if hook not in self._response_hooks:
+                self._response_hooks.append(hook)
+
+    def _on_response(self, provider: str, headers: Mapping[str, str]) -> None:
+        for hook in list(self._response_hooks):
+            try:
+                hook(provider, headers)
+            except Exception as e:
+                logger.warning(f"Response hook failed for {provider}: {str(e)}")
+
+    def get(self, provider: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return the client for a provider and API key, building it on first use.
+
+        Args:
+            provider: Provider name
+            api_key: API key the client is bound to
+            factory: Function building a new client
+
+        Returns:
+            The shared client
+        """
+        key: Tuple[str, str] = (provider, api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._provider_stats(provider)["client_reuses"] += 1
+                return client
+        # Build outside the lock; SDK imports and construction can be slow
+        client = factory()
+        with self._lock:
+            if key in self._clients:
+                self._provider_stats(provider)["client_reuses"] += 1
+                return self._clients[key]
+            self._clients[key] = client
+            self._provider_stats(provider)["clients_created"] += 1
+        logger.info(f"Created {provider} client with a pool of {self.max_connections} connections")
+        return client
+
+    def _http_client(self, sdk: Any, provider: str, asynchronous: bool = False) -> Any:
+        """Build a pooled HTTP client for an SDK generated on top of httpx."""
+        client_class = getattr(sdk, "DefaultAsyncHttpxClient" if asynchronous else "DefaultHttpxClient", None)
+        if client_class is None:
+            import httpx
+            client_class = httpx.AsyncClient if asynchronous else httpx.Client
+        # SDKs may pin their own httpx distribution; build the limits from the same package
+        base_name = "AsyncClient" if asynchronous else "Client"
+        base = next(c for c in client_class.__mro__ if c.__name__ == base_name)
+        http_module = importlib.import_module(base.__module__.split(".")[0])
+
+        if asynchronous:
+            async def count_request(request: Any) -> None:
+                self._count_request(provider)
+
+            async def on_response(response: Any) -> None:
+                self._on_response(provider, response.headers)
+        else:
+            def count_request(request: Any) -> None:
+                self._count_request(provider)
+
+            def on_response(response: Any) -> None:
+                self._on_response(provider, response.headers)
+
+        return client_class(
+            limits=http_module.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            event_hooks={"request": [count_request], "response": [on_response]}
+        )
+
+    def openai(self, api_key: str) -> Any:
+        """Return a shared OpenAI client."""
+        def build():
+            import openai
+            return openai.OpenAI(api_key=api_key, http_client=self._http_client(openai, "openai"))
+        return self.get("openai", api_key, build)
+
+    def anthropic(self, api_key: str) -> Any:
+        """Return a shared Anthropic client."""
+        def build():
+            import anthropic
+            return anthropic.Anthropic(api_key=api_key, http_client=self._http_client(anthropic, "anthropic"))
+        return self.get("anthropic", api_key, build)
+
+    def groq(self, api_key: str) -> Any:
+        """Return a shared Groq client."""
+        def build():
+            import groq
+            return groq.Groq(api_key=api_key, http_client=self._http_client(groq, "groq"))
+        return self.get("groq", api_key, build)
+
+    def _async_key(self, api_key: str) -> str:
+        """Key async clients by event loop; their connections cannot be shared across loops."""
+        import asyncio
+        return f"async-{id(asyncio.get_running_loop())}:{api_key}"
+
+    def async_openai(self, api_key: str) -> Any:
+        """Return a shared AsyncOpenAI client for the running event loop."""
+        def build():
+            import openai
+            return openai.AsyncOpenAI(api_key=api_key, http_client=self._http_client(openai, "openai", True))
+        return self.get("openai", self._async_key(api_key), build)
+
+    def async_anthropic(self, api_key: str) -> Any:
+        """Return a shared AsyncAnthropic client for the running event loop."""
+        def build():
+            import anthropic
+            return anthropic.AsyncAnthropic(api_key=api_key,
+                                            http_client=self._http_client(anthropic, "anthropic", True))
+        return self.get("anthropic", self._async_key(api_key), build)
+
+    def async_groq(self, api_key: str) -> Any:
+        """Return a shared AsyncGroq client for the running event loop."""
+        def build():
+            import groq
+            return groq.AsyncGroq(api_key=api_key, http_client=self._http_client(groq, "groq", True))
+        return self.get("groq", self._async_key(api_key), build)
+
+    def async_http(self, provider: str) -> Any:
+        """
+        Return a shared httpx.AsyncClient for providers called over plain HTTP.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            An httpx.AsyncClient with a keep-alive pool sized to the configured concurrency
+        """
+        def build():
+            import httpx
+            return self._http_client(httpx, provider, True)
+        return self.get(provider, self._async_key(""), build)
+
+    async def aclose(self) -> None:
+        """Close the async clients bound to the running event loop."""
+        prefix = self._async_key("")
+        with self._lock:
+            keys = [key for key in self._clients if key[1].startswith(prefix)]
+            clients = [self._clients.pop(key) for key in keys]
+        for client in clients:
+            close = getattr(client, "aclose", None) or getattr(client, "close", None)
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"Error closing async client: {str(e)}")
+
+    def _build_client(self, provider: str, api_key: str, model: str) -> None:
+        """Build the synchronous client a provider's calls will use."""
+        if provider in ("openai", "anthropic", "groq", "mistral"):
+            getattr(self, provider)(api_key)
+        elif provider == "gemini":
+            self.gemini_model(api_key, model)
+        else:
+            self.session(provider)
+
+    def _warm_up_provider(self, provider: str, api_key: str, model: str, asynchronous: bool) -> None:
+        started = time.perf_counter()
+        modules = PROVIDER_MODULES.get(provider, ())
+        if asynchronous and provider not in ("openai", "anthropic", "groq", "gemini"):
+            modules = ASYNC_HTTP_MODULES
+        try:
+            for module in modules:
+                importlib.import_module(module)
+            imported = time.perf_counter() - started
+            # Async clients are bound to the event loop that uses them, so only their SDK is imported here
+            if not asynchronous:
+                self._build_client(provider, api_key, model)
+        except Exception as e:
+            # The first real call reports the problem with the provider's usual error handling
+            logger.warning(f"Could not warm up {provider} client: {str(e)}")
+            return
+        with self._lock:
+            self._warm_ups[provider] = {"import_seconds": imported, "total_seconds": time.perf_counter() - started}
+        logger.debug(f"Warmed up {provider} client in {time.perf_counter() - started:.2f}s")
+
+    def warm_up(self, providers: List[Tuple[str, str, str]], asynchronous: bool = False) -> threading.Thread:
+        """
+        Import SDKs and build clients for providers in a background thread.
+
+        Started before PDF discovery and extraction, this takes the SDK import
+        and client construction off the first analysis call of each provider.
+        Providers are warmed up in the given order, so the first provider to be
+        tried is ready first.
+
+        Args:
+            providers: (provider name, API key, model) of each configured provider that has a key
+            asynchronous: Whether the run uses the async clients
+
+        Returns:
+            The started daemon thread
+        """
+        def run():
+            for provider, api_key, model in providers:
+                self._warm_up_provider(provider, api_key, model, asynchronous)
+
+        thread = threading.Thread(target=run, name="client-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def warm_up_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return the seconds spent importing each warmed-up provider's SDK and in its whole warm-up."""
+        with self._lock:
+            return {provider: dict(values) for provider, values in self._warm_ups.items()}
+
+    def _load_gemini_models(self, key_id: str) -> Optional[List[str]]:
+        """Return the persisted Gemini model list for an API key if it is still fresh."""
+        if not self.gemini_models_cache_path:
+            return None
+        try:
+            with open(self.gemini_models_cache_path, 'r') as f:
+                entry = json.load(f).get(key_id)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry and time.time() - entry["timestamp"] < self.gemini_models_ttl:
+            return entry["models"]
+        return None
+
+    def _save_gemini_models(self, key_id: str, models: List[str]) -> None:
+        """Persist a discovered Gemini model list."""
+        if not self.gemini_models_cache_path:
+            return
+        try:
+            with open(self.gemini_models_cache_path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        data[key_id] = {"timestamp": time.time(), "models": models}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.gemini_models_cache_path)), exist_ok=True)
+            tmp_path = f"{self.gemini_models_cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.gemini_models_cache_path)
+        except OSError as e:
+            logger.warning(f"Could not persist Gemini model list: {str(e)}")
+
+    def gemini_available_models(self, api_key: str) -> List[str]:
+        """
+        Return the Gemini models available to an API key.
+
+        The list is discovered once and cached for gemini_models_ttl seconds,
+        in memory and, if configured, on disk between runs.
+
+        Args:
+            api_key: Gemini API key
+
+        Returns:
+            List of model names
+        """
+        # Never write the key itself to disk
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            cached = self._gemini_models.get(key_id)
+        if cached and time.time() - cached[0] < self.gemini_models_ttl:
+            return cached[1]
+
+        models = self._load_gemini_models(key_id)
+        if models is None:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            models = [model.name for model in genai.list_models()]
+            logger.info(f"Available Gemini models: {models}")
+            self._save_gemini_models(key_id, models)
+        with self._lock:
+            self._gemini_models[key_id] = (time.time(), models)
+        return models
+
+    def gemini_model(self, api_key: str, model_name: str) -> Any:
+        """
+        Return a shared GenerativeModel for the configured Gemini model.
+
+        Args:
+            api_key: Gemini API key
+            model_name: The configured model name
+
+        Returns:
+            A google.generativeai.GenerativeModel ready for generate_content
+        """
+        def build():
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            resolved = resolve_gemini_model_name(model_name, self.gemini_available_models(api_key))
+            logger.info(f"Using Gemini model: {resolved}")
+            return genai.GenerativeModel(resolved)
+        return self.get("gemini", f"{api_key}:{model_name}", build)
+
+    def mistral(self, api_key: str) -> Any:
+        """Return a shared Mistral client."""
+        def build():
+            from mistral.client import MistralClient
+            return MistralClient(api_key=api_key)
+        return self.get("mistral", api_key, build)
+
+    def session(self, provider: str) -> Any:
+        """
+        Return a shared requests session for providers called over plain HTTP.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            A requests.Session with a keep-alive pool sized to the configured concurrency
+        """
+        def build():
+            import requests
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.max_connections,
+                pool_maxsize=self.max_connections
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            def on_response(response: Any, *args: Any, **kwargs: Any) -> None:
+                self._count_request(provider)
+                self._on_response(provider, response.headers)
+
+            session.hooks["response"].append(on_response)
+            return session
+        # Sessions carry no credentials, so one per provider is enough
+        return self.get(provider, "", build)
+
+    def _connections_opened(self, client: Any) -> int:
+        """Count connections opened by a requests session's urllib3 pools, or -1 if unknown."""
+        adapters = getattr(client, "adapters", None)
+        if not adapters:
+            return -1
+        opened = 0
+        for adapter in set(adapters.values()):
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+        return opened
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return connection reuse statistics per provider.
+
+        Returns:
+            Dict of provider name to its clients created, client reuses, HTTP
+            requests sent and, for requests sessions, connections opened
+        """
+        with self._lock:
+            stats = {provider: dict(values) for provider, values in self._stats.items()}
+            clients = list(self._clients.items())
+        for (provider, _), client in clients:
+            opened = self._connections_opened(client)
+            if opened >= 0:
+                stats[provider]["connections_opened"] = stats[provider].get("connections_opened", 0) + opened
+        return stats
+
+    def summary(self) -> str:
+        """Return a one-line report of client and connection reuse."""
+        parts = []
+        for provider, values in sorted(self.stats().items()):
+            part = (f"{provider}: {values['clients_created']} clients, {values['client_reuses']} reuses, "
+                    f"{values['http_requests']} requests")
+            if "connections_opened" in values:
+                part += f" over {values['connections_opened']} connections"
+            parts.append(part)
+        summary = "Provider clients: " + ("; ".join(parts) if parts else "none used")
+        warm_ups = self.warm_up_stats()
+        if warm_ups:
+            summary += "; warmed up in the background: " + ", ".join(
+                f"{provider} {values['total_seconds']:.2f}s" for provider, values in warm_ups.items())
+        return summary
+
+# Shared by every provider call in the process
+client_registry = ClientRegistry()
@@ -4,6 +4,7 @@ import logging
 from typing import Dict, List, Optional, Union, Any
 import requests
 from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+from provider_registry import get_provider_registry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -75,62 +76,31 @@ def call_litellm_with_fallback(
     """
     try:
         import litellm
-        providers = load_providers_config(provider_config_path)
+        # The registry only re-reads the config file when it changes
+        resolved = get_provider_registry(provider_config_path).resolve(custom_provider_order)
         
-        if not providers:
+        if not resolved.providers:
             raise ValueError("No providers configured. Please check your configuration file.")
         
-        # If custom order provided, reorder providers accordingly
-        if custom_provider_order:
-            # Create a mapping of provider names to their configurations
-            provider_map = {p["name"]: p for p in providers}
-            
-            # Create a new ordered list based on custom order
-            ordered_providers = []
-            for provider_name in custom_provider_order:
-                if provider_name in provider_map:
-                    ordered_providers.append(provider_map[provider_name])
-            
-            # Add any remaining providers not in the custom order at the end
-            for provider in providers:
-                if provider["name"] not in custom_provider_order:
-                    ordered_providers.append(provider)
-                    
-            providers = ordered_providers
-        
         # Track errors for detailed reporting
-        errors = {}
-        available_providers = []
-        unavailable_providers = []
-        
-        # First, check which providers have API keys available
-        for provider in providers:
-            provider_name = provider["name"]
-            api_key_env = provider["api_key_env"]
-            
-            if check_api_key_present(api_key_env):
-                available_providers.append(provider)
-            else:
-                unavailable_providers.append(provider_name)
-                errors[provider_name] = f"API key not configured ({api_key_env})"
+        errors = {spec.name: f"API key not configured ({spec.api_key_env})" for spec in resolved.missing}
         
-        if unavailable_providers:
-            logger.info(f"Skipping providers with missing API keys: {', '.join(unavailable_providers)}")
+        if resolved.missing:
+            logger.info(f"Skipping providers with missing API keys: {', '.join(spec.name for spec in resolved.missing)}")
             
-        if not available_providers:
-            missing_keys = [f"{p['name']} ({p['api_key_env']})" for p in providers]
+        if not resolved.available:
+            missing_keys = [f"{spec.name} ({spec.api_key_env})" for spec in resolved.providers]
             raise ApiKeyMissingException(
                 f"No API keys found for any provider. Please set at least one of: {', '.join(missing_keys)}"
             )
         
-        logger.info(f"Attempting to use providers in order: {[p['name'] for p in available_providers]}")
+        logger.info(f"Attempting to use providers in order: {[spec.name for spec, _ in resolved.available]}")
         
         # Now try each provider that has an API key
-        for provider in available_providers:
-            provider_name = provider["name"]
-            model = provider["default_model"]
-            api_key_env = provider["api_key_env"]
-            api_key = os.environ.get(api_key_env)
+        for spec, _ in resolved.available:
+            provider_name = spec.name
+            model = spec.default_model
+            api_key = os.environ.get(spec.api_key_env)
             
             try:
                 logger.info(f"Trying provider: {provider_name} with model: {model}")
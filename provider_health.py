@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Consecutive failures that open a provider's circuit
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Seconds an open circuit waits before letting a probe call through
+DEFAULT_COOLDOWN = 60.0
+
+# Upper bound for the cool-down, which doubles every time a probe fails
+DEFAULT_MAX_COOLDOWN = 15 * 60.0
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider.
+
+    Closed: calls go through and consecutive failures are counted; reaching
+    the threshold opens the circuit. Open: calls are refused until the
+    cool-down has passed, then the circuit turns half-open. Half-open: a
+    single probe call goes through; success closes the circuit, failure
+    reopens it with a doubled cool-down.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float, max_cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.last_error = None
+        self.skipped = 0
+
+    def allow(self, now: float) -> bool:
+        """Return whether a call may be sent now, starting a probe if the cool-down is over."""
+        if self.state == CLOSED:
+            return True
+        probe_due = self.state == OPEN and now >= self.opened_at + self.cooldown
+        # A probe that never reported back (e.g. its thread died) is given up after one cool-down
+        probe_lost = self.state == HALF_OPEN and now >= self.probe_started + self.cooldown
+        if probe_due or probe_lost:
+            self.state = HALF_OPEN
+            self.probe_started = now
+            return True
+        self.skipped += 1
+        return False
+
+    def record_success(self) -> bool:
+        """Close the circuit; return True if that changed its state."""
+        changed = self.state != CLOSED
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = self.base_cooldown
+        self.probe_started = None
+        return changed
+
+    def record_failure(self, now: float, error: str) -> bool:
+        """Count a failure; return True if the circuit opened."""
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        elif self.state == OPEN or self.consecutive_failures < self.failure_threshold:
+            return False
+        self.state = OPEN
+        self.opened_at = now
+        self.probe_started = None
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "cooldown": self.cooldown,
+            "opened_at": self.opened_at,
+            "last_error": self.last_error
+        }
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        # A probe interrupted by the end of the last run is retried as soon as allowed
+        self.state = OPEN if data.get("state") in (OPEN, HALF_OPEN) else CLOSED
+        self.consecutive_failures = int(data.get("consecutive_failures", 0))
+        self.cooldown = min(float(data.get("cooldown", self.base_cooldown)), self.max_cooldown)
+        self.opened_at = float(data.get("opened_at", 0.0))
+        self.last_error = data.get("last_error")
+
+class ProviderHealth:
+    """
+    Thread-safe health tracker holding a circuit breaker per provider.
+
+    Shared by every call in the process, so a provider that keeps failing is
+    skipped immediately by later calls instead of being waited on for each
+    paper, and only probed again once its cool-down has passed. If state_path
+    is set, circuit states are loaded from and saved to that JSON file so a
+    provider known to be down stays skipped across runs.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN,
+        max_cooldown: float = DEFAULT_MAX_COOLDOWN,
+        state_path: Optional[str] = None
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state_path = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        if state_path:
+            self.load(state_path)
+
+    def configure(
+        self,
+        failure_threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        state_path: Optional[str] = None
+    ) -> None:
+        """
+        Change the thresholds for breakers created from now on and optionally enable persistence.
+
+        Args:
+            failure_threshold: Consecutive failures that open a circuit
+            cooldown: Seconds before an open circuit is probed again
+            state_path: JSON file to load circuit states from and save them to
+        """
+        with self._lock:
+            if failure_threshold is not None:
+                self.failure_threshold = max(1, failure_threshold)
+            if cooldown is not None:
+                self.cooldown = cooldown
+            self._breakers.clear()
+        if state_path:
+            self.load(state_path)
+
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.cooldown, self.max_cooldown)
+            self._breakers[provider] = breaker
+        return breaker
+
+    def allow(self, provider: str) -> bool:
+        """
+        Return whether a call to a provider may be sent now.
+
+        Args:
+            provider: Provider name
+
+        Returns:
+            False while the provider's circuit is open
+        """
+        with self._lock:
+            breaker = self._breaker(provider)
+            allowed = breaker.allow(time.time())
+            state = breaker.state
+        if allowed and state == HALF_OPEN:
+            logger.info(f"Probing {provider} after its circuit cool-down")
+        return allowed
+
+    def record_success(self, provider: str) -> None:
+        """Record a successful call, closing the provider's circuit."""
+        with self._lock:
+            changed = self._breaker(provider).record_success()
+        if changed:
+            logger.info(f"Circuit for {provider} closed; provider is healthy again")
+            self.save()
+
+    def record_failure(self, provider: str, error: str) -> None:
+        """Record a failed call, opening the provider's circuit once it keeps failing."""
+        with self._lock:
+            breaker = self._breaker(provider)
+            opened = breaker.record_failure(time.time(), error)
+            cooldown = breaker.cooldown
+            failures = breaker.consecutive_failures
+        if opened:
+            logger.warning(f"Circuit for {provider} opened after {failures} consecutive failures; "
+                           f"skipping it for {cooldown:.0f}s")
+            self.save()
+
+    def load(self, state_path: str) -> None:
+        """Restore circuit states from a JSON file and save future changes to it."""
+        self.state_path = state_path
+        try:
+            with open(state_path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable provider health file {state_path}: {str(e)}")
+            return
+        with self._lock:
+            for provider, state in data.get("providers", {}).items():
+                self._breaker(provider).restore(state)
+
+    def save(self) -> None:
+        """Write the circuit states to state_path atomically, if persistence is enabled."""
+        if not self.state_path:
+            return
+        with self._lock:
+            data = {"providers": {name: breaker.to_dict() for name, breaker in self._breakers.items()}}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            tmp_path = f"{self.state_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not save provider health: {str(e)}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the state, consecutive failures and skipped calls per provider."""
+        with self._lock:
+            return {
+                name: {"state": breaker.state, "consecutive_failures": breaker.consecutive_failures,
+                       "skipped": breaker.skipped}
+                for name, breaker in self._breakers.items()
+            }
+
+    def summary(self) -> str:
+        """Return a one-line report of each provider's circuit."""
+        parts = [
+            f"{name}: {values['state']}, {values['skipped']} calls skipped"
+            for name, values in sorted(self.stats().items())
+        ]
+        return "Provider health: " + ("; ".join(parts) if parts else "no calls made")
+
+# Shared by every provider call in the process
+provider_health = ProviderHealth()
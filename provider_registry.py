@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the config file's modification time
+DEFAULT_CHECK_INTERVAL = 1.0
+
+# Fields every provider entry must define
+REQUIRED_FIELDS = ("name", "default_model", "api_key_env")
+
+# Optional fields that must be positive numbers when present
+POSITIVE_NUMBER_FIELDS = ("requests_per_minute", "tokens_per_minute", "context_window", "max_output_tokens")
+
+class ProviderSpec(NamedTuple):
+    """A validated provider entry from providers_config.json."""
+    name: str
+    default_model: str
+    api_key_env: str
+    # Any further settings from the entry, read-only
+    options: Mapping[str, Any]
+
+class ResolvedProviders(NamedTuple):
+    """Providers in the order they should be tried for one custom order."""
+    # Every configured provider, in order
+    providers: Tuple[ProviderSpec, ...]
+    # Providers with an API key, paired with their call function (None if not implemented)
+    available: Tuple[Tuple[ProviderSpec, Optional[Callable]], ...]
+    # Providers whose API key is not set
+    missing: Tuple[ProviderSpec, ...]
+
+class RegistrySnapshot(NamedTuple):
+    """Immutable view of the configuration as loaded at one point in time."""
+    providers: Tuple[ProviderSpec, ...]
+    by_name: Mapping[str, ProviderSpec]
+    mtime: Optional[float]
+    # Resolved orders, filled lazily per custom order
+    resolved: Dict[Tuple[str, ...], ResolvedProviders]
+
+def parse_providers(config: Dict[str, Any]) -> Tuple[ProviderSpec, ...]:
+    """
+    Validate the "providers" list of a configuration.
+
+    Args:
+        config: The parsed configuration file
+
+    Returns:
+        Tuple of provider specs in configured order
+    """
+    providers = []
+    seen = set()
+    for index, entry in enumerate(config.get("providers", [])):
+        missing = [field for field in REQUIRED_FIELDS if not isinstance(entry.get(field), str) or not entry.get(field)]
+        if missing:
+            raise ValueError(f"Provider entry {index} is missing {', '.join(missing)}")
+        for field in POSITIVE_NUMBER_FIELDS:
+            value = entry.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                raise ValueError(f"Provider {entry['name']} has an invalid {field}: {value!r}")
+        if entry["name"] in seen:
+            raise ValueError(f"Provider {entry['name']} is configured more than once")
+        seen.add(entry["name"])
+        options = {key: value for key, value in entry.items() if key not in REQUIRED_FIELDS}
+        providers.append(ProviderSpec(entry["name"], entry["default_model"], entry["api_key_env"],
+                                      MappingProxyType(options)))
+    return tuple(providers)
+
+def _api_key_present(api_key_env: str) -> bool:
+    api_key = os.environ.get(api_key_env)
+    return api_key is not None and api_key.strip() != ""
+
+class ProviderRegistry:
+    """
+    Compiled, hot-reloadable view of providers_config.json.
+
+    The configuration is parsed and validated once into an immutable
+    snapshot. Resolved provider orders (with API key checks and bound call
+    functions) are computed once per custom order and cached on the
+    snapshot. The file's modification time is checked at most every
+    check_interval seconds; when it changes, a new snapshot is built and
+    swapped in atomically, and an invalid file keeps the previous snapshot.
+    """
+
+    def __init__(
+        self,
+        config_path: str = "providers_config.json",
+        call_functions: Optional[Mapping[str, Callable]] = None,
+        check_interval: float = DEFAULT_CHECK_INTERVAL
+    ):
+        self.config_path = config_path
+        self.call_functions = MappingProxyType(dict(call_functions or {}))
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._snapshot = RegistrySnapshot((), MappingProxyType({}), None, {})
+        self.reload(force=True)
+
+    def _read_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild the snapshot if the config file changed.
+
+        Args:
+            force: Rebuild even if the modification time is unchanged
+
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with self._lock:
+            mtime = self._read_mtime()
+            if not force and mtime == self._snapshot.mtime:
+                return False
+            try:
+                with open(self.config_path, 'r') as f:
+                    providers = parse_providers(json.load(f))
+            except (OSError, json.JSONDecodeError, ValueError, AttributeError) as e:
+                logger.error(f"Error loading provider config: {str(e)}")
+                if self._snapshot.mtime is not None:
+                    # Keep serving the last good configuration
+                    return False
+                providers = ()
+            self._snapshot = RegistrySnapshot(
+                providers,
+                MappingProxyType({spec.name: spec for spec in providers}),
+                mtime,
+                {}
+            )
+        if providers:
+            logger.info(f"Loaded {len(providers)} providers from {self.config_path}")
+        return True
+
+    def bind(self, call_functions: Mapping[str, Callable]) -> None:
+        """Attach provider call functions and drop orders resolved without them."""
+        with self._lock:
+            self.call_functions = MappingProxyType(dict(call_functions))
+            self._snapshot = self._snapshot._replace(resolved={})
+
+    def snapshot(self) -> RegistrySnapshot:
+        """Return the current snapshot, reloading first if the file changed."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self.reload()
+        return self._snapshot
+
+    def provider(self, name: str) -> Optional[ProviderSpec]:
+        """Return the spec of a configured provider, or None."""
+        return self.snapshot().by_name.get(name)
+
+    def resolve(self, custom_provider_order: Optional[List[str]] = None) -> ResolvedProviders:
+        """
+        Return the providers in the order they should be tried.
+
+        Providers named in custom_provider_order come first, in that order,
+        followed by the remaining providers in configured order.
+
+        Args:
+            custom_provider_order: Optional custom order of provider names
+
+        Returns:
+            The resolved providers
+        """
+        snapshot = self.snapshot()
+        key = tuple(custom_provider_order or ())
+        resolved = snapshot.resolved.get(key)
+        if resolved is not None:
+            return resolved
+
+        providers = [snapshot.by_name[name] for name in key if name in snapshot.by_name]
+        providers += [spec for spec in snapshot.providers if spec.name not in key]
+        available = tuple(
+            (spec, self.call_functions.get(spec.name)) for spec in providers if _api_key_present(spec.api_key_env)
+        )
+        missing = tuple(spec for spec in providers if not _api_key_present(spec.api_key_env))
+        resolved = ResolvedProviders(tuple(providers), available, missing)
+        snapshot.resolved[key] = resolved
+        return resolved
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_provider_registry(
+    config_path: str = "providers_config.json",
+    call_functions: Optional[Mapping[str, Callable]] = None
+) -> ProviderRegistry:
+    """
+    Return the shared registry for a config file, creating it on first use.
+
+    Args:
+        config_path: Path to the providers configuration JSON file
+        call_functions: Provider call functions to bind if the registry has none yet
+
+    Returns:
+        The registry for config_path
+    """
+    key = os.path.abspath(config_path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = ProviderRegistry(config_path, call_functions)
+            _registries[key] = registry
+            return registry
+    if call_functions and not registry.call_functions:
+        registry.bind(call_functions)
+    return registry
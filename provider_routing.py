@@ -0,0 +1,166 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest observation in each moving average
+DEFAULT_ALPHA = 0.2
+
+# Floor for the success rate when scoring, so a failing provider gets a large but finite score
+MIN_SUCCESS_RATE = 0.05
+
+class ProviderStats:
+    """Exponentially weighted moving averages for one provider and model."""
+
+    def __init__(self):
+        self.latency = None
+        self.tokens_per_second = None
+        self.success_rate = None
+        self.calls = 0
+
+    @staticmethod
+    def _ewma(current: Optional[float], value: float, alpha: float) -> float:
+        return value if current is None else alpha * value + (1 - alpha) * current
+
+    def record(self, success: bool, latency: float, output_tokens: int, alpha: float) -> None:
+        self.calls += 1
+        self.success_rate = self._ewma(self.success_rate, 1.0 if success else 0.0, alpha)
+        if success:
+            self.latency = self._ewma(self.latency, latency, alpha)
+            if latency > 0:
+                self.tokens_per_second = self._ewma(self.tokens_per_second, output_tokens / latency, alpha)
+
+    def score(self, output_tokens: Optional[int] = None) -> float:
+        """
+        Expected seconds per successful call; lower is better.
+
+        With output_tokens, a call is expected to take as long as the
+        provider's output rate needs for that many tokens, so a provider that
+        was fast on short responses is not preferred for a long one.
+        """
+        if self.latency is None:
+            # Failures only: rank behind every provider that has answered
+            return float("inf") if self.calls else 0.0
+        seconds = self.latency
+        if output_tokens and self.tokens_per_second:
+            seconds = output_tokens / self.tokens_per_second
+        return seconds / max(self.success_rate, MIN_SUCCESS_RATE)
+
+class AdaptiveRouter:
+    """
+    Latency-aware ordering of the provider fallback chain.
+
+    Keeps an EWMA of latency, output tokens per second and success rate per
+    provider and model, and reorders providers by expected seconds per
+    successful call (from the output rate when the response length is
+    known). Providers are only reordered within a run of consecutive
+    providers sharing the same "tier" option; a provider without one is a
+    tier of its own, so configured priorities are kept. Providers without
+    any observations are tried first within their tier so they get measured.
+    """
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA, enabled: bool = False):
+        self.alpha = alpha
+        self.enabled = enabled
+        self._stats: Dict[Tuple[str, str], ProviderStats] = {}
+        self._last_order: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: Optional[bool] = None, alpha: Optional[float] = None) -> None:
+        """
+        Turn adaptive routing on or off and set the EWMA weight.
+
+        Args:
+            enabled: Whether order() reorders providers
+            alpha: Weight of the newest observation (0 to 1)
+        """
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if alpha is not None:
+                self.alpha = alpha
+
+    def _provider_stats(self, spec: Any) -> ProviderStats:
+        return self._stats.setdefault((spec.name, spec.default_model), ProviderStats())
+
+    def record(self, spec: Any, success: bool, latency: float, output_tokens: int = 0) -> None:
+        """
+        Record the outcome of one call.
+
+        Args:
+            spec: The provider's ProviderSpec
+            success: Whether the call returned a response
+            latency: Seconds the call took
+            output_tokens: Estimated tokens in the response
+        """
+        with self._lock:
+            self._provider_stats(spec).record(success, latency, output_tokens, self.alpha)
+
+    def order(self, available: Sequence[Tuple[Any, Any]], output_tokens: Optional[int] = None) -> List[Tuple[Any, Any]]:
+        """
+        Reorder (spec, call function) pairs within each tier by expected latency.
+
+        Args:
+            available: Providers in configured order
+            output_tokens: Expected length of the response, if known
+
+        Returns:
+            The providers in the order they should be tried
+        """
+        if not self.enabled:
+            return list(available)
+
+        with self._lock:
+            scores = {spec.name: self._provider_stats(spec).score(output_tokens) for spec, _ in available}
+            groups = []
+            for position, entry in enumerate(available):
+                # Without a configured tier a provider keeps its position
+                tier = entry[0].options.get("tier", ("position", position))
+                if groups and groups[-1][0] == tier:
+                    groups[-1][1].append(entry)
+                else:
+                    groups.append((tier, [entry]))
+            ordered = [entry for _, group in groups for entry in sorted(group, key=lambda e: scores[e[0].name])]
+
+            configured = tuple(spec.name for spec, _ in available)
+            names = tuple(spec.name for spec, _ in ordered)
+            changed = self._last_order.get(configured) != names
+            self._last_order[configured] = names
+            details = ", ".join(self._describe(spec) for spec, _ in ordered)
+        if changed:
+            logger.info(f"Adaptive routing order: {details}")
+        return ordered
+
+    def _describe(self, spec: Any) -> str:
+        stats = self._provider_stats(spec)
+        if stats.latency is None:
+            return f"{spec.name} (no data)" if not stats.calls else f"{spec.name} (failing)"
+        tps = f", {stats.tokens_per_second:.0f} tok/s" if stats.tokens_per_second is not None else ""
+        return f"{spec.name} ({stats.latency:.2f}s{tps}, {stats.success_rate:.0%} ok)"
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the moving averages and call count per provider and model."""
+        with self._lock:
+            return {
+                f"{name}/{model}": {"latency": s.latency, "tokens_per_second": s.tokens_per_second,
+                                    "success_rate": s.success_rate, "calls": s.calls}
+                for (name, model), s in self._stats.items()
+            }
+
+    def summary(self) -> str:
+        """Return a one-line report of the routing statistics."""
+        parts = []
+        for key, values in sorted(self.stats().items()):
+            if not values["calls"]:
+                continue
+            if values["latency"] is None:
+                parts.append(f"{key}: {values['calls']} calls, none succeeded")
+            else:
+                tps = f", {values['tokens_per_second']:.0f} tok/s" if values["tokens_per_second"] is not None else ""
+                parts.append(f"{key}: {values['calls']} calls, {values['latency']:.2f}s{tps}, "
+                             f"{values['success_rate']:.0%} ok")
+        return "Adaptive routing: " + ("; ".join(parts) if parts else "no calls made")
+
+# Shared by every provider call in the process
+provider_router = AdaptiveRouter()
@@ -0,0 +1,224 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Provider options in providers_config.json that configure the limiter
+RATE_LIMIT_FIELDS = ("requests_per_minute", "tokens_per_minute")
+
+# Rate limit response headers per kind of bucket: (remaining, reset)
+RATE_LIMIT_HEADERS = {
+    "requests": [
+        ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+        ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+        ("x-ratelimit-remaining", "x-ratelimit-reset"),
+    ],
+    "tokens": [
+        ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+    ],
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset(value: str) -> Optional[float]:
+    """
+    Parse a rate limit reset header into seconds from now.
+
+    Accepts durations ("1s", "6m0s", "20ms"), plain seconds, epoch timestamps
+    in seconds or milliseconds, and RFC 3339 timestamps.
+
+    Args:
+        value: The header value
+
+    Returns:
+        Seconds until the limit resets, or None if the value is not understood
+    """
+    value = value.strip()
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return max(0.0, reset_at.timestamp() - time.time())
+    if number > 1e12:
+        return max(0.0, number / 1000 - time.time())
+    if number > 1e9:
+        return max(0.0, number - time.time())
+    return max(0.0, number)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity per minute.
+
+    Reservations are taken immediately and may drive the level negative; the
+    caller then waits until the level would have recovered, so concurrent
+    callers queue up in arrival order instead of racing for the same tokens.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return the seconds to wait before using it."""
+        self._refill(now)
+        # A single request larger than the bucket can never fit; let it through once full
+        amount = min(amount, self.capacity)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def sync(self, remaining: float, reset: Optional[float], now: float) -> None:
+        """Lower the level to what the provider reports as remaining."""
+        self._refill(now)
+        if remaining <= 0 and reset:
+            # Empty until the provider's window resets
+            self.level = min(self.level, -reset * self.rate)
+        else:
+            self.level = min(self.level, remaining)
+
+class ProviderRateLimiter:
+    """Request and token buckets for one provider."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.limits = (requests_per_minute, tokens_per_minute)
+        self.buckets = {}
+        if requests_per_minute:
+            self.buckets["requests"] = TokenBucket(requests_per_minute)
+        if tokens_per_minute:
+            self.buckets["tokens"] = TokenBucket(tokens_per_minute)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.header_syncs = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve capacity for one request.
+
+        Args:
+            tokens: Estimated tokens the request counts against the quota
+
+        Returns:
+            Seconds to wait before sending the request
+        """
+        now = time.monotonic()
+        amounts = {"requests": 1, "tokens": tokens}
+        with self._lock:
+            delay = max((bucket.reserve(amounts[kind], now) for kind, bucket in self.buckets.items()), default=0.0)
+            if delay > 0:
+                self.waits += 1
+                self.wait_seconds += delay
+        return delay
+
+    def acquire(self, tokens: int) -> None:
+        """Block until a request of the given size may be sent."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int) -> None:
+        """Wait on the event loop until a request of the given size may be sent."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Tighten the buckets to the remaining quota reported in response headers."""
+        now = time.monotonic()
+        with self._lock:
+            for kind, bucket in self.buckets.items():
+                for remaining_header, reset_header in RATE_LIMIT_HEADERS[kind]:
+                    remaining = headers.get(remaining_header)
+                    if remaining is None:
+                        continue
+                    try:
+                        remaining = float(remaining)
+                    except ValueError:
+                        break
+                    reset = headers.get(reset_header)
+                    bucket.sync(remaining, parse_reset(reset) if reset else None, now)
+                    self.header_syncs += 1
+                    break
+
+class RateLimiterRegistry:
+    """
+    Process-wide rate limiters, one per provider with configured limits.
+
+    Limits are read from the provider's requests_per_minute and
+    tokens_per_minute options in providers_config.json. A limiter is rebuilt
+    when those options change after a config reload.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, spec: Any) -> Optional[ProviderRateLimiter]:
+        """
+        Return the limiter for a provider, or None if it has no configured limits.
+
+        Args:
+            spec: The provider's ProviderSpec
+
+        Returns:
+            The provider's limiter
+        """
+        limits: Tuple[Optional[float], ...] = tuple(spec.options.get(field) for field in RATE_LIMIT_FIELDS)
+        with self._lock:
+            limiter = self._limiters.get(spec.name)
+            if limiter is not None and limiter.limits == limits:
+                return limiter
+            if not any(limits):
+                self._limiters.pop(spec.name, None)
+                return None
+            limiter = ProviderRateLimiter(*limits)
+            self._limiters[spec.name] = limiter
+        logger.info(f"Rate limiting {spec.name} to {limits[0] or 'unlimited'} requests "
+                    f"and {limits[1] or 'unlimited'} tokens per minute")
+        return limiter
+
+    def update_from_headers(self, provider: str, headers: Mapping[str, str]) -> None:
+        """Feed a provider response's headers to its limiter, if it has one."""
+        with self._lock:
+            limiter = self._limiters.get(provider)
+        if limiter is not None:
+            limiter.update_from_headers(headers)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return the number of paced requests, total wait and header syncs per provider."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            name: {"waits": limiter.waits, "wait_seconds": limiter.wait_seconds, "header_syncs": limiter.header_syncs}
+            for name, limiter in limiters.items()
+        }
+
+    def summary(self) -> str:
+        """Return a one-line report of the pacing applied to each provider."""
+        parts = [
+            f"{name}: {values['waits']} requests paced for {values['wait_seconds']:.1f}s, "
+            f"{values['header_syncs']} header updates"
+            for name, values in sorted(self.stats().items())
+        ]
+        return "Rate limiters: " + ("; ".join(parts) if parts else "none configured")
+
+# Shared by every provider call in the process
+rate_limiters = RateLimiterRegistry()
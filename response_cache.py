@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live of cached responses, in seconds (one week)
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Default maximum total size of cached responses, in bytes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses in a local SQLite file.
+
+    Responses are keyed by provider, model, the hashes of the system message
+    and prompt, and the generation parameters. Entries older than ttl seconds
+    are ignored and purged, and the least recently used entries are evicted
+    once the cached content exceeds max_bytes.
+    """
+
+    def __init__(self, db_path: str, ttl: Optional[float] = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, provider TEXT, model TEXT, content TEXT, "
+            "created REAL, last_access REAL, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        system_message: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool
+    ) -> str:
+        """Build the cache key for one request to one provider and model."""
+        parts = [provider, model, _sha256(system_message), _sha256(prompt), max_tokens, temperature, json_mode]
+        return _sha256(json.dumps(parts))
+
+    def _fresh_after(self) -> float:
+        return time.time() - self.ttl if self.ttl else 0.0
+
+    def get_first(self, keys: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Return the first cached response among several candidate keys.
+
+        Counts as a single hit or miss, however many keys are given.
+
+        Args:
+            keys: Cache keys in order of preference
+
+        Returns:
+            Dict with the cached "content", "provider" and "model", or None on a miss
+        """
+        if not keys:
+            return None
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, provider, model, content FROM responses WHERE key IN ({placeholders}) AND created >= ?",
+                (*keys, self._fresh_after())
+            ).fetchall()
+            if not rows:
+                self.misses += 1
+                return None
+            found = {row[0]: row for row in rows}
+            key, provider, model, content = found[next(k for k in keys if k in found)]
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return {"content": content, "provider": provider, "model": model}
+
+    def put(self, key: str, provider: str, model: str, content: str) -> None:
+        """
+        Store a response and evict old entries if the cache is over budget.
+
+        Args:
+            key: Cache key built with make_key()
+            provider: Provider that produced the response
+            model: Model that produced the response
+            content: The response text
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, content, now, now, len(content.encode("utf-8")))
+            )
+            self.writes += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Purge expired entries, then the least recently used ones until under max_bytes."""
+        if self.ttl:
+            self.evictions += self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (self._fresh_after(),)
+            ).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, write and eviction counters for this run."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "evictions": self.evictions}
+
+    def summary(self) -> str:
+        """Return a one-line report of the cache hit rate for this run."""
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0.0
+        return (f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate:.0%} hit rate), "
+                f"{stats['writes']} writes, {stats['evictions']} evictions")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+# Cache consulted by call_provider_with_fallback; None disables caching
+_active_cache = None
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Set the process-wide response cache (None to disable caching)."""
+    global _active_cache
+    _active_cache = cache
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if caching is disabled."""
+    return _active_cache
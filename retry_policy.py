@@ -0,0 +1,224 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Attempts per logical request (the first try included)
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds a logical request may take across all of its attempts
+DEFAULT_DEADLINE = 300.0
+
+# Seconds the final literature review may take; a long review can take far longer than one paper analysis
+DEFAULT_SYNTHESIS_DEADLINE = 1800.0
+
+# Retries allowed per request made, on top of MIN_RETRIES, for the whole run
+DEFAULT_RETRY_RATIO = 0.2
+
+# Retries always available, so a short run can still retry
+MIN_RETRIES = 10
+
+class DeadlineExceeded(Exception):
+    """Exception raised when a request runs out of time across its attempts."""
+    pass
+
+def _describe(error: BaseException) -> str:
+    """Return the first line of an error's message, or its type if it has none."""
+    message = str(error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+class RetryPolicy:
+    """
+    Single retry and deadline policy shared by a whole run.
+
+    Each logical request (analyzing one paper, synthesizing the review) gets
+    at most max_attempts attempts, all within one deadline; a request of a
+    stage listed in stage_deadlines gets that stage's deadline. Retries also
+    draw from a run-wide budget of MIN_RETRIES plus retry_ratio retries per
+    request, so a bad batch fails fast instead of multiplying calls.
+
+    Errors are retried only if they are retryable: an error's own
+    "retryable" attribute decides if present, otherwise its type is checked
+    against the fatal and retryable exception types. Backoff is exponential
+    with full jitter and never sleeps past the deadline.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        deadline: Optional[float] = DEFAULT_DEADLINE,
+        retry_ratio: float = DEFAULT_RETRY_RATIO,
+        stage_deadlines: Optional[Dict[str, Optional[float]]] = None,
+        retryable: Tuple[Type[BaseException], ...] = (),
+        fatal: Tuple[Type[BaseException], ...] = (),
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.deadline = deadline
+        self.retry_ratio = retry_ratio
+        self.stage_deadlines = dict(stage_deadlines if stage_deadlines is not None
+                                    else {"synthesis": DEFAULT_SYNTHESIS_DEADLINE})
+        self.retryable = retryable
+        self.fatal = fatal + (DeadlineExceeded,)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.retries = 0
+        self.budget_denials = 0
+        self.fatal_errors = 0
+        self.deadline_expiries = 0
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        max_attempts: Optional[int] = None,
+        deadline: Optional[float] = None,
+        retry_ratio: Optional[float] = None,
+        stage_deadlines: Optional[Dict[str, float]] = None
+    ) -> None:
+        """
+        Set the attempt limit, deadlines and run-wide retry budget.
+
+        Args:
+            max_attempts: Attempts per logical request, the first try included
+            deadline: Seconds a logical request may take across its attempts (0 for no deadline)
+            retry_ratio: Retries allowed per request made, on top of MIN_RETRIES
+            stage_deadlines: Deadlines replacing the default one for requests of some stages
+                (seconds per stage name, 0 for no deadline)
+        """
+        with self._lock:
+            if max_attempts is not None:
+                self.max_attempts = max(1, max_attempts)
+            if deadline is not None:
+                self.deadline = deadline if deadline > 0 else None
+            if retry_ratio is not None:
+                self.retry_ratio = max(0.0, retry_ratio)
+            if stage_deadlines is not None:
+                self.stage_deadlines.update({stage: seconds if seconds > 0 else None
+                                             for stage, seconds in stage_deadlines.items()})
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Return whether an error is worth another attempt."""
+        retryable = getattr(error, "retryable", None)
+        if retryable is not None:
+            return bool(retryable)
+        if isinstance(error, self.fatal):
+            return False
+        return isinstance(error, self.retryable)
+
+    def start(self, stage: Optional[str] = None) -> Optional[float]:
+        """Count a new logical request of a stage and return its monotonic deadline (None for no deadline)."""
+        with self._lock:
+            self.requests += 1
+            seconds = self.stage_deadlines.get(stage, self.deadline) if stage is not None else self.deadline
+        return time.monotonic() + seconds if seconds else None
+
+    def remaining(self, deadline: Optional[float]) -> Optional[float]:
+        """
+        Return the seconds left before a deadline.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if deadline is None:
+            return None
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return left
+
+    def next_delay(self, error: BaseException, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        """
+        Decide whether to retry after a failed attempt.
+
+        Args:
+            error: The error the attempt failed with
+            attempt: Number of the attempt that failed, starting at 1
+            deadline: The request's monotonic deadline
+
+        Returns:
+            Seconds to sleep before the next attempt, or None to give up
+        """
+        if not self.is_retryable(error):
+            with self._lock:
+                if isinstance(error, DeadlineExceeded):
+                    self.deadline_expiries += 1
+                else:
+                    self.fatal_errors += 1
+            return None
+        if attempt >= self.max_attempts:
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            with self._lock:
+                self.deadline_expiries += 1
+            return None
+        with self._lock:
+            if self.retries >= MIN_RETRIES + self.retry_ratio * self.requests:
+                self.budget_denials += 1
+                logger.warning("Run retry budget exhausted; not retrying")
+                return None
+            self.retries += 1
+        return delay
+
+    def call(self, fn: Callable[[int, Optional[float]], Any], stage: Optional[str] = None) -> Any:
+        """
+        Run a request with retries.
+
+        Args:
+            fn: Function called with (attempt number starting at 1, monotonic deadline)
+            stage: Optional stage of the request, which may have its own deadline
+
+        Returns:
+            The result of the first successful attempt
+        """
+        deadline = self.start(stage)
+        attempt = 1
+        while True:
+            try:
+                self.remaining(deadline)
+                return fn(attempt, deadline)
+            except Exception as e:
+                delay = self.next_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                logger.warning(f"Attempt {attempt} failed ({_describe(e)}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    async def call_async(self, fn: Callable[[int, Optional[float]], Awaitable[Any]],
+                         stage: Optional[str] = None) -> Any:
+        """Async version of call(); each attempt is also cancelled when the deadline passes."""
+        deadline = self.start(stage)
+        attempt = 1
+        while True:
+            try:
+                try:
+                    return await asyncio.wait_for(fn(attempt, deadline), timeout=self.remaining(deadline))
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded("Request deadline exceeded")
+            except Exception as e:
+                delay = self.next_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                logger.warning(f"Attempt {attempt} failed ({_describe(e)}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return request, retry, budget denial, fatal error and deadline counts for the run."""
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries, "budget_denials": self.budget_denials,
+                    "fatal_errors": self.fatal_errors, "deadline_expiries": self.deadline_expiries}
+
+    def summary(self) -> str:
+        """Return a one-line report of retries for the run."""
+        stats = self.stats()
+        return (f"Retries: {stats['retries']} for {stats['requests']} requests, "
+                f"{stats['budget_denials']} denied by the run budget, {stats['fatal_errors']} fatal errors, "
+                f"{stats['deadline_expiries']} deadlines exceeded")
@@ -0,0 +1,194 @@
+import re
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from token_budget import estimate_tokens, trim_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Heading keywords for each section, matched at the start of a line
+SECTION_HEADINGS = {
+    "abstract": r"abstract",
+    "introduction": r"introduction|background",
+    "methods": r"materials? and methods|patients and methods|methods?|methodology|experimental procedures",
+    "results": r"results",
+    "discussion": r"discussion",
+    "conclusion": r"conclusions?|concluding remarks",
+    "references": r"references|bibliography|literature cited|works cited",
+}
+
+# Order in which sections receive their share of the token budget
+DEFAULT_SECTION_PRIORITY = ["front_matter", "abstract", "conclusion", "results", "methods", "discussion", "introduction"]
+
+# Sections that are never sent to the model
+DROPPED_SECTIONS = {"references"}
+
+# Tokens of title/author/affiliation text kept so the model can fill in title, authors and year
+FRONT_MATTER_TOKENS = 200
+
+_HEADING_PATTERN = re.compile(
+    r"^(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?\s*)?(?P<keyword>"
+    + "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_HEADINGS.items())
+    + r")\b(?P<rest>.*)$",
+    re.IGNORECASE
+)
+
+def _match_heading(line: str) -> Tuple[Optional[str], str]:
+    """
+    Check whether a line is a section heading.
+
+    Args:
+        line: A single line of extracted text
+
+    Returns:
+        Tuple of (section name or None, text following the heading on the same line)
+    """
+    if len(line) > 80:
+        return None, ""
+    match = _HEADING_PATTERN.match(line)
+    if not match or not match.group("keyword")[0].isupper():
+        return None, ""
+
+    name = next(n for n in SECTION_HEADINGS if match.group(n))
+    rest = match.group("rest").strip(" :.-")
+    # An abstract often starts on the heading line; other headings are short titles, not sentences
+    if name != "abstract" and (len(rest) > 40 or rest.endswith(".")):
+        return None, ""
+    return name, rest if name == "abstract" else ""
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    Split line-structured paper text into its sections.
+
+    Text before the first recognised heading is returned as "front_matter".
+    Only the first heading of each kind starts a section; repeated headings
+    (e.g. running page headers) stay in the section they appear in.
+
+    Args:
+        text: Extracted text with one line per text line of the PDF
+
+    Returns:
+        Dict of section name to section text, in document order
+    """
+    sections = {}
+    current = "front_matter"
+    buffer = []
+    for line in text.split("\n"):
+        name, remainder = _match_heading(line.strip())
+        if name is not None and name not in sections and name != current:
+            sections[current] = " ".join(buffer).strip()
+            current = name
+            buffer = [remainder] if remainder else []
+        else:
+            buffer.append(line.strip())
+    sections[current] = " ".join(buffer).strip()
+    return {name: body for name, body in sections.items() if body}
+
+def _trim(text: str, tokens: int) -> str:
+    """Trim text to roughly the given number of tokens, ending on a word boundary."""
+    trimmed = trim_to_tokens(text, tokens)
+    if len(trimmed) >= len(text):
+        return text
+    return trimmed.rsplit(" ", 1)[0] + " ..."
+
+def select_sections(
+    text: str,
+    token_budget: int,
+    priority: Optional[List[str]] = None,
+    front_matter_tokens: int = FRONT_MATTER_TOKENS
+) -> Dict[str, Any]:
+    """
+    Build the analysis text for a paper from its sections within a token budget.
+
+    Every section first receives an equal share of the budget (front matter
+    is capped at front_matter_tokens); budget left over by short sections is
+    then handed out in priority order. The bibliography is always dropped.
+    Sections are emitted in document order.
+
+    Args:
+        text: Extracted text with one line per text line of the PDF
+        token_budget: Maximum number of tokens of paper text to select
+        priority: Section names in the order they receive leftover budget
+        front_matter_tokens: Cap on the title/author/affiliation text kept
+
+    Returns:
+        Dict with the selected "text", the "sections" found, and the
+        "original_tokens", "selected_tokens" and "reference_tokens" counts
+    """
+    priority = priority or DEFAULT_SECTION_PRIORITY
+    sections = split_sections(text)
+    reference_tokens = sum(estimate_tokens(sections[name]) for name in DROPPED_SECTIONS if name in sections)
+    candidates = [name for name in priority if name in sections]
+    sizes = {name: estimate_tokens(sections[name]) for name in candidates}
+    if "front_matter" in sizes:
+        sizes["front_matter"] = min(sizes["front_matter"], front_matter_tokens)
+
+    # First pass: an equal share for every section present
+    allocation = {}
+    share = token_budget // max(len(candidates), 1)
+    for name in candidates:
+        allocation[name] = min(sizes[name], share)
+
+    # Second pass: hand out what is left in priority order
+    remaining = token_budget - sum(allocation.values())
+    for name in candidates:
+        if remaining <= 0:
+            break
+        extra = min(sizes[name] - allocation[name], remaining)
+        allocation[name] += extra
+        remaining -= extra
+
+    parts = []
+    for name, body in sections.items():
+        if allocation.get(name, 0) <= 0:
+            continue
+        label = "Front matter" if name == "front_matter" else name.capitalize()
+        parts.append(f"{label}: {_trim(body, allocation[name])}")
+    selected = "\n\n".join(parts)
+
+    return {
+        "text": selected,
+        "sections": list(sections),
+        "original_tokens": estimate_tokens(text),
+        "selected_tokens": estimate_tokens(selected),
+        "reference_tokens": reference_tokens
+    }
+
+class SectionSelectionStats:
+    """Thread-safe accumulator for the token savings of section selection over a run."""
+
+    def __init__(self):
+        self.papers = 0
+        self.original_tokens = 0
+        self.selected_tokens = 0
+        self.reference_tokens = 0
+        self.head_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, selection: Dict[str, Any], head_tokens: int) -> None:
+        """
+        Record the outcome of selecting sections for one paper.
+
+        Args:
+            selection: Dict returned by select_sections()
+            head_tokens: Tokens the paper would have used with plain head truncation
+        """
+        with self._lock:
+            self.papers += 1
+            self.original_tokens += selection["original_tokens"]
+            self.selected_tokens += selection["selected_tokens"]
+            self.reference_tokens += selection["reference_tokens"]
+            self.head_tokens += head_tokens
+
+    def summary(self) -> str:
+        """Return a one-line report of the tokens saved during the run."""
+        with self._lock:
+            if not self.papers:
+                return "Section selection: no papers processed"
+            saved = self.head_tokens - self.selected_tokens
+            return (
+                f"Section selection: sent {self.selected_tokens} of {self.original_tokens} tokens "
+                f"across {self.papers} papers ({self.reference_tokens} bibliography tokens dropped); "
+                f"head truncation would have sent {self.head_tokens} tokens, "
+                f"{saved} tokens ({saved / max(self.head_tokens, 1):.0%}) saved"
+            )
@@ -0,0 +1,78 @@
+import re
+import sys
+import logging
+import subprocess
+from typing import List, NamedTuple, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Number of imports listed for each group of the report
+DEFAULT_TOP = 12
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+class ImportCost(NamedTuple):
+    """Import time of one module as reported by python -X importtime."""
+    module: str
+    depth: int
+    self_ms: float
+    cumulative_ms: float
+
+def measure_import_costs(modules: Sequence[str], cwd: str) -> List[ImportCost]:
+    """
+    Import modules in a fresh interpreter under python -X importtime.
+
+    A fresh interpreter is used so modules already loaded by this process
+    are measured too.
+
+    Args:
+        modules: Modules to import, in order
+        cwd: Directory the interpreter runs in (so local modules are found)
+
+    Returns:
+        Import costs of every module loaded, in the order they finished importing
+    """
+    statements = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statements],
+                            cwd=cwd, capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        logger.warning(f"Import profiling failed: {result.stderr.strip().splitlines()[-1:]}")
+    costs = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            costs.append(ImportCost(match.group(4), len(match.group(3)) // 2,
+                                    int(match.group(1)) / 1000, int(match.group(2)) / 1000))
+    return costs
+
+def format_startup_profile(costs: List[ImportCost], main_module: str, top: int = DEFAULT_TOP) -> str:
+    """
+    Format import costs as a report of the main module's slowest imports and of the provider SDKs.
+
+    Args:
+        costs: Costs from measure_import_costs, with main_module imported first
+        main_module: Name of the program's own module
+        top: Number of imports listed per group
+
+    Returns:
+        The report text
+    """
+    main_cost = next((cost for cost in costs if cost.module == main_module and cost.depth == 0), None)
+    if main_cost is None:
+        return f"Startup profile: {main_module} could not be imported"
+    main_index = costs.index(main_cost)
+    # Direct imports of the main module are listed at depth 1 between it and the previous top-level import
+    start = max((index + 1 for index, cost in enumerate(costs[:main_index]) if cost.depth == 0), default=0)
+    direct = [cost for cost in costs[start:main_index] if cost.depth == 1]
+    # Top-level imports finishing after the main module are the SDKs, loaded in the background during a run
+    sdks = [cost for cost in costs[main_index + 1:] if cost.depth == 0]
+
+    lines = ["Startup profile (python -X importtime, fresh interpreter)",
+             f"  {main_module} imports: {main_cost.cumulative_ms:8.1f} ms"]
+    for cost in sorted(direct, key=lambda cost: cost.cumulative_ms, reverse=True)[:top]:
+        lines.append(f"    {cost.module:<40}{cost.cumulative_ms:8.1f} ms")
+    if sdks:
+        lines.append(f"  Provider SDKs (imported in the background): {sum(cost.cumulative_ms for cost in sdks):8.1f} ms")
+        for cost in sorted(sdks, key=lambda cost: cost.cumulative_ms, reverse=True)[:top]:
+            lines.append(f"    {cost.module:<40}{cost.cumulative_ms:8.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,39 @@
+import requests
+import pytest
+
+from batch_api import AnthropicBatchClient, OpenAIBatchClient, run_batch
+from batch_stub_server import ERRORED, MAX_TOKENS, SUCCEEDED, StubBatchServer
+
+OUTCOMES = {"ok": SUCCEEDED, "failed": ERRORED, "cut": MAX_TOKENS}
+
+def responder(custom_id, prompt):
+    return OUTCOMES[custom_id], f"answer to {prompt}"
+
+def make_requests():
+    return [
+        {"custom_id": custom_id, "system_message": "You are a helpful assistant.", "prompt": f"prompt {custom_id}",
+         "max_tokens": 100, "temperature": 0.7, "json_mode": False}
+        for custom_id in OUTCOMES
+    ]
+
+@pytest.mark.parametrize("client_class, base_path", [(OpenAIBatchClient, "/v1"), (AnthropicBatchClient, "")])
+def test_run_batch_collects_success_failure_and_max_tokens(tmp_path, client_class, base_path):
+    with StubBatchServer(responder, polls_until_done=2) as server, requests.Session() as session:
+        client = client_class("test-key", "test-model", session, base_url=server.url + base_path)
+        contents, failures = run_batch(client, make_requests(), str(tmp_path / "batch.jsonl"), poll_interval=0.01)
+
+        assert contents == {"ok": "answer to prompt ok"}
+        assert set(failures) == {"failed", "cut"}
+        assert failures["cut"] == "response reached max_tokens"
+        assert "answer to prompt failed" in failures["failed"]
+        assert [batch["polls"] for batch in server.batches.values()] == [3]
+
+def test_run_batch_cancels_a_batch_that_does_not_finish(tmp_path):
+    with StubBatchServer(responder, polls_until_done=None) as server, requests.Session() as session:
+        client = OpenAIBatchClient("test-key", "test-model", session, base_url=server.url)
+        contents, failures = run_batch(client, make_requests(), str(tmp_path / "batch.jsonl"),
+                                       poll_interval=0.01, timeout=0.05)
+
+        assert contents == {}
+        assert failures == {custom_id: "batch timed out" for custom_id in OUTCOMES}
+        assert [batch["cancelled"] for batch in server.batches.values()] == [True]
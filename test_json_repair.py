@@ -0,0 +1,65 @@
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from json_repair import JsonRepairer, parse_json_tolerant
+
+class Summary(BaseModel):
+    title: str
+    authors: List[str]
+    year: int
+    findings: str
+
+def test_trailing_comma():
+    assert parse_json_tolerant('{"title": "T", "authors": ["A", "B",],}') == {"title": "T", "authors": ["A", "B"]}
+
+def test_truncated_array_keeps_complete_members():
+    assert parse_json_tolerant('{"title": "T", "year": 2020, "authors": ["A", "B') == {
+        "title": "T", "year": 2020, "authors": ["A", "B"]}
+
+def test_truncated_member_is_dropped():
+    assert parse_json_tolerant('{"title": "T", "year": 2020, "findings": "The res') == {
+        "title": "T", "year": 2020, "findings": "The res"}
+    assert parse_json_tolerant('{"title": "T", "year": 2020, "findings":') == {
+        "title": "T", "year": 2020, "findings": None}
+
+def test_prose_and_code_fence_around_object():
+    text = 'Here is the summary:\n```json\n{"title": "T", "year": 2020}\n```\nLet me know if you need more.'
+    assert parse_json_tolerant(text) == {"title": "T", "year": 2020}
+    assert parse_json_tolerant('Sure! {"title": "T"} Hope this helps.') == {"title": "T"}
+
+def test_python_literals_and_single_quotes():
+    assert parse_json_tolerant("{'title': 'T', 'open': True, 'note': None}") == {
+        "title": "T", "open": True, "note": None}
+
+def test_missing_comma_is_not_repaired_by_dropping_members():
+    with pytest.raises(ValueError):
+        parse_json_tolerant('{"title": "T", "year": 2020 "findings": "F", "authors": ["A"]}')
+
+def test_no_object():
+    with pytest.raises(ValueError):
+        parse_json_tolerant("I could not read this paper.")
+
+def test_repair_coerces_year_and_authors_given_as_strings():
+    repairer = JsonRepairer()
+    summary = repairer.repair('{"title": "T", "authors": "Smith, J.; Doe, A.", "year": "circa 2019", "findings": "F"}',
+                              Summary)
+    assert summary.year == 2019
+    assert summary.authors == ["Smith, J.", "Doe, A."]
+    assert repairer.stats() == {"attempts": 1, "saved_calls": 1, "failures": 0, "filled_fields": 0}
+
+def test_repair_fills_missing_optional_fields():
+    repairer = JsonRepairer()
+    summary = repairer.repair('{"title": "T", "authors": ["A"], "year": 2020', Summary, required=("title",))
+    assert summary.findings == "Not specified"
+    assert repairer.stats()["filled_fields"] == 1
+
+def test_repair_fails_on_missing_required_field_and_missing_comma():
+    repairer = JsonRepairer()
+    with pytest.raises(ValueError):
+        repairer.repair('{"authors": ["A"], "year": 2020, "findings": "F"}', Summary, required=("title",))
+    with pytest.raises(ValueError):
+        repairer.repair('{"title": "T" "authors": ["A"], "year": 2020, "findings": "F"}', Summary)
+    assert repairer.stats()["failures"] == 2
+    assert repairer.stats()["saved_calls"] == 0
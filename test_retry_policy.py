@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from retry_policy import MIN_RETRIES, DeadlineExceeded, RetryPolicy
+
+class Flaky(Exception):
+    pass
+
+class Fatal(Exception):
+    pass
+
+def failing(error, calls):
+    def fn(number, deadline):
+        calls.append(number)
+        raise error
+    return fn
+
+def make_policy(**kwargs):
+    options = dict(max_attempts=3, retryable=(Flaky,), fatal=(Fatal,), base_delay=0.0)
+    options.update(kwargs)
+    return RetryPolicy(**options)
+
+def test_retries_until_success():
+    policy = make_policy()
+    calls = []
+
+    def fn(number, deadline):
+        calls.append(number)
+        if number < 3:
+            raise Flaky("try again")
+        return "ok"
+
+    assert policy.call(fn) == "ok"
+    assert calls == [1, 2, 3]
+    assert policy.stats()["retries"] == 2
+
+def test_gives_up_after_max_attempts():
+    policy = make_policy()
+    calls = []
+    with pytest.raises(Flaky):
+        policy.call(failing(Flaky("down"), calls))
+    assert calls == [1, 2, 3]
+
+def test_fatal_errors_are_not_retried():
+    policy = make_policy()
+    calls = []
+    with pytest.raises(Fatal):
+        policy.call(failing(Fatal("bad key"), calls))
+    assert calls == [1]
+    assert policy.stats()["fatal_errors"] == 1
+
+def test_retryable_attribute_overrides_the_type():
+    policy = make_policy()
+    error = Flaky("not worth it")
+    error.retryable = False
+    calls = []
+    with pytest.raises(Flaky):
+        policy.call(failing(error, calls))
+    assert calls == [1]
+
+def test_run_budget_stops_retries():
+    policy = make_policy(max_attempts=100, retry_ratio=0.0)
+    calls = []
+    with pytest.raises(Flaky):
+        policy.call(failing(Flaky("down"), calls))
+    assert len(calls) == MIN_RETRIES + 1
+    assert policy.stats()["budget_denials"] == 1
+
+    # The budget is shared by the whole run, so the next request is not retried at all
+    calls.clear()
+    with pytest.raises(Flaky):
+        policy.call(failing(Flaky("down"), calls))
+    assert calls == [1]
+
+def test_deadline_stops_retries():
+    policy = make_policy(max_attempts=100, deadline=0.2, base_delay=0.05, max_delay=0.05)
+    calls = []
+    started = time.monotonic()
+    with pytest.raises((Flaky, DeadlineExceeded)):
+        policy.call(failing(Flaky("down"), calls))
+    assert time.monotonic() - started < 0.5
+    assert 1 <= len(calls) < 100
+    assert policy.stats()["deadline_expiries"] == 1
+
+def test_deadline_exceeded_is_fatal():
+    policy = make_policy()
+    calls = []
+    with pytest.raises(DeadlineExceeded):
+        policy.call(failing(DeadlineExceeded("too late"), calls))
+    assert calls == [1]
+
+def test_stage_deadline_replaces_the_default():
+    policy = make_policy(deadline=10.0)
+    policy.configure(stage_deadlines={"synthesis": 1000.0, "slow": 0})
+    now = time.monotonic()
+    assert policy.start() - now == pytest.approx(10.0, abs=1.0)
+    assert policy.start("analysis") - now == pytest.approx(10.0, abs=1.0)
+    assert policy.start("synthesis") - now == pytest.approx(1000.0, abs=1.0)
+    assert policy.start("slow") is None
@@ -0,0 +1,109 @@
+import logging
+import importlib.util
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Approximate number of characters per token, used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Tokenizer used for models tiktoken does not know; other vendors' tokenizers are close enough for budgeting
+DEFAULT_ENCODING = "cl100k_base"
+
+# Tokens added to an estimate per chat request for roles and message framing
+MESSAGE_OVERHEAD_TOKENS = 10
+
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+_tokenizer_failed = False
+
+def tokenizer_available() -> bool:
+    """Return True if the optional tiktoken package is installed."""
+    return importlib.util.find_spec("tiktoken") is not None
+
+def _encoding(model: Optional[str]) -> Any:
+    """Return the tiktoken encoding for a model, or None to fall back to the heuristic."""
+    global _tokenizer_failed
+    if _tokenizer_failed or not tokenizer_available():
+        return None
+    key = model or ""
+    with _encodings_lock:
+        if key in _encodings:
+            return _encodings[key]
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+            except KeyError:
+                encoding = _encodings.get("") or tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            # tiktoken downloads its encodings on first use, which fails offline
+            logger.warning(f"Tokenizer unavailable, estimating tokens from characters: {str(e)}")
+            _tokenizer_failed = True
+            return None
+        _encodings[key] = encoding
+        return encoding
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Estimate the number of tokens in a piece of text.
+
+    Uses tiktoken when it is installed, otherwise CHARS_PER_TOKEN characters per token.
+
+    Args:
+        text: The text
+        model: Model the text is meant for, to pick its tokenizer
+
+    Returns:
+        The estimated token count
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+def trim_to_tokens(text: str, tokens: int, model: Optional[str] = None) -> str:
+    """
+    Trim text to at most the given number of tokens.
+
+    Args:
+        text: The text
+        tokens: Maximum number of tokens to keep
+        model: Model the text is meant for, to pick its tokenizer
+
+    Returns:
+        The start of the text within the token limit
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:tokens * CHARS_PER_TOKEN]
+    encoded = encoding.encode(text, disallowed_special=())
+    if len(encoded) <= tokens:
+        return text
+    return encoding.decode(encoded[:tokens])
+
+def estimate_request_tokens(system_message: str, prompt: str, max_tokens: int, model: Optional[str] = None) -> int:
+    """Estimate the tokens a chat request needs: its input plus the output reserved by max_tokens."""
+    return (estimate_tokens(system_message, model) + estimate_tokens(prompt, model)
+            + MESSAGE_OVERHEAD_TOKENS + max_tokens)
+
+def context_overflow(spec: Any, system_message: str, prompt: str, max_tokens: int) -> Optional[int]:
+    """
+    Check a request against a provider's context window.
+
+    Args:
+        spec: The provider's ProviderSpec; its "context_window" option is the model's limit
+        system_message: System message of the request
+        prompt: Prompt of the request
+        max_tokens: Output tokens reserved for the response
+
+    Returns:
+        None if the request fits (or no context window is configured), otherwise
+        the number of tokens the request needs
+    """
+    context_window = spec.options.get("context_window")
+    if not context_window:
+        return None
+    needed = estimate_request_tokens(system_message, prompt, max_tokens, spec.default_model)
+    return needed if needed > context_window else None